@@ -1,23 +1,226 @@
-import requests
-from typing import Optional, Dict, Any
+"""Investment memos: a cached, concurrent memo service over a pluggable backend.
 
-def generate_investment_memo(seed: Dict[str, Any], api_key: Optional[str], model: str = "gpt-4.1-mini") -> Optional[str]:
-    if not api_key:
-        return None
+Memos are keyed by sha256(prompt version, model, canonical narrative seed) and
+stored in the `memos` table (plus a small in-process front cache), so the same
+deal graded twice costs one model call. get_many() generates the misses of a
+top-N list concurrently (MEMO_CONCURRENCY), deduplicating equal seeds.
 
-    sys = "You are a senior real estate acquisitions analyst. Write a concise investor memo."
-    user = {"task": "Create an investment memo from the underwriting data. Use bullets. Include risks + mitigations.", "data": seed}
+Backends implement complete(messages, model) -> Optional[str] and
+stream(messages, model) -> Iterator[str]: OpenAIBackend (chat completions
+over a pooled session; stream consumes the server-sent events) and
+StubBackend (deterministic text from the seed; MEMO_BACKEND=stub, used by
+tests). MemoService.stream() yields tokens as they arrive and stores the
+memo only once the stream completes.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
 
-    try:
-        r = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-            json={"model": model, "messages": [{"role":"system","content":sys},{"role":"user","content":str(user)}], "temperature": 0.2, "max_tokens": 600},
-            timeout=30,
-        )
-        if r.status_code != 200:
+import telemetry
+from cache import TTLCache
+from db import backend, connect, exec_commit, fetchone
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+PROMPT_VERSION = "v1"  # bump when the prompt changes so old memos are not reused
+CONCURRENCY = int(os.getenv("MEMO_CONCURRENCY", "5"))
+TIMEOUT_SEC = float(os.getenv("MEMO_TIMEOUT_SEC", "30"))
+SYSTEM_PROMPT = "You are a senior real estate acquisitions analyst. Write a concise investor memo."
+TASK = "Create an investment memo from the underwriting data. Use bullets. Include risks + mitigations."
+
+_FRONT = TTLCache(ttl_sec=float(os.getenv("MEMO_CACHE_TTL_SEC", "3600")), maxsize=2000)
+telemetry.register_cache("memo", _FRONT)
+
+def now() -> int:
+    return int(time.time())
+
+def migrate() -> None:
+    conn = connect()
+    b = backend()
+    cur = conn.cursor() if b == "postgres" else conn
+    cur.execute("""CREATE TABLE IF NOT EXISTS memos(
+        memo_key TEXT PRIMARY KEY,
+        created_at INTEGER NOT NULL,
+        model TEXT,
+        memo TEXT NOT NULL
+    )""" if b == "sqlite" else """CREATE TABLE IF NOT EXISTS memos(
+        memo_key TEXT PRIMARY KEY,
+        created_at BIGINT NOT NULL,
+        model TEXT,
+        memo TEXT NOT NULL
+    )""")
+    conn.commit()
+    try: conn.close()
+    except Exception: pass
+
+def memo_key(seed: Dict[str, Any], model: str) -> str:
+    basis = json.dumps({"v": PROMPT_VERSION, "model": model, "seed": seed}, sort_keys=True, default=str)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+# Report outputs that describe the deal (later attachments such as risk_sim or memo are excluded)
+SEED_OUTPUTS = ("grade", "grade_detail", "score", "verdict", "confidence", "metrics", "flags", "rationale")
+
+def seed_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Memo seed for a saved report payload (same key whether asked from the app or the API)."""
+    o = payload.get("outputs") or {}
+    return {"inputs": payload.get("inputs") or {}, "outputs": {k: o.get(k) for k in SEED_OUTPUTS}}
+
+def messages(seed: Dict[str, Any]) -> List[Dict[str, str]]:
+    return [{"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": str({"task": TASK, "data": seed})}]
+
+# ---- Backends ----
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self, api_key: str, timeout: float = TIMEOUT_SEC):
+        import requests
+        self.api_key, self.timeout = api_key, timeout
+        self._session = requests.Session()  # keep-alive across memos
+
+    def complete(self, msgs: List[Dict[str, str]], model: str) -> Optional[str]:
+        try:
+            r = self._session.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                json={"model": model, "messages": msgs, "temperature": 0.2, "max_tokens": 600},
+                timeout=self.timeout,
+            )
+            if r.status_code != 200:
+                return None
+            return r.json()["choices"][0]["message"]["content"]
+        except Exception:
             return None
-        j = r.json()
-        return j["choices"][0]["message"]["content"]
-    except Exception:
-        return None
+
+    def stream(self, msgs: List[Dict[str, str]], model: str) -> Iterator[str]:
+        with self._session.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            json={"model": model, "messages": msgs, "temperature": 0.2, "max_tokens": 600, "stream": True},
+            timeout=self.timeout, stream=True,
+        ) as r:
+            if r.status_code != 200:
+                raise RuntimeError(f"openai status {r.status_code}")
+            for line in r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                delta = (json.loads(data).get("choices") or [{}])[0].get("delta") or {}
+                if delta.get("content"):
+                    yield delta["content"]
+
+class StubBackend:
+    """Deterministic offline memo built from the seed (tests, demos, no API key)."""
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, msgs: List[Dict[str, str]], model: str) -> Optional[str]:
+        self.calls += 1
+        digest = hashlib.sha256(msgs[-1]["content"].encode("utf-8")).hexdigest()[:8]
+        return f"Investment memo ({model}, stub {digest})\n- Based on the underwriting data provided.\n- Risks: verify rent, expenses and financing."
+
+    def stream(self, msgs: List[Dict[str, str]], model: str) -> Iterator[str]:
+        text = self.complete(msgs, model) or ""
+        for n, word in enumerate(text.split(" ")):
+            yield word if n == 0 else " " + word
+
+def backend_from_env(api_key: Optional[str]) -> Optional[Any]:
+    if os.getenv("MEMO_BACKEND", "").lower() == "stub":
+        return StubBackend()
+    return OpenAIBackend(api_key) if api_key else None
+
+# ---- Service ----
+class MemoService:
+    def __init__(self, memo_backend: Any, model: str = DEFAULT_MODEL, concurrency: int = CONCURRENCY):
+        self.backend = memo_backend
+        self.model = model
+        self.concurrency = max(1, int(concurrency))
+
+    def cached(self, key: str) -> Optional[str]:
+        memo = _FRONT.get(key)
+        if memo is None:
+            migrate()
+            row = fetchone("SELECT memo FROM memos WHERE memo_key=?", (key,))
+            memo = row[0] if row else None
+            if memo is not None:
+                _FRONT.set(key, memo)
+        return memo
+
+    def store(self, key: str, memo: str) -> None:
+        migrate()
+        exec_commit("INSERT INTO memos(memo_key, created_at, model, memo) VALUES(?,?,?,?) ON CONFLICT(memo_key) DO NOTHING",
+                    (key, now(), self.model, memo))
+        _FRONT.set(key, memo)
+
+    def get(self, seed: Dict[str, Any]) -> Optional[str]:
+        key = memo_key(seed, self.model)
+        memo = self.cached(key)
+        if memo is not None:
+            return memo
+        with telemetry.stage("memo_generate"):
+            memo = self.backend.complete(messages(seed), self.model)
+        if memo:  # failures are not cached; the next request retries
+            self.store(key, memo)
+        return memo
+
+    def stream(self, seed: Dict[str, Any]) -> Iterator[str]:
+        """Yield the memo incrementally; a cached memo comes back as one chunk."""
+        key = memo_key(seed, self.model)
+        memo = self.cached(key)
+        if memo is not None:
+            yield memo
+            return
+        parts: List[str] = []
+        t0 = time.perf_counter()
+        for chunk in self.backend.stream(messages(seed), self.model):
+            if not parts:
+                telemetry.STAGE_LATENCY.observe(time.perf_counter() - t0, stage="memo_first_token")
+            parts.append(chunk)
+            yield chunk
+        telemetry.STAGE_LATENCY.observe(time.perf_counter() - t0, stage="memo_generate")
+        if parts:  # only complete streams are cached; an abandoned stream leaves nothing behind
+            self.store(key, "".join(parts))
+
+    def get_many(self, seeds: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Memos for a list of seeds, cache misses generated concurrently (about one model round trip of wall time)."""
+        keys = [memo_key(s, self.model) for s in seeds]
+        found: Dict[str, Optional[str]] = {k: self.cached(k) for k in set(keys)}
+        todo = {k: s for k, s in zip(keys, seeds) if found[k] is None}
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(todo))) as pool:
+                for k, memo in zip(todo, pool.map(self.get, todo.values())):
+                    found[k] = memo
+        return [found[k] for k in keys]
+
+_SERVICES: Dict[tuple, MemoService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+def service(api_key: Optional[str], model: str = DEFAULT_MODEL) -> Optional[MemoService]:
+    """Process-wide service per (api key, model); None when no backend is configured."""
+    with _SERVICES_LOCK:
+        svc = _SERVICES.get((api_key, model))
+        if svc is None:
+            b = backend_from_env(api_key)
+            if b is None:
+                return None
+            svc = _SERVICES[(api_key, model)] = MemoService(b, model)
+        return svc
+
+def generate_investment_memo(seed: Dict[str, Any], api_key: Optional[str], model: str = DEFAULT_MODEL) -> Optional[str]:
+    svc = service(api_key, model)
+    return svc.get(seed) if svc else None
+
+def stream_investment_memo(seed: Dict[str, Any], api_key: Optional[str], model: str = DEFAULT_MODEL) -> Iterator[str]:
+    svc = service(api_key, model)
+    return svc.stream(seed) if svc else iter(())
+
+def generate_memos(seeds: List[Dict[str, Any]], api_key: Optional[str], model: str = DEFAULT_MODEL) -> List[Optional[str]]:
+    svc = service(api_key, model)
+    return svc.get_many(seeds) if svc else [None] * len(seeds)
@@ -0,0 +1,108 @@
+"""Loan amortization: payment, per-period interest / principal / balance.
+
+Balances use the closed form  B_k = L(1+r)^k - P((1+r)^k - 1)/r  so a single
+balance (e.g. at exit) costs O(1) and works on NumPy arrays of deals as well
+as on floats. Full schedules are cached per (loan, rate, term).
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+def monthly_payment(principal: float, annual_rate: float, years: int) -> Optional[float]:
+    try:
+        if principal <= 0 or years <= 0:
+            return None
+        r = max(0.0, annual_rate) / 12.0
+        n = years * 12
+        if r == 0:
+            return principal / n
+        return principal * (r * (1 + r) ** n) / (((1 + r) ** n) - 1)
+    except Exception:
+        return None
+
+def monthly_payment_v(principal, annual_rate, years) -> np.ndarray:
+    """monthly_payment over arrays; NaN where the scalar version returns None."""
+    principal, annual_rate, years = (np.asarray(x, dtype=float) for x in (principal, annual_rate, years))
+    r = np.maximum(0.0, annual_rate) / 12.0
+    n = years * 12
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = (1 + r) ** n
+        pay = np.where(r == 0, principal / n, principal * (r * growth) / (growth - 1))
+    return np.where((principal <= 0) | (years <= 0), np.nan, pay)
+
+def balance_after(principal: float, annual_rate: float, years: int, months: int,
+                  payment: Optional[float] = None) -> float:
+    """Remaining balance after `months` payments (0 once the loan is paid off)."""
+    if principal <= 0 or years <= 0:
+        return 0.0
+    n = int(years) * 12
+    if months >= n:
+        return 0.0
+    if months <= 0:
+        return float(principal)
+    pay = payment if payment is not None else monthly_payment(principal, annual_rate, years)
+    r = max(0.0, annual_rate) / 12.0
+    if r == 0:
+        return max(0.0, principal - pay * months)
+    g = (1 + r) ** months
+    return max(0.0, principal * g - pay * (g - 1) / r)
+
+def balance_after_v(principal, annual_rate, years, months, payment) -> np.ndarray:
+    """balance_after over arrays (same arithmetic as the scalar version)."""
+    principal, annual_rate, years, months, payment = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (principal, annual_rate, years, months, payment)])
+    n = years * 12
+    r = np.maximum(0.0, annual_rate) / 12.0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        g = (1 + r) ** months
+        bal = np.where(r == 0, principal - payment * months, principal * g - payment * (g - 1) / r)
+    bal = np.maximum(0.0, bal)
+    bal = np.where(months <= 0, principal, bal)
+    return np.where((principal <= 0) | (years <= 0) | (months >= n), 0.0, bal)
+
+@lru_cache(maxsize=1024)
+def _schedule(principal: float, annual_rate: float, years: int) -> Dict[str, np.ndarray]:
+    n = int(years) * 12
+    pay = monthly_payment(principal, annual_rate, years) or 0.0
+    k = np.arange(0, n + 1, dtype=float)
+    bal = balance_after_v(principal, annual_rate, years, k, pay)
+    interest = bal[:-1] * (max(0.0, annual_rate) / 12.0)
+    principal_paid = bal[:-1] - bal[1:]
+    out = {"payment": np.full(n, pay), "interest": interest, "principal": principal_paid, "balance": bal[1:]}
+    for a in out.values():
+        a.setflags(write=False)
+    return out
+
+def schedule(principal: float, annual_rate: float, years: int) -> Dict[str, np.ndarray]:
+    """Monthly arrays (length years*12): payment, interest, principal, balance (after each payment).
+    Cached; the returned arrays are read-only."""
+    return _schedule(round(float(principal), 2), float(annual_rate), int(years))
+
+def annual(principal: float, annual_rate: float, years: int, hold_years: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Per-year interest / principal paid and year-end balance (first hold_years years)."""
+    s = schedule(principal, annual_rate, years)
+    n_years = int(years) if hold_years is None else min(int(years), int(hold_years))
+    m = n_years * 12
+    return {
+        "interest": s["interest"][:m].reshape(n_years, 12).sum(axis=1),
+        "principal": s["principal"][:m].reshape(n_years, 12).sum(axis=1),
+        "balance": s["balance"][11:m:12].copy(),
+    }
+
+def schedule_batch(principal, annual_rate, years) -> Dict[str, np.ndarray]:
+    """Schedules for many loans at once: (D, max_months) arrays, zero past each loan's term."""
+    principal = np.asarray(principal, dtype=float).ravel()
+    annual_rate = np.asarray(annual_rate, dtype=float).ravel()
+    years = np.trunc(np.asarray(years, dtype=float).ravel())
+    n = years * 12
+    r = np.maximum(0.0, annual_rate) / 12.0
+    pay = np.nan_to_num(monthly_payment_v(principal, annual_rate, years))
+    N = int(n.max()) if n.size else 0
+    k = np.arange(0, N + 1, dtype=float)[None, :]
+    bal = balance_after_v(principal[:, None], annual_rate[:, None], years[:, None], k, pay[:, None])
+    live = k[:, 1:] <= n[:, None]
+    interest = np.where(live, bal[:, :-1] * r[:, None], 0.0)
+    principal_paid = np.where(live, bal[:, :-1] - bal[:, 1:], 0.0)
+    return {"payment": np.where(live, pay[:, None], 0.0), "interest": interest,
+            "principal": principal_paid, "balance": bal[:, 1:]}
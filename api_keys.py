@@ -1,5 +1,5 @@
 import time
-from db import backend, connect, exec_commit, fetchall, fetchone, insert_returning_id
+from db import backend, connect, exec_commit, fetchall, fetchone, insert_returning_id, afetchone, aensure
 import secrets
 import hashlib
 from typing import List, Dict, Any, Optional
@@ -74,3 +74,16 @@ def resolve_workspace(api_key: str) -> Optional[int]:
     cur = conn.execute("SELECT workspace_id FROM api_keys WHERE key_hash=? AND revoked_at IS NULL", (h,))
     row = cur.fetchone()
     return int(row[0]) if row else None
+
+# ---- Async lookups (API service) ----
+async def averify_key(workspace_id: int, api_key: str) -> bool:
+    await aensure(migrate)
+    h = _hash(api_key.strip())
+    row = await afetchone("SELECT 1 FROM api_keys WHERE workspace_id=? AND key_hash=? AND revoked_at IS NULL", (int(workspace_id), h))
+    return row is not None
+
+async def aresolve_workspace(api_key: str) -> Optional[int]:
+    await aensure(migrate)
+    h = _hash(api_key.strip())
+    row = await afetchone("SELECT workspace_id FROM api_keys WHERE key_hash=? AND revoked_at IS NULL", (h,))
+    return int(row[0]) if row else None
@@ -0,0 +1,79 @@
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback keeps the API usable without orjson
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (compression overhead > savings)
+COMPRESS_MIN_BYTES = 1024
+
+# view=compact: what partners actually read (grade, score and four headline metrics)
+COMPACT_SELECTION = [
+    "address", "grade", "grade_detail", "score", "confidence", "verdict",
+    "metrics.CapRate", "metrics.CoC", "metrics.DSCR", "metrics.IRR",
+]
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, separators=(",", ":")).encode("utf-8")
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """'grade,score,metrics.IRR' -> ['grade', 'score', 'metrics.IRR'] (None = no selection)."""
+    if not fields:
+        return None
+    out = [f.strip() for f in fields.split(",") if f.strip()]
+    return out or None
+
+def select_fields(content: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Project a response dict onto top-level fields; 'metrics.X' picks single metrics."""
+    out: Dict[str, Any] = {}
+    for f in fields:
+        if "." in f:
+            top, sub = f.split(".", 1)
+            src = content.get(top)
+            if isinstance(src, dict) and sub in src:
+                out.setdefault(top, {})[sub] = src[sub]
+        elif f in content:
+            out[f] = content[f]
+    return out
+
+def selection(view: str, fields: Optional[str]) -> Optional[List[str]]:
+    """Resolve ?view= / ?fields= into a field list (None = full response)."""
+    sel = parse_fields(fields)
+    if sel:
+        return sel
+    if (view or "full").lower() == "compact":
+        return list(COMPACT_SELECTION)
+    return None
+
+def needs(field: str, sel: Optional[List[str]]) -> bool:
+    """Whether a response part must be built at all for this selection."""
+    if sel is None:
+        return True
+    return any(f == field or f.startswith(field + ".") or field.startswith(f + ".") for f in sel)
+
+def encode(request: Request, content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize with orjson and compress (br > gzip) when the client accepts it."""
+    body = dumps(content)
+    hdrs = dict(headers or {})
+    accept = (request.headers.get("accept-encoding") or "").lower()
+    if len(body) >= COMPRESS_MIN_BYTES:
+        if brotli is not None and "br" in accept:
+            body = brotli.compress(body, quality=4)
+            hdrs["Content-Encoding"] = "br"
+        elif "gzip" in accept:
+            body = gzip.compress(body, compresslevel=5)
+            hdrs["Content-Encoding"] = "gzip"
+        hdrs["Vary"] = "Accept-Encoding"
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=hdrs)
@@ -1,26 +1,81 @@
-from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio
+import hashlib
 import json
 import stripe
 import os
+import time
 
-from api_keys import resolve_workspace, verify_key
-from billing import get_subscription, plan_limits, effective_plan
+from api_keys import aresolve_workspace, averify_key
+from billing import aget_subscription, plan_limits, effective_plan
 from stripe_webhooks import process_event
-from usage import count_last_24h, record
+from usage import acount_last_24h, arecord
 
+import ai_memo
+import bulk_export
+import audit
+import api_keys
+import billing
+import db
+import fingerprints
+import model_registry
+import pdf_cache
+import providers
+import ranking
+import storage
+import sweep
+import telemetry
+import usage
+from api_responses import dumps, encode, needs, select_fields, selection
+from cache import TTLCache
+from export_pdf import build_report_pdf
+from model_registry import aget_active_model, model_version
 from underwriting import DealInputs, run_underwriting
 from link_resolver import guess_address_from_url, looks_like_url
-from templates import BUILTIN_TEMPLATES, normalize_template
+from templates import BUILTIN_TEMPLATES, apply_template, normalize_template
 from provenance import pick, pack_provenance
+from logger import context as log_context, log_event, new_id
 
-app = FastAPI(title="AIRE API", version="1.0")
+_READY = False
+
+async def _warm_then_ready() -> None:
+    """Background warmup: the worker serves (and answers /ready with 503) until it finishes."""
+    global _READY
+    try:
+        await warmup()
+    except Exception as e:  # stay unready so the probe fails and the worker gets replaced
+        log_event("warmup_failed", level="error", error=repr(e))
+        return
+    _READY = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _READY
+    telemetry.start_snapshots()
+    warming = asyncio.create_task(_warm_then_ready())
+    yield
+    _READY = False
+    warming.cancel()
+    telemetry.write_snapshot()
+    await providers.aclose()
+    await db.aclose()
+    if _SCORING_POOL is not None:
+        _SCORING_POOL.shutdown(wait=False)
+
+app = FastAPI(title="AIRE API", version="1.0", lifespan=lifespan)
 # Stripe config (API service)
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 STRIPE_PRICE_ID_PRO = os.getenv("STRIPE_PRICE_ID_PRO", "")
 STRIPE_PRICE_ID_TEAM = os.getenv("STRIPE_PRICE_ID_TEAM", "")
+PROVIDER_KEYS = providers.keys_from_env()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 if STRIPE_SECRET_KEY:
     stripe.api_key = STRIPE_SECRET_KEY
 
@@ -31,7 +86,33 @@ class GradeRequest(BaseModel):
     price: Optional[float] = None
     monthly_rent: Optional[float] = None
     monthly_expenses: Optional[float] = None
-    use_auto: bool = False  # backend can be wired to real data similarly
+    use_auto: bool = False  # enrich missing price/rent/last sale from RentCast/Estated/ATTOM
+
+class ExportRequest(BaseModel):
+    report_ids: List[int] = []
+    since: Optional[int] = None  # unix seconds; with no report_ids, every report created in [since, until)
+    until: Optional[int] = None
+    format: str = "zip"  # "zip" (one PDF per report) or "pdf" (one page per report)
+
+class SweepRequest(BaseModel):
+    raw: str
+    price: Optional[float] = None
+    monthly_rent: Optional[float] = None
+    monthly_expenses: Optional[float] = None
+    use_auto: bool = False
+    templates: Optional[List[str]] = None  # default: all built-in + workspace templates
+
+class BatchRequest(BaseModel):
+    items: List[str]  # addresses or listing links
+    template_name: str = "Long-Term Rental (LTR)"
+    use_auto: bool = False
+    top_k: int = 50
+    order: Optional[List[str]] = None  # e.g. ["-score", "-confidence"]; "-" = higher first
+    min_score: Optional[float] = None
+    min_dscr: Optional[float] = None
+    min_coc: Optional[float] = None
+    min_irr: Optional[float] = None
+    max_price: Optional[float] = None
 
 class GradeResponse(BaseModel):
     address: str
@@ -48,72 +129,262 @@ class GradeResponse(BaseModel):
     rationale: List[str]
     provenance: Dict[str, Any]
 
+class GradeSelection(BaseModel):
+    """view=compact or ?fields=: only the selected fields are present (metrics holds only the selected metrics)."""
+    address: Optional[str] = None
+    grade: Optional[str] = None
+    grade_detail: Optional[str] = None
+    score: Optional[float] = None
+    score_base: Optional[float] = None
+    score_ai: Optional[float] = None
+    ai_weight: Optional[float] = None
+    confidence: Optional[float] = None
+    verdict: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    flags: Optional[List[str]] = None
+    rationale: Optional[List[str]] = None
+    provenance: Optional[Dict[str, Any]] = None
+
+# Normalized once (at warmup) instead of per request
+_TEMPLATES: Dict[str, Dict[str, Any]] = {}
+
+def _compile_templates() -> Dict[str, Dict[str, Any]]:
+    if not _TEMPLATES:
+        _TEMPLATES.update({name: normalize_template(t) for name, t in BUILTIN_TEMPLATES.items()})
+    return _TEMPLATES
+
 def _template_by_name(name: str) -> Dict[str, Any]:
-    if name in BUILTIN_TEMPLATES:
-        return normalize_template(BUILTIN_TEMPLATES[name])
-    return normalize_template(BUILTIN_TEMPLATES["Long-Term Rental (LTR)"])
-
-def _apply_template(t: Dict[str, Any], price: float, rent: float, exp: float):
-    defaults = (t.get("defaults") or {})
-    exp_pct = float(defaults.get("monthly_expenses_pct_of_rent", 0.45))
-    exp_est = exp if exp and exp > 0 else (rent * exp_pct if rent and rent > 0 else 0.0)
-    return {
-        "vacancy_rate": float(t.get("vacancy_rate", 0.08)),
-        "down_payment_pct": float(t.get("down_payment_pct", 20.0)),
-        "interest_rate_pct": float(t.get("interest_rate_pct", 7.25)),
-        "term_years": int(t.get("term_years", 30)),
-        "hold_years": int(t.get("hold_years", 7)),
-        "rent_growth": float(t.get("rent_growth", 0.03)),
-        "expense_growth": float(t.get("expense_growth", 0.03)),
-        "appreciation": float(t.get("appreciation", 0.03)),
-        "sale_cost_pct": float(t.get("sale_cost_pct", 0.07)),
-        "use_exit_cap": bool(t.get("use_exit_cap", False)),
-        "exit_cap_rate": float(t.get("exit_cap_rate", 0.065)),
-        "price": price if price and price > 0 else None,
-        "monthly_rent": rent if rent and rent > 0 else None,
-        "monthly_expenses": exp_est if exp_est and exp_est > 0 else None,
-    }
+    templates = _compile_templates()
+    return templates.get(name) or templates["Long-Term Rental (LTR)"]
+
+async def _authenticate(api_key: str) -> int:
+    """Validate the key only; quota is consumed separately (304s and replays are free)."""
+    with telemetry.stage("auth"):
+        ws = await aresolve_workspace(api_key)
+        if not ws:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        if not await averify_key(ws, api_key):
+            raise HTTPException(status_code=401, detail="Invalid API key")
+    return ws
 
-def _auth(api_key: str) -> int:
-    ws = resolve_workspace(api_key)
-    if not ws:
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    if not verify_key(ws, api_key):
-        raise HTTPException(status_code=401, detail="Invalid API key")
-    sub = get_subscription(ws)
-    plan = effective_plan(sub)
-    limits = plan_limits(plan)
-    if limits.get("api_calls_per_day", 0) <= 0:
-        raise HTTPException(status_code=402, detail="API access not enabled on this plan")
-    used = count_last_24h(ws, "api_call")
-    if used >= limits["api_calls_per_day"]:
-        raise HTTPException(status_code=429, detail="API rate limit exceeded")
-    record(ws, 0, "api_call")
+async def _consume_quota(ws: int, n: int = 1) -> None:
+    """n > 1 for batch jobs: one api_call per item, capped at the plan's batch_rows."""
+    await _check_quota(ws, n)
+    await _record_quota(ws, n)
+
+async def _check_quota(ws: int, n: int = 1) -> None:
+    with telemetry.stage("auth"):
+        sub = await aget_subscription(ws)
+        plan = effective_plan(sub)
+        limits = plan_limits(plan)
+        if limits.get("api_calls_per_day", 0) <= 0:
+            raise HTTPException(status_code=402, detail="API access not enabled on this plan")
+        if n > 1 and n > limits.get("batch_rows", 0):
+            raise HTTPException(status_code=413, detail=f"Batch too large (plan allows {limits.get('batch_rows', 0)} items)")
+        used = await acount_last_24h(ws, "api_call")
+        if used + n > limits["api_calls_per_day"]:
+            raise HTTPException(status_code=429, detail="API rate limit exceeded")
+
+async def _record_quota(ws: int, n: int = 1) -> None:
+    with telemetry.stage("db_write"):
+        await arecord(ws, 0, "api_call", n=n)
+
+async def _auth(api_key: str) -> int:
+    ws = await _authenticate(api_key)
+    await _consume_quota(ws)
     return ws
 
+# CPU-bound scoring runs off the event loop: the default thread pool, or a
+# process pool when AIRE_SCORING_PROCESSES is set (sidesteps the GIL under load).
+_SCORING_POOL: Optional[ProcessPoolExecutor] = None
+
+def _scoring_pool() -> Optional[ProcessPoolExecutor]:
+    global _SCORING_POOL
+    n = int(os.getenv("AIRE_SCORING_PROCESSES", "0") or 0)
+    if n > 0 and _SCORING_POOL is None:
+        _SCORING_POOL = ProcessPoolExecutor(max_workers=n)
+    return _SCORING_POOL
+
+async def _score(i: DealInputs, explain: bool = True, include_cashflows: bool = True, workspace_id: int = 0,
+                 model: Optional[Dict[str, Any]] = None):
+    loop = asyncio.get_running_loop()
+    fn = partial(run_underwriting, i, explain=explain, include_cashflows=include_cashflows, workspace_id=workspace_id, model=model)
+    return await loop.run_in_executor(_scoring_pool(), fn)
+
+# ---- Deterministic response cache, ETags and idempotency ----
+# Responses are keyed by (workspace, normalized request, selection, active model
+# version) and stored with an ETag hashed from the encoded body, so a re-pull
+# that changes the result changes the tag. A matching If-None-Match returns 304
+# without consuming quota, and an Idempotency-Key replays the stored response
+# for retried POSTs.
+_RESPONSES = TTLCache(ttl_sec=float(os.getenv("RESPONSE_CACHE_TTL_SEC", "600")), maxsize=int(os.getenv("RESPONSE_CACHE_MAX", "20000")))
+_IDEMPOTENCY = TTLCache(ttl_sec=float(os.getenv("IDEMPOTENCY_TTL_SEC", "86400")), maxsize=int(os.getenv("IDEMPOTENCY_MAX", "50000")))
+telemetry.register_cache("grade_response", _RESPONSES)
+telemetry.register_cache("idempotency", _IDEMPOTENCY)
+# Last graded content per (workspace, address, selection) with its input fingerprint
+# and the model version it was scored with.
+# Outlives the response cache: once provider data is re-pulled, unchanged inputs
+# reuse the content instead of re-scoring.
+_FINGERPRINTS = TTLCache(ttl_sec=float(os.getenv("FINGERPRINT_TTL_SEC", "86400")), maxsize=int(os.getenv("FINGERPRINT_CACHE_MAX", "50000")))
+telemetry.register_cache("grade_fingerprint", _FINGERPRINTS)
+
+def _pos(v: Optional[float]) -> Optional[float]:
+    return round(float(v), 2) if v is not None and float(v) > 0 else None
+
+def _grade_cache_key(req: GradeRequest, sel: Optional[List[str]], version: str) -> str:
+    raw = (req.raw or "").strip()
+    norm = {
+        "raw": raw if looks_like_url(raw) else providers.normalize_address(raw),
+        "template_name": req.template_name,
+        "price": _pos(req.price),
+        "monthly_rent": _pos(req.monthly_rent),
+        "monthly_expenses": _pos(req.monthly_expenses),
+        "use_auto": bool(req.use_auto),
+        "sel": sel,
+        "model": version,
+    }
+    return hashlib.sha256(json.dumps(norm, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _content_etag(content: Any) -> str:
+    return f'"{hashlib.sha256(dumps(content)).hexdigest()[:32]}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+async def warmup() -> None:
+    """Startup hook (per worker): everything a cold first request would otherwise pay for."""
+    for migrate in (storage.migrate, audit.migrate, api_keys.migrate, billing.migrate, usage.migrate, model_registry.migrate,
+                    ai_memo.migrate):
+        await db.aensure(migrate)
+    await db.afetchone("SELECT 1")  # open the async DB connection / pool
+    await db.arun(model_registry.warm_model_cache)
+    _compile_templates()
+    await providers.warm_pool(PROVIDER_KEYS)
+    # First scoring call pays module imports and (if enabled) process-pool spin-up
+    await _score(DealInputs(address="warmup", price=250000.0, monthly_rent=2000.0, monthly_expenses=800.0))
+
+@app.middleware("http")
+async def _http_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    request_id = request.headers.get("x-request-id") or new_id()
+    try:
+        with log_context(request_id=request_id):
+            response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        # Label by route template (/v1/reports/{id}), never the raw path, to bound cardinality
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        telemetry.HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method, route=route)
+        telemetry.HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+
 @app.get("/health")
 def health():
     return {"ok": True}
 
-@app.post("/v1/grade", response_model=GradeResponse)
-def grade(req: GradeRequest, x_api_key: str = Header(default="")):
-    ws = _auth(x_api_key)
-    raw = (req.raw or "").strip()
-    if not raw:
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until warmup has finished, so deploys never route cold workers."""
+    if not _READY:
+        raise HTTPException(status_code=503, detail="warming up")
+    return {"ready": True}
+
+@app.get("/metrics")
+def metrics(authorization: str = Header(default="")):
+    token = os.getenv("METRICS_TOKEN", "")
+    if token and authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# Documents the body only: responses are encoded by hand (encode()), and unknown ?fields= are omitted
+@app.post("/v1/grade", response_model=Union[GradeResponse, GradeSelection])
+async def grade(
+    req: GradeRequest,
+    request: Request,
+    x_api_key: str = Header(default=""),
+    if_none_match: Optional[str] = Header(default=None),
+    idempotency_key: Optional[str] = Header(default=None),
+    view: str = Query("full", pattern="^(compact|full)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. grade,score,metrics.IRR"),
+):
+    ws = await _authenticate(x_api_key)
+    if not (req.raw or "").strip():
         raise HTTPException(status_code=400, detail="Missing raw")
+    sel = selection(view, fields)
+    # The model that keys the response is the one that scores it (not a fresher DB read)
+    model = await aget_active_model(ws)
+    key = _grade_cache_key(req, sel, model_version(model))
+    cache_control = {"Cache-Control": "private, no-cache"}
+
+    if idempotency_key:
+        prior = _IDEMPOTENCY.get((ws, idempotency_key))
+        if prior is not None:
+            prior_key, etag, content = prior
+            if prior_key != key:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            return encode(request, content, headers={**cache_control, "ETag": etag, "Idempotent-Replayed": "true"})
+
+    cached = _RESPONSES.get((ws, key))
+    if cached is not None and _etag_matches(if_none_match, cached[0]):
+        return Response(status_code=304, headers={**cache_control, "ETag": cached[0]})
+
+    await _consume_quota(ws)
+    if cached is None:
+        content = await _grade_content(req, sel, ws, model or {})
+        cached = (_content_etag(content), content)
+        _RESPONSES.set((ws, key), cached)
+    etag, content = cached
+    if idempotency_key:
+        _IDEMPOTENCY.set((ws, idempotency_key), (key, etag, content))
+    return encode(request, content, headers={**cache_control, "ETag": etag})
+
+async def _enrich(raw: str, use_auto: bool):
+    """Resolve the address and (optionally) pull provider data once per request."""
     if looks_like_url(raw):
         resolved = guess_address_from_url(raw)
         addr = resolved.address_guess or raw
     else:
         addr = raw
+    pulled: Dict[str, Any] = {}
+    if use_auto:
+        with telemetry.stage("provider_fetch"):
+            pulled = await providers.apull_property_data_cached(addr, PROVIDER_KEYS)
+    return addr, pulled
 
+async def _grade_content(req: GradeRequest, sel: Optional[List[str]], ws: int,
+                         model: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Graded content for one request; model is the workspace's active model ({} = baseline, None = look it up)."""
+    raw = (req.raw or "").strip()
+    addr, pulled = await _enrich(raw, req.use_auto)
+    final_price = req.price if (req.price or 0) > 0 else pulled.get("price")
+    final_rent  = req.monthly_rent if (req.monthly_rent or 0) > 0 else pulled.get("monthly_rent")
     t = _template_by_name(req.template_name)
-    merged = _apply_template(t, float(req.price or 0.0), float(req.monthly_rent or 0.0), float(req.monthly_expenses or 0.0))
 
-    price_p = pick(req.price, merged.get("price"), "template/manual")
-    rent_p  = pick(req.monthly_rent, merged.get("monthly_rent"), "template/manual")
+    if model is None:
+        model = await aget_active_model(ws) or {}
+    version = model_version(model)
+    fp = fingerprints.fingerprint(pulled, template=t, model_version=version,
+                                  manual={"price": req.price, "rent": req.monthly_rent, "exp": req.monthly_expenses},
+                                  extra={"url": raw if looks_like_url(raw) else ""})
+    fp_key = (ws, fingerprints.address_key(addr), tuple(sel) if sel is not None else None)
+    prior = _FINGERPRINTS.get(fp_key)
+    if prior is not None and prior[0] == fp and prior[1] == version:
+        return prior[2]
+
+    with telemetry.stage("template_apply"):
+        merged = apply_template(t, float(final_price or 0.0), float(final_rent or 0.0), float(req.monthly_expenses or 0.0))
+
+    price_p = pick(req.price, merged.get("price"), pulled.get("price_source") or "template/manual")
+    rent_p  = pick(req.monthly_rent, merged.get("monthly_rent"), pulled.get("rent_source") or "template/manual")
     exp_p   = pick(req.monthly_expenses, merged.get("monthly_expenses"), "template/manual")
-    prov = pack_provenance(price_p, rent_p, exp_p, None, None, "")
+    last_sale_price = float(pulled["last_sale_price"]) if pulled.get("last_sale_price") else None
+    last_sale_date = str(pulled["last_sale_date"]) if pulled.get("last_sale_date") else None
+    prov = pack_provenance(price_p, rent_p, exp_p, last_sale_price, last_sale_date, pulled.get("last_sale_source", ""))
 
     i = DealInputs(
         address=addr,
@@ -125,8 +396,8 @@ def grade(req: GradeRequest, x_api_key: str = Header(default="")):
         down_payment_pct=float(merged["down_payment_pct"]),
         interest_rate_pct=float(merged["interest_rate_pct"]),
         term_years=int(merged["term_years"]),
-        last_sale_price=None,
-        last_sale_date=None,
+        last_sale_price=last_sale_price,
+        last_sale_date=last_sale_date,
         hold_years=int(merged["hold_years"]),
         rent_growth=float(merged["rent_growth"]),
         expense_growth=float(merged["expense_growth"]),
@@ -136,22 +407,253 @@ def grade(req: GradeRequest, x_api_key: str = Header(default="")):
         exit_cap_rate=float(merged["exit_cap_rate"]),
     )
 
-    out = run_underwriting(i)
-    return GradeResponse(
+    # Only build what the caller will read (rationale text, Cashflows list)
+    with telemetry.stage("underwriting"):
+        out = await _score(i, explain=needs("rationale", sel), include_cashflows=needs("metrics.Cashflows", sel), workspace_id=ws,
+                         model=model)
+    content = {
+        "address": addr,
+        "grade": out.grade,
+        "grade_detail": out.grade_detail,
+        "score": float(out.score),
+        "score_base": float(out.score_base),
+        "score_ai": float(out.score_ai),
+        "ai_weight": float(out.ai_weight),
+        "confidence": float(out.confidence),
+        "verdict": out.verdict,
+        "metrics": out.metrics,
+        "flags": out.flags,
+        "rationale": out.rationale,
+        "provenance": prov,
+    }
+    if sel is not None:
+        content = select_fields(content, sel)
+    _FINGERPRINTS.set(fp_key, (fp, version, content))  # version = the model this content was scored with
+    return content
+
+@app.post("/v1/grade/sweep")
+async def grade_sweep(req: SweepRequest, request: Request, x_api_key: str = Header(default="")):
+    """Grade one property under every template (built-in + workspace) and rank them."""
+    ws = await _auth(x_api_key)
+    raw = (req.raw or "").strip()
+    if not raw:
+        raise HTTPException(status_code=400, detail="Missing raw")
+    addr, pulled = await _enrich(raw, req.use_auto)
+    templates = [{"name": n, "template": t} for n, t in _compile_templates().items()]
+    saved = await db.arun(storage.list_templates, ws)
+    templates += [{"name": t["name"], "template": normalize_template(t["template"])} for t in saved]
+    if req.templates:
+        wanted = set(req.templates)
+        templates = [t for t in templates if t["name"] in wanted]
+        if not templates:
+            raise HTTPException(status_code=400, detail="No matching templates")
+
+    price_p = pick(req.price, pulled.get("price"), pulled.get("price_source") or "template/manual")
+    rent_p = pick(req.monthly_rent, pulled.get("monthly_rent"), pulled.get("rent_source") or "template/manual")
+    prop = sweep.Property(
         address=addr,
-        grade=out.grade,
-        grade_detail=out.grade_detail,
-        score=float(out.score),
-        score_base=float(out.score_base),
-        score_ai=float(out.score_ai),
-        ai_weight=float(out.ai_weight),
-        confidence=float(out.confidence),
-        verdict=out.verdict,
-        metrics=out.metrics,
-        flags=out.flags,
-        rationale=out.rationale,
-        provenance=prov,
+        listing_url=raw if looks_like_url(raw) else "",
+        price=price_p.value,
+        monthly_rent=rent_p.value,
+        monthly_expenses=req.monthly_expenses if (req.monthly_expenses or 0) > 0 else None,
+        last_sale_price=float(pulled["last_sale_price"]) if pulled.get("last_sale_price") else None,
+        last_sale_date=str(pulled["last_sale_date"]) if pulled.get("last_sale_date") else None,
     )
+    with telemetry.stage("underwriting"):
+        rows = await asyncio.get_running_loop().run_in_executor(None, partial(sweep.sweep, prop, templates, workspace_id=ws))
+    return encode(request, {"address": addr, "price": prop.price, "monthly_rent": prop.monthly_rent,
+                            "sources": pulled.get("notes", []), "results": rows})
+
+# Batch rows are ranked on these flat fields (metrics lifted out of the nested result)
+_BATCH_ORDER_FIELDS = {"score", "confidence", "cap_rate", "coc", "dscr", "irr", "price"}
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+def _batch_order(order: Optional[List[str]]) -> ranking.Order:
+    if not order:
+        return ranking.DEFAULT_ORDER
+    out = []
+    for o in order:
+        field = o.lstrip("+-")
+        if field not in _BATCH_ORDER_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown order field: {field}")
+        out.append((field, o.startswith("-")))
+    return tuple(out)
+
+@app.post("/v1/grade/batch")
+async def grade_batch(
+    req: BatchRequest,
+    request: Request,
+    x_api_key: str = Header(default=""),
+    view: str = Query("compact", pattern="^(compact|full)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields for each result"),
+):
+    """Grade many properties and return only the top_k that pass the filters (nothing is saved)."""
+    items = [x.strip() for x in req.items if (x or "").strip()]
+    if not items:
+        raise HTTPException(status_code=400, detail="Missing items")
+    if req.top_k <= 0:
+        raise HTTPException(status_code=400, detail="top_k must be positive")
+    order = _batch_order(req.order)
+    ws = await _authenticate(x_api_key)
+    await _consume_quota(ws, len(items))
+    model = await aget_active_model(ws) or {}
+    sel = selection(view, fields)
+    inner = None if sel is None else sorted(set(sel) | {"address", "score", "confidence", "metrics.CapRate",
+                                                         "metrics.CoC", "metrics.DSCR", "metrics.IRR", "provenance"})
+    top = ranking.TopK(req.top_k, order=order, constraints=ranking.Constraints(
+        min_score=req.min_score, min_dscr=req.min_dscr, min_coc=req.min_coc, min_irr=req.min_irr, max_price=req.max_price))
+    sem = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+
+    async def one(n: int, raw: str):
+        async with sem:
+            g = GradeRequest(raw=raw, template_name=req.template_name, use_auto=req.use_auto)
+            return n, raw, await _grade_content(g, inner, ws, model)
+
+    errors: List[Dict[str, Any]] = []
+    tasks = [asyncio.create_task(one(n, raw)) for n, raw in enumerate(items)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            try:
+                n, raw, content = await fut
+            except HTTPException:
+                raise
+            except Exception as e:
+                errors.append({"error": type(e).__name__})
+                continue
+            m = content.get("metrics") or {}
+            top.push({"raw": raw, "score": content.get("score"), "confidence": content.get("confidence"),
+                      "cap_rate": m.get("CapRate"), "coc": m.get("CoC"), "dscr": m.get("DSCR"), "irr": m.get("IRR"),
+                      "price": ((content.get("provenance") or {}).get("price") or {}).get("value"),
+                      "result": select_fields(content, sel) if sel is not None else content}, seq=n)
+    finally:
+        # An HTTPException (or a client disconnect) ends the batch: don't leave the rest running
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return encode(request, {"results": top.results(), "stats": {**top.stats(), "errors": len(errors)}})
+
+@app.post("/v1/reports/export")
+async def export_reports(req: ExportRequest, x_api_key: str = Header(default="")):
+    """Stream saved reports as a ZIP of PDFs or one multi-page PDF (one quota unit per export)."""
+    ws = await _authenticate(x_api_key)
+    if req.format not in bulk_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(bulk_export.FORMATS)}")
+    if not req.report_ids and req.since is None:
+        raise HTTPException(status_code=400, detail="Pass report_ids or since")
+    ids = await db.arun(storage.list_report_ids, ws, req.report_ids or None, req.since, req.until)
+    if not ids:
+        raise HTTPException(status_code=404, detail="No reports found")
+    cap = bulk_export.MAX_REPORTS if req.format == "zip" else bulk_export.PDF_MAX_PAGES
+    if len(ids) > cap:
+        raise HTTPException(status_code=413, detail=f"Too many reports ({len(ids)}); the limit for {req.format} is {cap}")
+    await _consume_quota(ws)
+    # Sync generator: rendering and DB reads happen in the threadpool as the client reads
+    return StreamingResponse(bulk_export.iter_export(bulk_export.iter_reports(ids, ws), req.format),
+                             media_type=bulk_export.media_type(req.format),
+                             headers={"Content-Disposition": f'attachment; filename="aire_reports.{req.format}"'})
+
+@app.get("/v1/reports/{report_id}/pdf")
+async def report_pdf(report_id: int, x_api_key: str = Header(default=""), if_none_match: Optional[str] = Header(default=None)):
+    """One saved report as a PDF, served from the on-disk PDF cache (no quota; revalidate with If-None-Match)."""
+    ws = await _authenticate(x_api_key)
+    payload = (await db.arun(storage.read_reports, [report_id], ws)).get(report_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Report not found")
+    etag = pdf_cache.etag(report_id)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    pdf = await db.arun(pdf_cache.get_pdf, report_id, lambda: build_report_pdf(bulk_export.pdf_fields(report_id, payload)))
+    headers["Content-Disposition"] = f'attachment; filename="aire_report_{report_id}.pdf"'
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class _MemoFlight:
+    """One report's memo generation; every concurrent request for that report streams from it."""
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.done = False
+        self.saved = False
+        self.error: Optional[str] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+_MEMO_FLIGHTS: Dict[tuple, _MemoFlight] = {}
+
+async def _generate_memo(key: tuple, flight: _MemoFlight, svc: Any, payload: Dict[str, Any], ws: int, report_id: int) -> None:
+    """Pull the (blocking) model stream in worker threads; save and charge quota only once it completes."""
+    async def publish(chunk: Optional[str] = None, **state: Any) -> None:
+        async with flight.changed:
+            if chunk is not None:
+                flight.parts.append(chunk)
+            for k, v in state.items():
+                setattr(flight, k, v)
+            flight.changed.notify_all()
+
+    try:
+        chunks = svc.stream(ai_memo.seed_from_payload(payload))
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            await publish(chunk)
+        text = "".join(flight.parts)
+        if text:
+            await db.arun(storage.attach_to_report, report_id, "memo", text)
+            await _record_quota(ws)
+        await publish(saved=bool(text), done=True)
+    except Exception as e:
+        log_event("memo_stream_failed", level="error", report_id=report_id, error=f"{type(e).__name__}: {e}")
+        await publish(error="Memo generation failed", done=True)
+    finally:
+        _MEMO_FLIGHTS.pop(key, None)
+
+@app.get("/v1/reports/{report_id}/memo")
+async def report_memo(report_id: int, x_api_key: str = Header(default="")):
+    """Stream the report's AI memo as server-sent events: `token` events as text arrives, then `done`.
+
+    Concurrent requests for one report share a single generation. Quota is used
+    once, when the memo is complete and saved into the report; later calls
+    replay it for free.
+    """
+    ws = await _authenticate(x_api_key)
+    payload = (await db.arun(storage.read_reports, [report_id], ws)).get(report_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Report not found")
+    memo = (payload.get("outputs") or {}).get("memo")
+    key = (ws, report_id)
+    flight = None if memo else _MEMO_FLIGHTS.get(key)
+    if not memo and flight is None:
+        svc = ai_memo.service(OPENAI_API_KEY)
+        if svc is None:
+            raise HTTPException(status_code=503, detail="Memo generation is not configured")
+        await _check_quota(ws)
+        flight = _MEMO_FLIGHTS.get(key)  # another request may have started it meanwhile
+        if flight is None:
+            flight = _MEMO_FLIGHTS[key] = _MemoFlight()
+            flight.task = asyncio.create_task(_generate_memo(key, flight, svc, payload, ws, report_id))
+
+    async def events():
+        if memo:
+            yield _sse("token", {"text": memo})
+            yield _sse("done", {"report_id": report_id, "saved": True})
+            return
+        sent = 0
+        while True:
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: len(flight.parts) > sent or flight.done)
+                new, done = flight.parts[sent:], flight.done
+            for chunk in new:
+                yield _sse("token", {"text": chunk})
+            sent += len(new)
+            if done and sent == len(flight.parts):
+                break
+        if flight.error:
+            yield _sse("error", {"detail": flight.error})
+        else:
+            yield _sse("done", {"report_id": report_id, "saved": flight.saved})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/stripe/webhook")
 async def stripe_webhook(request: Request, stripe_signature: str = Header(default="", alias="Stripe-Signature")):
@@ -3,7 +3,7 @@ import pandas as pd
 from typing import Dict, Any, Optional, List
 
 from config import load_config, validate_config
-from logger import log_event
+from logger import context as log_context, log_event, new_id
 from provenance import pick, pack_provenance
 from auth import authenticate, create_user, list_workspaces, create_workspace, create_invite, accept_invite, get_role, list_members, set_member_role, remove_member
 from billing import get_subscription, plan_limits, set_plan, effective_plan
@@ -15,9 +15,10 @@ from onboarding import needs_onboarding, run_onboarding
 from export_pdf import build_report_pdf
 from lock_screen import render_lock
 from feedback import add_feedback, list_feedback
-from model_registry import list_models, create_candidate_model, activate_model, get_active_model
+from model_registry import list_models, create_candidate_model, activate_model, get_active_model, get_active_model_cached, model_version
 import learning
 import audit
+import telemetry
 
 def count_linked_outcomes(workspace_id: int) -> int:
     """Counts outcomes with a valid report_id (linked), for guardrails."""
@@ -49,7 +50,10 @@ def app_header(title: str, subtitle: str = ""):
     if subtitle:
         st.markdown(f"<div class='kicker'>{subtitle}</div>", unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
+import dataclasses
 import json
+import tempfile
+import time
 import matplotlib.pyplot as plt
 
 
@@ -69,14 +73,27 @@ def breadcrumb(step: int):
     )
 from link_resolver import guess_address_from_url, looks_like_url
 from underwriting import DealInputs, run_underwriting
-from ai_memo import generate_investment_memo
+import sensitivity
+import monte_carlo
+import goal_seek
+import sweep
+import amortization
+import eval_graph
+import bulk_export
+import fingerprints
+import portfolio
+import pdf_cache
+import ranking
+import watch_daemon
+from ai_memo import generate_memos, seed_from_payload, stream_investment_memo
 from storage import (
-    save_report, list_reports, read_report,
+    save_report, list_reports, read_report, attach_to_report, list_report_ids,
     upsert_template, list_templates, delete_template,
     add_watchlist, list_watchlist, delete_watchlist,
-    save_alert_run, list_alert_runs, read_alert_run
+    list_alert_runs, read_alert_run, last_alert_runs,
+    get_fingerprint, set_fingerprint
 )
-from templates import BUILTIN_TEMPLATES, normalize_template
+from templates import BUILTIN_TEMPLATES, apply_template, normalize_template
 from styles import EXCHANGE_UI_CSS
 
 stripe.api_key = cfg.stripe_secret_key or st.secrets.get("STRIPE_SECRET_KEY", "")
@@ -253,11 +270,18 @@ ATTOM_APIKEY = cfg.attom_apikey
 OPENAI_API_KEY = cfg.openai_api_key
 SENDGRID_API_KEY = cfg.sendgrid_api_key
 ALERT_EMAIL_TO = cfg.alert_email_to
+ALERT_SCAN_TOP = 200  # rows kept for the scan table (every run is still saved)
 
-import rentcast as rc
-import estated as es
-import attom as at
-import requests
+import os
+import notify
+# Secrets override the process env for notification transports (SMTP / webhook settings come from env).
+# Recipients are per workspace (notify.set_workspace_route), never a deployment-wide address.
+NOTIFY_ENV = {**os.environ, **({"SENDGRID_API_KEY": SENDGRID_API_KEY} if SENDGRID_API_KEY else {})}
+NOTIFY_CHANNELS = notify.channels(NOTIFY_ENV)
+
+import providers
+
+PROVIDER_KEYS = providers.ProviderKeys(RENTCAST_APIKEY, ESTATED_TOKEN, ATTOM_APIKEY)
 
 connected_count = sum(bool(x) for x in [RENTCAST_APIKEY, ESTATED_TOKEN, ATTOM_APIKEY, OPENAI_API_KEY])
 status_class = "dotlive" if connected_count >= 2 else ("dotwarn" if connected_count == 1 else "dotbad")
@@ -385,102 +409,21 @@ if cfg.access_key:
         if key != cfg.access_key:
             st.info("This app is private. Enter the access key to continue.")
             st.stop()
-def infer_last_sale(payload: dict):
-    if not payload or not isinstance(payload, dict):
-        return None, None
-    price = None
-    for k in ["lastSalePrice","last_sale_price","salePrice","last_sale_amount"]:
-        v = payload.get(k)
-        if isinstance(v, (int,float)) and v > 0:
-            price = float(v); break
-    date = payload.get("lastSaleDate") or payload.get("last_sale_date") or payload.get("saleDate") or payload.get("lastSaleRecordingDate")
-    return price, date
-
 @st.cache_data(ttl=cfg.cache_ttl_sec, show_spinner=False)
 def pull_property_data(address: str) -> Dict[str, Any]:
-    notes: List[str] = []
-    out: Dict[str, Any] = {}
-    if RENTCAST_APIKEY:
-        v = rc.value_avm(RENTCAST_APIKEY, address)
-        r = rc.rent_avm(RENTCAST_APIKEY, address)
-        pr = rc.property_record(RENTCAST_APIKEY, address)
-        if isinstance(v, dict):
-            out["price"] = v.get("price") or v.get("value") or v.get("estimatedValue")
-            out["price_source"] = "RentCast"
-            notes.append("RentCast value AVM")
-        if isinstance(r, dict):
-            out["monthly_rent"] = r.get("rent") or r.get("estimatedRent")
-            out["rent_source"] = "RentCast"
-            notes.append("RentCast rent AVM")
-        if isinstance(pr, dict):
-            lsp, lsd = infer_last_sale(pr)
-            out["last_sale_price"], out["last_sale_date"] = lsp, lsd
-            if (lsp or lsd):
-                out["last_sale_source"] = "RentCast"
-            notes.append("RentCast property record")
-    if ESTATED_TOKEN:
-        j = es.property_lookup(ESTATED_TOKEN, address)
-        if isinstance(j, dict):
-            cand = j.get("data") or j.get("property") or j
-            if isinstance(cand, dict):
-                out["price"] = out.get("price") or cand.get("market_value") or cand.get("avm") or cand.get("value")
-                if out.get("price") and not out.get("price_source"):
-                    out["price_source"] = "Estated"
-                lsp, lsd = infer_last_sale(cand)
-                out["last_sale_price"] = out.get("last_sale_price") or lsp
-                if lsp and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "ATTOM"
-                if lsp and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "Estated"
-                out["last_sale_date"] = out.get("last_sale_date") or lsd
-                if lsd and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "ATTOM"
-                if lsd and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "Estated"
-            notes.append("Estated lookup")
-    if ATTOM_APIKEY:
-        j = at.property_detail(ATTOM_APIKEY, address)
-        if isinstance(j, dict):
-            cand = j.get("property") or j.get("data") or j
-            if isinstance(cand, dict):
-                lsp, lsd = infer_last_sale(cand)
-                out["last_sale_price"] = out.get("last_sale_price") or lsp
-                if lsp and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "Estated"
-                out["last_sale_date"] = out.get("last_sale_date") or lsd
-                if lsd and not out.get("last_sale_source"):
-                    out["last_sale_source"] = "Estated"
-            notes.append("ATTOM detail")
-    out["notes"] = notes
-    return out
+    return providers.pull_property_data(address, PROVIDER_KEYS)
 
 def templates_all():
     built = [{"id": f"builtin::{k}", "name": k, "template": normalize_template(v), "builtin": True} for k,v in BUILTIN_TEMPLATES.items()]
     user = [{"id": f"user::{t['id']}", "name": t["name"], "template": normalize_template(t["template"]), "builtin": False} for t in list_templates(st.session_state.active_workspace_id)]
     return built + user
 
-def apply_template(t: Dict[str, Any], price: float, rent: float, exp: float):
-    defaults = (t.get("defaults") or {})
-    exp_pct = float(defaults.get("monthly_expenses_pct_of_rent", 0.45))
-    exp_est = exp if exp and exp > 0 else (rent * exp_pct if rent and rent > 0 else 0.0)
-    return {
-        "vacancy_rate": float(t.get("vacancy_rate", 0.08)),
-        "down_payment_pct": float(t.get("down_payment_pct", 20.0)),
-        "interest_rate_pct": float(t.get("interest_rate_pct", 7.25)),
-        "term_years": int(t.get("term_years", 30)),
-        "hold_years": int(t.get("hold_years", 7)),
-        "rent_growth": float(t.get("rent_growth", 0.03)),
-        "expense_growth": float(t.get("expense_growth", 0.03)),
-        "appreciation": float(t.get("appreciation", 0.03)),
-        "sale_cost_pct": float(t.get("sale_cost_pct", 0.07)),
-        "use_exit_cap": bool(t.get("use_exit_cap", False)),
-        "exit_cap_rate": float(t.get("exit_cap_rate", 0.065)),
-        "price": price if price and price > 0 else None,
-        "monthly_rent": rent if rent and rent > 0 else None,
-        "monthly_expenses": exp_est if exp_est and exp_est > 0 else None,
-    }
+def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto: bool, use_ai: bool,
+            reuse: bool = False):
+    """Grade one address/link and save a report.
 
-def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto: bool, use_ai: bool):
+    reuse: when the inputs fingerprint matches the address's last saved report, return that report instead.
+    """
     log_event("grade_start", raw=raw, use_auto=use_auto, use_ai=use_ai)
     raw = (raw or "").strip()
     if not raw:
@@ -495,16 +438,33 @@ def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto
     else:
         addr, url = raw, ""
 
-    pulled = pull_property_data(addr) if use_auto else {}
+    with telemetry.stage("provider_fetch"):
+        pulled = pull_property_data(addr) if use_auto else {}
     price = float(manual.get("price", 0.0) or 0.0)
     rent  = float(manual.get("rent", 0.0) or 0.0)
     exp   = float(manual.get("exp", 0.0) or 0.0)
 
+    ws = st.session_state.active_workspace_id
+    # The app grades with the baseline model (run_underwriting below), so that is the version in the fingerprint
+    fp = fingerprints.fingerprint(pulled, template=template, model_version=model_version(None),
+                                  manual={"price": price, "rent": rent, "exp": exp}, extra={"url": url, "ai": bool(use_ai)})
+    addr_key = fingerprints.address_key(addr)
+    if reuse:
+        prev = get_fingerprint(ws, addr_key)
+        if prev and prev["fingerprint"] == fp and prev["report_id"]:
+            prev_payload = read_report(int(prev["report_id"]))
+            if prev_payload.get("outputs"):
+                log_event("grade_reused", report_id=prev["report_id"])
+                res = result_row(addr, url, int(prev["report_id"]), prev_payload)
+                res.update(reused=True, fingerprint=fp)
+                return res
+
     final_price = price if price > 0 else pulled.get("price")
     final_rent  = rent if rent > 0 else pulled.get("monthly_rent")
     final_exp   = exp  if exp  > 0 else pulled.get("monthly_expenses")
 
-    merged = apply_template(template, float(final_price or 0.0), float(final_rent or 0.0), float(final_exp or 0.0))
+    with telemetry.stage("template_apply"):
+        merged = apply_template(template, float(final_price or 0.0), float(final_rent or 0.0), float(final_exp or 0.0))
 
     i = DealInputs(
         address=addr,
@@ -527,8 +487,9 @@ def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto
         exit_cap_rate=float(merged["exit_cap_rate"]),
     )
 
-    out = run_underwriting(i)
-    memo = generate_investment_memo(out.narrative_seed, OPENAI_API_KEY) if (use_ai and OPENAI_API_KEY) else None
+    with telemetry.stage("underwriting"):
+        out = run_underwriting(i, model={})
+    memo = None  # streamed on the results page (render_memo) so grading never waits on the model
 
     metrics_summary = {
         "cap_rate": out.metrics.get("CapRate"),
@@ -538,6 +499,8 @@ def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto
         "noi_monthly": (out.metrics.get("NOI") / 12.0) if isinstance(out.metrics.get("NOI"), (int, float)) else None,
         "payment_monthly": out.metrics.get("LoanPaymentMonthly"),
         "cashflow_monthly": out.metrics.get("CashFlowMonthly"),
+        "equity_multiple": out.metrics.get("EquityMultiple"),
+        "loan_balance_exit": out.metrics.get("LoanBalanceAtExit"),
     }
 
     payload = {
@@ -561,41 +524,123 @@ def run_one(raw: str, template: Dict[str, Any], manual: Dict[str, Any], use_auto
         "sources": pulled.get("notes", []) if isinstance(pulled, dict) else [],
         "provenance": prov
     }
-    rid = save_report(addr, url, out.grade, out.score, out.confidence, payload, workspace_id=st.session_state.active_workspace_id, user_id=st.session_state.user['id'])
+    with telemetry.stage("db_write"):
+        rid = save_report(addr, url, out.grade, out.score, out.confidence, payload, workspace_id=ws, user_id=st.session_state.user['id'])
+        set_fingerprint(ws, addr_key, fp, rid)
     log_event("grade_saved", report_id=rid, grade=out.grade, score=out.score, confidence=out.confidence)
 
+    res = result_row(addr, url, rid, payload)
+    res["fingerprint"] = fp
+    res["memo_pending"] = bool(use_ai and OPENAI_API_KEY)
+    return res
+
+def result_row(addr: str, url: str, rid: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The row run_one returns, built from a report payload (fresh or previously saved)."""
+    o = payload.get("outputs", {})
+    inp = payload.get("inputs", {})
+    m = o.get("metrics", {}) or {}
+    flags = o.get("flags") or []
+    sources = payload.get("sources") or []
     return {
         "address": addr,
         "url": url,
-        "grade": out.grade,
-        "grade_detail": out.grade_detail,
-        "score": out.score,
-        "score_base": out.score_base,
-        "score_ai": out.score_ai,
-        "ai_weight": out.ai_weight,
-        "confidence": out.confidence,
-        "verdict": out.verdict,
-        "cap_rate": out.metrics.get("CapRate"),
-        "coc": out.metrics.get("CoC"),
-        "dscr": out.metrics.get("DSCR"),
-        "irr": out.metrics.get("IRR"),
-        "price": i.price, "rent": i.monthly_rent, "expenses": i.monthly_expenses,
-        "sources": ", ".join(payload["sources"]) if payload["sources"] else "Manual / none",
-        "metrics": metrics_summary,
+        "grade": o.get("grade"),
+        "grade_detail": o.get("grade_detail"),
+        "score": o.get("score"),
+        "score_base": o.get("score_base"),
+        "score_ai": o.get("score_ai"),
+        "ai_weight": o.get("ai_weight"),
+        "confidence": o.get("confidence"),
+        "verdict": o.get("verdict"),
+        "cap_rate": m.get("CapRate"),
+        "coc": m.get("CoC"),
+        "dscr": m.get("DSCR"),
+        "irr": m.get("IRR"),
+        "equity_multiple": m.get("EquityMultiple"),
+        "price": inp.get("price"), "rent": inp.get("monthly_rent"), "expenses": inp.get("monthly_expenses"),
+        "sources": ", ".join(sources) if sources else "Manual / none",
+        "metrics": o.get("metrics_summary"),
         "report_id": rid,
-        "memo": memo,
-        "flags": "; ".join(out.flags[:6]) if out.flags else "",
-        "rationale": out.rationale,
-        "ai_meta": out.ai_meta,
+        "memo": o.get("memo"),
+        "flags": "; ".join(flags[:6]) if flags else "",
+        "rationale": o.get("rationale"),
+        "ai_meta": o.get("ai_meta"),
         "payload": payload
     }
 
+def render_memo(r: Dict[str, Any]):
+    """Show the report's memo, streaming it token by token the first time and saving it into the report."""
+    if r.get("memo"):
+        st.write(r["memo"])
+        return
+    try:
+        with telemetry.stage("memo"):
+            text = st.write_stream(stream_investment_memo(seed_from_payload(r["payload"]), OPENAI_API_KEY))
+    except Exception as e:
+        log_event("memo_stream_failed", level="error", report_id=r.get("report_id"), error=f"{type(e).__name__}: {e}")
+        text = None
+    r["memo_pending"] = False
+    if isinstance(text, str) and text:
+        r["memo"] = text
+        r["payload"].setdefault("outputs", {})["memo"] = text
+        attach_to_report(r["report_id"], "memo", text)
+    else:
+        st.caption("AI summary unavailable.")
+
 def pct(x: Optional[float]) -> str:
     return f"{x*100:.2f}%" if isinstance(x, (int,float)) else "—"
 
 def num(x: Optional[float], nd: int = 2) -> str:
     return f"{x:.{nd}f}" if isinstance(x, (int,float)) else "—"
 
+def render_portfolio(p: Dict[str, Any]):
+    if not p.get("count"):
+        st.info("No holdings with a price.")
+        return
+    conc = p["concentration"]
+    a, b, c, d = st.columns(4)
+    a.metric("Holdings", p["count"])
+    b.metric("Aggregate NOI", f"${p['noi']:,.0f}")
+    c.metric("Blended cap rate", pct(p.get("cap_rate")))
+    d.metric("Portfolio IRR", pct(p.get("irr")))
+    e, f, g, h = st.columns(4)
+    e.metric("Total price", f"${p['total_price']:,.0f}")
+    f.metric("Portfolio DSCR", num(p.get("dscr_portfolio")))
+    g.metric("Largest holding", pct(conc["largest_share"]))
+    h.metric("Effective # holdings", num(conc.get("effective_holdings"), 1))
+    st.caption("DSCR distribution")
+    st.bar_chart(pd.Series(p["dscr"]["buckets"]))
+    if conc["by_state"]["shares"]:
+        st.caption(f"Concentration by state (HHI {conc['by_state']['hhi']:.2f})")
+        st.bar_chart(pd.Series(conc["by_state"]["shares"]))
+    if p.get("missing_ids"):
+        st.caption("Not found: " + ", ".join(f"#{x}" for x in p["missing_ids"]))
+    mini_line("Portfolio cashflows", p["cashflows"], ylabel="$")
+
+def drop_export(key: str) -> None:
+    old = st.session_state.pop(key, None)
+    if old:
+        old["dir"].cleanup()
+
+def build_export(key: str, reports, fmt: str, name: str) -> None:
+    """Render an export into its own TemporaryDirectory, replacing (and removing) the previous one under `key`."""
+    drop_export(key)
+    tmp = tempfile.TemporaryDirectory(prefix="aire-export-")
+    path = os.path.join(tmp.name, f"{name}.{fmt}")
+    try:
+        bulk_export.write_export(reports, path, fmt)
+    except Exception:
+        tmp.cleanup()
+        raise
+    st.session_state[key] = {"dir": tmp, "path": path, "fmt": fmt}
+
+def export_download(key: str, label: str) -> None:
+    exp = st.session_state.get(key)
+    if exp and os.path.exists(exp["path"]):
+        with open(exp["path"], "rb") as f:
+            st.download_button(label, f, os.path.basename(exp["path"]),
+                               bulk_export.media_type(exp["fmt"]), use_container_width=True)
+
 def mini_line(title: str, ys: List[float], xlabel: str = "Year", ylabel: str = ""):
     if not ys:
         return
@@ -726,6 +771,10 @@ if page_key == "Grade a Deal":
                     }
                     r = run_one(raw, chosen_template, overrides, use_auto, use_ai)
                     st.session_state.last_grade_result = r
+                    st.session_state.sweep_rows = None
+                    st.session_state.whatif_graph = None
+                    for k in [k for k in st.session_state.keys() if str(k).startswith("wi_")]:
+                        del st.session_state[k]
                     st.session_state.deal_step = 2
                     st.rerun()
 
@@ -825,7 +874,7 @@ if page_key == "Grade a Deal":
                     unsafe_allow_html=True,
                 )
 
-                t_over, t_details, t_export = st.tabs(["Overview", "Details", "Export"])
+                t_over, t_details, t_sens, t_export = st.tabs(["Overview", "Details", "Sensitivity", "Export"])
 
                 with t_over:
                     st.markdown(
@@ -838,6 +887,7 @@ if page_key == "Grade a Deal":
                               <span>Cash-on-cash: <strong>{pct(r.get('coc'))}</strong></span>
                               <span>DSCR: <strong>{num(r.get('dscr'))}</strong></span>
                               <span>IRR (est.): <strong>{pct(r.get('irr'))}</strong></span>
+                              <span>Equity multiple: <strong>{num(r.get('equity_multiple'))}x</strong></span>
                             </div>
                           </div>
                           <div class="report-card">
@@ -897,14 +947,121 @@ if page_key == "Grade a Deal":
                             unsafe_allow_html=True,
                         )
 
-                    if r.get("memo"):
+                    if r.get("memo") or r.get("memo_pending"):
                         st.markdown("#### AI summary")
-                        st.write(r["memo"])
+                        render_memo(r)
 
                     st.success(f"Saved report #{r['report_id']}.")
 
                 with t_details:
                     # Keep heavy/long items here to reduce scrolling
+                    with st.expander("What-if (live re-grade)", expanded=False):
+                        st.caption("Move a slider to re-grade instantly. Only the affected steps are recomputed; no provider pull, nothing saved.")
+                        inp = (r.get("payload") or {}).get("inputs") or {}
+                        if inp.get("price") and inp.get("monthly_rent") is not None and inp.get("monthly_expenses") is not None:
+                            ws_id = st.session_state.active_workspace_id
+                            g = st.session_state.get("whatif_graph")
+                            if g is None or g.workspace_id != int(ws_id):
+                                g = st.session_state.whatif_graph = eval_graph.EvalGraph(ws_id)
+                            base = DealInputs(**inp)
+                            w1, w2, w3, w4 = st.columns(4)
+                            price_w = w1.slider("Price ($)", float(base.price * 0.5), float(base.price * 1.5), float(base.price), float(max(500.0, round(base.price / 200, -2))), key="wi_price")
+                            rent_w = w2.slider("Rent ($/mo)", float(base.monthly_rent * 0.5), float(base.monthly_rent * 1.5), float(base.monthly_rent), 25.0, key="wi_rent")
+                            exp_w = w3.slider("Expenses ($/mo)", 0.0, float(max(base.monthly_expenses * 2, 100.0)), float(base.monthly_expenses), 25.0, key="wi_exp")
+                            vac_w = w4.slider("Vacancy (%)", 0.0, 30.0, float(base.vacancy_rate * 100), 0.5, key="wi_vac")
+                            w5, w6, w7, w8 = st.columns(4)
+                            rate_w = w5.slider("Rate (%)", 0.0, 15.0, float(base.interest_rate_pct), 0.125, key="wi_rate")
+                            down_w = w6.slider("Down (%)", 0.0, 100.0, float(base.down_payment_pct), 1.0, key="wi_down")
+                            hold_w = w7.slider("Hold (years)", 1, 30, int(base.hold_years), 1, key="wi_hold")
+                            app_w = w8.slider("Appreciation (%)", -5.0, 10.0, float(base.appreciation * 100), 0.25, key="wi_app")
+                            what = dataclasses.replace(
+                                base, price=price_w, monthly_rent=rent_w, monthly_expenses=exp_w, vacancy_rate=vac_w / 100.0,
+                                interest_rate_pct=rate_w, down_payment_pct=down_w, hold_years=int(hold_w), appreciation=app_w / 100.0,
+                            )
+                            with telemetry.stage("whatif_regrade"):
+                                wo = g.evaluate(what, explain=False)
+                            wm = wo.metrics
+                            st.markdown(
+                                f"**{wo.grade_detail}** · {wo.score:.1f}/100 ({wo.score - r['score']:+.1f}) · {wo.verdict} — "
+                                f"Cap {pct(wm.get('CapRate'))} · CoC {pct(wm.get('CoC'))} · DSCR {num(wm.get('DSCR'))} · "
+                                f"IRR {pct(wm.get('IRR'))} · Cash flow ${num(wm.get('CashFlowMonthly'), 0)}/mo"
+                            )
+                            st.caption("Recomputed: " + (", ".join(g.last_recomputed) or "nothing (cached)"))
+                        else:
+                            st.info("Needs price, rent and expenses.")
+
+                    with st.expander("Compare strategies (all templates)", expanded=False):
+                        st.caption("Same property data, every built-in and saved template. No new provider pull, nothing saved.")
+                        if st.button("Compare", key="sweep_run"):
+                            inp = (r.get("payload") or {}).get("inputs") or {}
+                            user_exp = float(st.session_state.get("deal_exp", 0.0) or 0.0)
+                            prop = sweep.Property(
+                                address=inp.get("address") or r.get("address", ""),
+                                listing_url=inp.get("listing_url", ""),
+                                price=inp.get("price"),
+                                monthly_rent=inp.get("monthly_rent"),
+                                monthly_expenses=user_exp if user_exp > 0 else None,
+                                last_sale_price=inp.get("last_sale_price"),
+                                last_sale_date=inp.get("last_sale_date"),
+                            )
+                            with telemetry.stage("sweep"):
+                                st.session_state.sweep_rows = sweep.sweep(prop, templates_all(), workspace_id=st.session_state.active_workspace_id)
+                        if st.session_state.get("sweep_rows"):
+                            sdf = pd.DataFrame(st.session_state.sweep_rows)
+                            cols = ["rank", "template", "grade_detail", "score", "verdict", "CapRate", "CoC", "DSCR", "IRR", "CashFlowMonthly"]
+                            st.dataframe(sdf[[c for c in cols if c in sdf.columns]], use_container_width=True, hide_index=True)
+
+                    with st.expander("Max offer (goal seek)", expanded=False):
+                        st.caption("Highest price that still meets every target below. Leave a metric at 0 to ignore it.")
+                        g1, g2, g3, g4 = st.columns(4)
+                        gs_grade = g1.selectbox("Grade at least", ["A", "B", "C", "D"], index=1, key="gs_grade")
+                        gs_dscr = g2.number_input("Min DSCR", 0.0, 5.0, 0.0, 0.05, key="gs_dscr")
+                        gs_coc = g3.number_input("Min CoC (%)", 0.0, 50.0, 0.0, 0.5, key="gs_coc")
+                        gs_irr = g4.number_input("Min IRR (%)", 0.0, 50.0, 0.0, 0.5, key="gs_irr")
+                        if st.button("Find max offer", key="gs_run"):
+                            base_inputs = DealInputs(**((r.get("payload") or {}).get("inputs") or {"address": r.get("address", "")}))
+                            targets = {"grade": gs_grade, "dscr": gs_dscr or None,
+                                       "coc": (gs_coc / 100.0) or None, "irr": (gs_irr / 100.0) or None}
+                            with telemetry.stage("goal_seek"):
+                                offer = goal_seek.max_offer(base_inputs, targets, workspace_id=st.session_state.active_workspace_id)
+                            if offer is None:
+                                st.info("Goal seek needs rent and expenses.")
+                            elif offer["status"] == "infeasible":
+                                st.warning(f"No price in range meets the targets (failing: {', '.join(offer['binding'])}).")
+                            else:
+                                o1, o2, o3 = st.columns(3)
+                                o1.metric("Max offer", f"${offer['max_price']:,.0f}" + (" +" if offer["status"] == "capped" else ""))
+                                if offer.get("discount_pct") is not None:
+                                    o2.metric("vs. list", f"{-offer['discount_pct']:+.1%}")
+                                o3.metric("Grade at max", offer["at_max"]["grade_detail"])
+                                if offer["binding"]:
+                                    st.caption(f"Binding constraint: {', '.join(offer['binding'])}")
+
+                    with st.expander("Risk simulation (Monte Carlo)", expanded=False):
+                        st.caption("Draws rent growth, expense growth, appreciation and vacancy per year and per path, then re-runs the cashflow model.")
+                        m1, m2 = st.columns(2)
+                        mc_hurdle = m1.number_input("IRR hurdle (%)", 0.0, 50.0, 10.0, 0.5, key="mc_hurdle")
+                        mc_paths = m2.selectbox("Paths", [1_000, 10_000, 50_000], index=1, key="mc_paths")
+                        if st.button("Run simulation", key="mc_run"):
+                            base_inputs = DealInputs(**((r.get("payload") or {}).get("inputs") or {"address": r.get("address", "")}))
+                            with telemetry.stage("risk_sim"):
+                                sim = monte_carlo.simulate(base_inputs, monte_carlo.SimConfig(n_paths=int(mc_paths), hurdle=mc_hurdle / 100.0))
+                            if sim is None:
+                                st.info("Simulation needs price, rent and expenses.")
+                            else:
+                                r.setdefault("payload", {}).setdefault("outputs", {})["risk_sim"] = sim
+                                attach_to_report(r["report_id"], "risk_sim", sim)
+                        sim = ((r.get("payload") or {}).get("outputs") or {}).get("risk_sim")
+                        if sim:
+                            k1, k2, k3, k4 = st.columns(4)
+                            k1.metric("Median IRR", pct(sim["irr"]["p50"]))
+                            k2.metric("IRR (5th pct)", pct(sim["irr_var95"]))
+                            k3.metric(f"P(IRR < {sim['hurdle']:.0%})", f"{sim['p_irr_below_hurdle']:.0%}")
+                            k4.metric("NPV at risk (95%)", f"${sim['npv_var95']:,.0f}")
+                            edges = sim["irr_hist"]["edges"]
+                            hist = pd.DataFrame({"IRR": [f"{(a + b) / 2:.0%}" for a, b in zip(edges[:-1], edges[1:])], "paths": sim["irr_hist"]["counts"]})
+                            st.bar_chart(hist, x="IRR", y="paths")
+
                     with st.expander("Data provenance (where numbers came from)", expanded=False):
                         prov = (r.get("payload") or {}).get("provenance", {}) or {}
                         st.json(prov)
@@ -915,15 +1072,56 @@ if page_key == "Grade a Deal":
                         if isinstance(cashflows, list) and cashflows:
                             st.markdown("#### Mini chart")
                             mini_line("Projected Cashflows (Annual)", cashflows, ylabel="$")
+                        inp = (r.get("payload") or {}).get("inputs") or {}
+                        loan = float(inp.get("price") or 0.0) * (1 - max(0.0, min(1.0, float(inp.get("down_payment_pct") or 0.0) / 100.0)))
+                        if loan > 0 and int(inp.get("term_years") or 0) > 0:
+                            sched = amortization.annual(loan, float(inp.get("interest_rate_pct") or 0.0) / 100.0, int(inp["term_years"]), int(inp.get("hold_years") or 0) or None)
+                            if len(sched["balance"]):
+                                mini_line("Loan Balance (Year End)", [loan] + sched["balance"].tolist(), ylabel="$")
 
                     with st.expander("Raw payload (advanced)", expanded=False):
                         st.json(r.get("payload") or {})
 
+                with t_sens:
+                    st.markdown("#### What-if grid")
+                    st.caption("Every cell is a full re-grade (base + AI blend) computed in one pass. Nothing is saved and no grade quota is used.")
+                    base_inputs = DealInputs(**((r.get("payload") or {}).get("inputs") or {"address": r.get("address", "")}))
+                    if not (base_inputs.price and base_inputs.monthly_rent and base_inputs.monthly_expenses):
+                        st.info("Sensitivity needs price, rent and expenses. Add them under Pro controls and re-run.")
+                    else:
+                        s1, s2, s3 = st.columns(3)
+                        y_choice = s1.selectbox("Rows", ["Interest rate", "Rent"], key="sens_y")
+                        price_pct = s2.slider("Price range (±%)", 5, 40, 20, 5, key="sens_price_pct")
+                        sens_metric = s3.selectbox("Color by", ["score", "IRR", "DSCR", "CoC"], key="sens_metric")
+                        x_axis = sensitivity.Axis.pct("price", base_inputs.price, price_pct / 100.0, 21)
+                        if y_choice == "Interest rate":
+                            y_axis = sensitivity.Axis.linspace("interest_rate_pct", 5.0, 9.0, 17)
+                            y_fmt = "{:.2f}%"
+                        else:
+                            y_axis = sensitivity.Axis.pct("monthly_rent", base_inputs.monthly_rent, 0.20, 17)
+                            y_fmt = "${:,.0f}"
+                        with telemetry.stage("sensitivity"):
+                            g = sensitivity.grid(base_inputs, x_axis, y_axis, workspace_id=st.session_state.active_workspace_id)
+                        fig, ax = plt.subplots(figsize=(9, 5))
+                        im = ax.imshow(g[sens_metric], aspect="auto", origin="lower", cmap="RdYlGn")
+                        fig.colorbar(im, ax=ax, label=sens_metric)
+                        xt = list(range(0, len(x_axis.values), 4))
+                        ax.set_xticks(xt)
+                        ax.set_xticklabels([f"${x_axis.values[k]/1000:,.0f}k" for k in xt])
+                        yt = list(range(0, len(y_axis.values), 4))
+                        ax.set_yticks(yt)
+                        ax.set_yticklabels([y_fmt.format(y_axis.values[k]) for k in yt])
+                        ax.set_xlabel(sensitivity.AXIS_LABELS["price"])
+                        ax.set_ylabel(sensitivity.AXIS_LABELS[y_axis.field])
+                        st.pyplot(fig, clear_figure=True)
+                        with st.expander("Grade table", expanded=False):
+                            st.dataframe(sensitivity.frame(g, "grade_detail", x_fmt="${:,.0f}", y_fmt=y_fmt), use_container_width=True)
+
                 with t_export:
                     st.markdown("#### Export")
                     payload_json = json.dumps(r["payload"], indent=2)
                     col_a, col_b, col_c = st.columns(3)
-                    pdf_bytes = build_report_pdf(r)
+                    pdf_bytes = pdf_cache.get_pdf(r["report_id"], lambda: build_report_pdf(r)) if r.get("report_id") else build_report_pdf(r)
                     col_a.download_button("Download PDF", pdf_bytes, f"aire_report_{r['report_id']}.pdf", "application/pdf", use_container_width=True)
                     col_a.download_button("Download JSON", payload_json.encode("utf-8"), f"aire_report_{r['report_id']}.json", "application/json", use_container_width=True)
 
@@ -972,45 +1170,92 @@ if page_key == "Batch Screener":
     max_rows = c1.number_input("Max rows", 1, 800, min(75, limits["batch_rows"]), 1)
     st.caption(f"Your plan allows up to {limits['batch_rows']} rows per batch.")
     ai_top = c2.checkbox("AI summaries for top 5", value=False, disabled=not bool(OPENAI_API_KEY))
+    risk_sim = c2.checkbox("Risk simulation (P(IRR < 10%))", value=False)
+    offer_grade = c2.selectbox("Max offer for grade", ["—", "A", "B", "C"], index=0)
+    keep_top = c3.number_input("Keep top", 1, 800, min(50, limits["batch_rows"]), 1)
+    f1, f2 = c3.columns(2)
+    min_dscr_f = f1.number_input("Min DSCR", 0.0, 5.0, 0.0, 0.05, key="batch_min_dscr")
+    max_price_f = f2.number_input("Max price ($)", 0.0, 50_000_000.0, 0.0, 10_000.0, key="batch_max_price")
     runb = c3.button("✅ Grade batch", type="primary", use_container_width=True)
 
     if runb:
         cap = min(int(max_rows), int(limits['batch_rows']))
         lines = [l.strip() for l in (bulk or "").splitlines() if l.strip()][:cap]
-        results, errors = [], []
-        with st.spinner("Grading batch…"):
+        errors = []
+        top = ranking.TopK(int(keep_top), constraints=ranking.Constraints(min_dscr=min_dscr_f or None, max_price=max_price_f or None))
+        reused = 0
+        with st.spinner("Grading batch…"), log_context(job_id=new_id()):
             for raw in lines:
-                r = run_one(raw, chosen_template, {"price":0.0,"rent":0.0,"exp":0.0,"address_override":None}, use_auto, False)
+                r = run_one(raw, chosen_template, {"price":0.0,"rent":0.0,"exp":0.0,"address_override":None}, use_auto, False, reuse=True)
                 if not r or r.get("error"):
                     errors.append({"raw": raw, "error": (r or {}).get("error","Could not resolve")})
                 else:
-                    results.append(r)
+                    reused += int(bool(r.get("reused")))
+                    top.push(r)
+        results = top.results()
+        ts = top.stats()
+        if ts["filtered"] or ts["evicted"]:
+            st.caption(f"Graded {ts['seen']}: kept top {ts['kept']}, {ts['filtered']} failed filters, {ts['evicted']} below the cut. All are saved in Reports.")
+        if reused:
+            st.caption(f"{reused} row(s) had unchanged inputs and reuse their last saved report.")
 
         if errors:
             st.warning(f"{len(errors)} couldn't be resolved. Paste a one-line address for those.")
             st.dataframe(pd.DataFrame(errors), use_container_width=True, hide_index=True)
 
+        if risk_sim and results:
+            with st.spinner("Simulating risk…"), telemetry.stage("risk_sim"):
+                sims = monte_carlo.simulate_batch([DealInputs(**res["payload"]["inputs"]) for res in results],
+                                                  monte_carlo.SimConfig(n_paths=2_000))
+            for res, sim in zip(results, sims):
+                if sim:
+                    res["p_irr_below_hurdle"] = sim["p_irr_below_hurdle"]
+                    res["irr_p5"] = sim["irr_var95"]
+                    attach_to_report(res["report_id"], "risk_sim", sim)
+
+        if offer_grade != "—" and results:
+            with telemetry.stage("goal_seek"):
+                offers = goal_seek.max_offer_batch([DealInputs(**res["payload"]["inputs"]) for res in results],
+                                                   {"grade": offer_grade}, workspace_id=st.session_state.active_workspace_id)
+            for res, offer in zip(results, offers):
+                res["max_offer"] = offer["max_price"] if offer else None
+
         df = pd.DataFrame(results)
         if df.empty:
             st.error("No successful rows.")
         else:
-            df = df.sort_values(["score","confidence"], ascending=[False, False])
-            cols = ["grade_detail","grade","score","confidence","verdict","address","cap_rate","coc","dscr","irr","price","rent","expenses","sources","flags","report_id"]
+            cols = ["rank","grade_detail","grade","score","confidence","verdict","address","cap_rate","coc","dscr","irr","irr_p5","p_irr_below_hurdle","price","max_offer","rent","expenses","sources","flags","report_id"]
             cols = [c for c in cols if c in df.columns]
             st.markdown('<div class="tablewrap">', unsafe_allow_html=True)
             st.dataframe(df[cols], use_container_width=True, hide_index=True)
             st.markdown('</div>', unsafe_allow_html=True)
             st.download_button("Download ranked CSV", df.to_csv(index=False).encode("utf-8"), "ranked_deals.csv", "text/csv", use_container_width=True)
+            # PDFs are rendered only on request (below); keep the export rows for that rerun.
+            drop_export("batch_export")
+            st.session_state.batch_export_rows = list(bulk_export.rows_from_batch(results))
+
+            with st.expander("Portfolio view (kept rows)", expanded=False):
+                with telemetry.stage("portfolio"):
+                    render_portfolio(portfolio.analyze(portfolio.holdings_from_batch(results)))
 
             if ai_top and OPENAI_API_KEY:
                 st.divider()
                 st.markdown("### AI summaries (Top 5)")
-                for row in df.head(5).to_dict("records"):
+                top_rows = df.head(5).to_dict("records")
+                with st.spinner("Writing summaries…"):
+                    memos = generate_memos([seed_from_payload(row.get("payload") or {}) for row in top_rows], OPENAI_API_KEY)
+                for row, memo in zip(top_rows, memos):
                     grade_display = row.get("grade_detail") or row.get("grade")
                     st.markdown(f"#### {row['address']} — {grade_display} ({row['score']:.1f})")
-                    memo = generate_investment_memo((row.get("payload") or {}).get("outputs", {}), OPENAI_API_KEY)
                     st.write(memo or "AI summary unavailable.")
 
+    batch_rows = st.session_state.get("batch_export_rows")
+    if batch_rows:
+        if st.button(f"Build PDFs ({len(batch_rows)} kept rows)", use_container_width=True, key="batch_pdf_run"):
+            with st.spinner("Rendering PDFs…"), telemetry.stage("bulk_export"):
+                build_export("batch_export", batch_rows, "zip", "ranked_deals")
+        export_download("batch_export", "Download PDFs (ZIP)")
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Alerts
@@ -1051,60 +1296,82 @@ if page_key == "Alerts":
         st.caption("No watchlist items yet.")
 
     st.divider()
-    email_me = st.checkbox("Email me when a hit occurs (optional)", value=False, disabled=not bool(SENDGRID_API_KEY and ALERT_EMAIL_TO))
-    if email_me and not (SENDGRID_API_KEY and ALERT_EMAIL_TO):
-        st.caption("Add SENDGRID_API_KEY and ALERT_EMAIL_TO in Secrets to enable email alerts.")
+    route = notify.get_workspace_route(st.session_state.active_workspace_id)
+    with st.expander("Notification recipient for this workspace", expanded=False):
+        nc1, nc2 = st.columns([1, 3])
+        channel = nc1.selectbox("Channel", NOTIFY_CHANNELS, index=NOTIFY_CHANNELS.index(route[0]) if route and route[0] in NOTIFY_CHANNELS else 0)
+        recipient = nc2.text_input("Email address or https:// webhook URL", value=route[1] if route else "")
+        if st.button("Save recipient", use_container_width=True):
+            try:
+                notify.set_workspace_route(st.session_state.active_workspace_id, channel, recipient)
+                st.success("Saved. Hits from this workspace (app and background scans) go to this recipient.")
+                route = (channel, recipient.strip())
+            except ValueError as e:
+                st.error(str(e))
+        if route and st.button("Remove recipient", use_container_width=True):
+            notify.clear_workspace_route(st.session_state.active_workspace_id)
+            route = None
+    email_me = st.checkbox("Notify me when a hit occurs (optional)", value=False, disabled=not route)
+    if not route:
+        st.caption("Set this workspace's notification recipient above to enable alert notifications.")
+    else:
+        ob = notify.outbox_stats(st.session_state.active_workspace_id)
+        if ob:
+            st.caption("Notification outbox: " + ", ".join(f"{k} {v}" for k, v in sorted(ob.items())))
 
     if st.button("Scan watchlist", use_container_width=True):
         if not wl:
             st.warning("Add items first.")
         else:
-            rank = {"A":4,"B":3,"C":2,"D":1,"F":0}
-            results = []
+            top = ranking.TopK(ALERT_SCAN_TOP, order=(("hit", True), ("score", True)))
             hits = []
-            with st.spinner("Scanning…"):
+            unchanged = 0
+            last_runs = last_alert_runs([item["id"] for item in wl])
+            # Same template, model, fingerprint and alert runs as the background scanner (watch_daemon.scan_item),
+            # so run deltas never compare grades from two different models
+            watch_tpl = watch_daemon.watch_template()
+            watch_model = get_active_model_cached(st.session_state.active_workspace_id) or {}
+            with st.spinner("Scanning…"), log_context(job_id=new_id()):
                 for item in wl:
-                    raw = item["url"] if item["url"] else item["address"]
-                    r = run_one(raw, chosen_template, {"price":0.0,"rent":0.0,"exp":0.0,"address_override": item["address"]}, use_auto, False)
-                    if not r or r.get("error"):
+                    prev = last_runs.get(int(item["id"]))
+                    try:
+                        r = watch_daemon.scan_item(item, pull_property_data(item["address"]) or {}, watch_tpl, watch_model, prev,
+                                                   user_id=st.session_state.user['id'], scanner="app")
+                    except Exception as e:
+                        log_event("watch_item_error", level="error", watchlist_id=item["id"], error=f"{type(e).__name__}: {e}")
                         continue
-                    hit = int((r["score"] >= float(item["target_score"])) and (rank.get(r["grade"],0) >= rank.get(item["target_grade"],0)))
-                    save_alert_run(item["id"], r["address"], r["url"], r["grade"], r["score"], r["confidence"], hit, r["payload"], workspace_id=st.session_state.active_workspace_id, user_id=st.session_state.user['id'])
-                    r["hit"] = "✅" if hit else ""
-                    r["watchlist_id"] = item["id"]
-                    results.append(r)
-                    if hit:
-                        hits.append(r)
+                    if r["unchanged"]:
+                        # Same inputs as the last run: show it again, nothing graded or stored
+                        unchanged += 1
+                        prev = prev or {}
+                        r.update(grade=prev.get("grade"), score=prev.get("score") or 0.0, confidence=prev.get("confidence"),
+                                 hit=int(prev.get("hit") or 0), verdict="Unchanged since last scan", flags=[], run_id=prev.get("id"))
+                    row = {k: r.get(k) for k in ("watchlist_id", "address", "grade", "grade_detail", "score", "confidence",
+                                                 "verdict", "hit", "run_id", "workspace_id")}
+                    row.update(sources="; ".join(r["sources"]), flags="; ".join(r["flags"]))
+                    top.push(row)
+                    if r.get("new_hit"):  # like the daemon: only a changed row that became a hit is notified
+                        hits.append({k: r[k] for k in watch_daemon.HIT_FIELDS})
+            results = top.results()
+            st.caption(f"Graded with the {watch_daemon.DEFAULT_TEMPLATE} template, like the background scanner.")
+            if unchanged:
+                st.caption(f"{unchanged} item(s) unchanged since their last scan (not re-graded).")
 
             if results:
-                df = pd.DataFrame(results).sort_values(["hit","score"], ascending=[False, False])
-                st.dataframe(df[["hit","watchlist_id","address","grade","score","confidence","verdict","sources","flags","report_id"]],
+                df = pd.DataFrame(results)
+                df["hit"] = df["hit"].map(lambda h: "✅" if h else "")
+                st.dataframe(df[["hit","watchlist_id","address","grade","score","confidence","verdict","sources","flags","run_id"]],
                              use_container_width=True, hide_index=True)
             else:
                 st.info("No results (couldn’t resolve entries).")
 
-            if email_me and hits and SENDGRID_API_KEY and ALERT_EMAIL_TO:
-                try:
-                    subject = f"AIRE Alert: {len(hits)} hit(s)"
-                    lines = [f"{h['address']} — {h['grade']} ({h['score']:.1f}) — {h['verdict']}" for h in hits[:12]]
-                    body = "Hits:\n" + "\n".join(lines)
-                    resp = requests.post(
-                        "https://api.sendgrid.com/v3/mail/send",
-                        headers={"Authorization": f"Bearer {SENDGRID_API_KEY}", "Content-Type": "application/json"},
-                        json={
-                            "personalizations": [{"to": [{"email": ALERT_EMAIL_TO}]}],
-                            "from": {"email": ALERT_EMAIL_TO},
-                            "subject": subject,
-                            "content": [{"type": "text/plain", "value": body}]
-                        },
-                        timeout=cfg.api_timeout_sec
-                    )
-                    if 200 <= resp.status_code < 300:
-                        st.success(f"Email sent to {ALERT_EMAIL_TO}.")
-                    else:
-                        st.warning("Email failed (check SendGrid config).")
-                except Exception:
-                    st.warning("Email failed (network/config).")
+            if email_me and hits and route:
+                ws = st.session_state.active_workspace_id
+                queued = notify.enqueue_hits(hits, *route, workspace_id=ws)
+                notify.start_background(notify.transports_from_env(NOTIFY_ENV))
+                st.success(f"Queued {queued} new hit(s) for the next digest to {route[1]}.")
+            elif email_me and route:
+                st.caption("No new hits to notify (items already hitting were notified before).")
 
     st.divider()
     hist = list_alert_runs(100, workspace_id=st.session_state.active_workspace_id)
@@ -1330,6 +1597,39 @@ if page_key == "Reports":
         if rid:
             payload = read_report(int(rid))
             st.json(payload if payload else {"error":"not found"})
+
+        st.markdown("#### Portfolio")
+        pick_ids = st.multiselect("Reports to aggregate", [row["id"] for row in rows],
+                                  format_func=lambda x: f"#{x} {next((row['address'] for row in rows if row['id'] == x), '')}")
+        if pick_ids and st.button("Analyze portfolio", key="pf_run"):
+            with telemetry.stage("portfolio"):
+                st.session_state.portfolio_view = portfolio.analyze_reports(pick_ids, workspace_id=st.session_state.active_workspace_id)
+        if st.session_state.get("portfolio_view"):
+            render_portfolio(st.session_state.portfolio_view)
+
+        st.markdown("#### Bulk export")
+        e1, e2, e3 = st.columns(3)
+        scope = e1.selectbox("Reports", ["Selected above", "Last 7 days", "Last 30 days"], key="exp_scope")
+        exp_fmt = e2.selectbox("Format", ["ZIP of PDFs", "One PDF"], key="exp_fmt")
+        if e3.button("Build export", use_container_width=True, key="exp_run"):
+            ws = st.session_state.active_workspace_id
+            if scope == "Selected above":
+                ids = list_report_ids(ws, ids=pick_ids)
+            else:
+                ids = list_report_ids(ws, since=int(time.time()) - (7 if scope == "Last 7 days" else 30) * 86400)
+            fmt = "zip" if exp_fmt.startswith("ZIP") else "pdf"
+            cap = bulk_export.MAX_REPORTS if fmt == "zip" else bulk_export.PDF_MAX_PAGES
+            if not ids:
+                st.warning("No reports to export.")
+            elif len(ids) > cap:
+                st.warning(f"{len(ids)} reports; exports are limited to {cap} in this format.")
+            else:
+                with st.spinner(f"Rendering {len(ids)} report(s)…"), telemetry.stage("bulk_export"):
+                    build_export("export_file", bulk_export.iter_reports(ids, ws), fmt, "aire_reports")
+                st.session_state.export_file["count"] = len(ids)
+        if st.session_state.get("export_file"):
+            exp = st.session_state.export_file
+            export_download("export_file", f"Download {exp['count']} report(s) (.{exp['fmt']})")
     else:
         st.caption("No reports yet.")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -1630,7 +1930,7 @@ if (not st.session_state.dev_mode) and (effective_plan(sub) == "free") and ((sub
 
     st.divider()
     st.markdown("#### API endpoint")
-    st.code("""POST /v1/grade
+    st.code("""POST /v1/grade            (optional: ?view=compact  or  ?fields=grade,score,metrics.IRR)
 Header: X-API-Key: <your key>
 Body:
 {
@@ -1682,6 +1982,23 @@ STRIPE_CANCEL_URL = "https://your-streamlit-app.streamlit.app/?billing=cancel"
 """, language="toml")
 
     st.caption("If you only add one key: start with RentCast.")
+
+    st.divider()
+    st.markdown("#### Performance (this server process)")
+    st.caption("Where time goes: per-stage grading latency, database queries, caches and data providers.")
+    p1, p2 = st.columns(2)
+    with p1:
+        st.markdown("**Grading stages**")
+        st.dataframe(pd.DataFrame(telemetry.STAGE_LATENCY.summary()), use_container_width=True, hide_index=True)
+        st.markdown("**Caches**")
+        st.dataframe(pd.DataFrame(telemetry.cache_stats()), use_container_width=True, hide_index=True)
+    with p2:
+        st.markdown("**Database queries**")
+        st.dataframe(pd.DataFrame(telemetry.DB_QUERIES.summary()), use_container_width=True, hide_index=True)
+        st.markdown("**Data providers**")
+        st.dataframe(pd.DataFrame(telemetry.provider_stats()), use_container_width=True, hide_index=True)
+    with st.expander("Prometheus export", expanded=False):
+        st.code(telemetry.render_prometheus(), language="text")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Governance
@@ -1933,6 +2250,12 @@ if page_key == "Audit":
                 "val_f1_to": (payload.get("to_metrics",{}).get("val",{}).get("f1") if isinstance(payload.get("to_metrics"), dict) else None),
             })
         st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        if st.button("Verify audit chain"):
+            res = audit.verify_chain(st.session_state.active_workspace_id)
+            if res["ok"]:
+                st.success(f"Hash chain intact: {res['checked']} event(s) verified" + (f", {res['legacy']} from before the chain" if res["legacy"] else "") + ".")
+            else:
+                st.error(f"Hash chain broken at audit event #{res['bad_id']} (edited, removed or inserted out of order).")
         with st.expander("Raw event payloads (advanced)"):
             st.json(events)
     st.markdown('</div>', unsafe_allow_html=True)
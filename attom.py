@@ -12,3 +12,10 @@ def property_detail(api_key: str, address: str) -> Optional[Dict[str, Any]]:
         return r.json() if r.status_code == 200 else None
     except Exception:
         return None
+
+async def property_detail_async(client, api_key: str, address: str) -> Optional[Dict[str, Any]]:
+    try:
+        r = await client.get(f"{BASE}/property/detail", headers=_headers(api_key), params={"address": address}, timeout=20)
+        return r.json() if r.status_code == 200 else None
+    except Exception:
+        return None
@@ -1,36 +1,204 @@
+"""Append-only, hash-chained audit log with a write-behind batch writer.
+
+log_event() hands the row to a writer thread and waits for its id. The
+writer inserts everything queued (up to BATCH rows) in one transaction, so
+concurrent callers share a commit, and each caller gets the id of its own row
+(lastrowid / RETURNING on the writing connection). enqueue() returns the
+Future without waiting.
+
+Every row stores prev_hash and row_hash = sha256(prev_hash, workspace, actor,
+type, created_at, payload), chained per workspace. verify_chain() walks a
+workspace in id order one page at a time and can resume from a checkpoint
+(last_id, last_hash), so periodic verification only reads the new rows. Rows
+written before the chain existed have no hashes and are counted as legacy.
+"""
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+import atexit
+import hashlib
 import json
+import os
+import queue
+import threading
+
+import telemetry
+from db import backend, connect, ensure, fetchall, now
 
-from db import exec_commit, fetchall, fetchone, now
+BATCH = int(os.getenv("AUDIT_BATCH", "500"))
+VERIFY_PAGE = 5000
+_PG_LOCK_KEY = 0x41554454  # pg_advisory_xact_lock key serializing chain appends across processes
 
 def migrate():
-    exec_commit("""
-    CREATE TABLE IF NOT EXISTS audit_events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        workspace_id INTEGER NOT NULL,
-        actor_user_id INTEGER NOT NULL,
-        event_type TEXT NOT NULL,
-        created_at TEXT NOT NULL,
-        payload_json TEXT NOT NULL
-    );
-    """)
-    exec_commit("CREATE INDEX IF NOT EXISTS idx_audit_ws_time ON audit_events(workspace_id, created_at DESC);")
+    conn = connect()
+    b = backend()
+    cur = conn.cursor() if b == "postgres" else conn
+    if b == "sqlite":
+        # Check and rebuild under one write lock, so two processes can't both see the legacy schema
+        conn.execute("BEGIN IMMEDIATE")
+        cols = {r[1]: (r[2] or "").upper() for r in conn.execute("PRAGMA table_info(audit_events)").fetchall()}
+        legacy = cols.get("created_at") == "TEXT"  # first schema: TEXT timestamps, no hash chain
+        if legacy:
+            conn.execute("ALTER TABLE audit_events RENAME TO audit_events_legacy")
+        conn.execute("""CREATE TABLE IF NOT EXISTS audit_events(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workspace_id INTEGER NOT NULL,
+            actor_user_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            payload_json TEXT NOT NULL,
+            prev_hash TEXT,
+            row_hash TEXT
+        )""")
+        if legacy:
+            conn.execute("""INSERT INTO audit_events(id, workspace_id, actor_user_id, event_type, created_at, payload_json)
+                SELECT id, workspace_id, actor_user_id, event_type, CAST(created_at AS INTEGER), payload_json FROM audit_events_legacy""")
+            conn.execute("DROP TABLE audit_events_legacy")
+    else:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (_PG_LOCK_KEY,))
+        cur.execute("""CREATE TABLE IF NOT EXISTS audit_events(
+            id BIGSERIAL PRIMARY KEY,
+            workspace_id INTEGER NOT NULL,
+            actor_user_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            created_at BIGINT NOT NULL,
+            payload_json TEXT NOT NULL,
+            prev_hash TEXT,
+            row_hash TEXT
+        )""")
+        cur.execute("SELECT data_type FROM information_schema.columns WHERE table_name='audit_events' AND column_name='created_at'")
+        row = cur.fetchone()
+        if row and row[0] == "text":
+            cur.execute("ALTER TABLE audit_events ALTER COLUMN created_at TYPE BIGINT USING created_at::bigint")
+        cur.execute("ALTER TABLE audit_events ADD COLUMN IF NOT EXISTS prev_hash TEXT")
+        cur.execute("ALTER TABLE audit_events ADD COLUMN IF NOT EXISTS row_hash TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_ws_time ON audit_events(workspace_id, created_at DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_ws_id ON audit_events(workspace_id, id)")
+    conn.commit()
+    try: conn.close()
+    except Exception: pass
+
+def chain_hash(prev_hash: str, workspace_id: int, actor_user_id: int, event_type: str, created_at: int, payload_json: str) -> str:
+    basis = "\x1f".join([prev_hash or "", str(int(workspace_id)), str(int(actor_user_id)), event_type, str(int(created_at)), payload_json])
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+Row = Tuple[int, int, str, int, str]  # workspace_id, actor_user_id, event_type, created_at, payload_json
+
+def _q(sql: str) -> str:
+    return sql.replace("?", "%s") if backend() == "postgres" else sql
+
+def _insert(rows: List[Row]) -> List[int]:
+    """Append rows in one transaction, extending each workspace's chain; returns their ids in order."""
+    ensure(migrate)
+    pg = backend() == "postgres"
+    conn = connect()
+    cur = conn.cursor() if pg else conn
+    try:
+        if pg:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_PG_LOCK_KEY,))
+        else:
+            conn.execute("BEGIN IMMEDIATE")  # chain heads must not move under us (other processes)
+        heads: Dict[int, str] = {}
+        for ws in {r[0] for r in rows}:
+            c = cur.execute(_q("SELECT row_hash FROM audit_events WHERE workspace_id=? AND row_hash IS NOT NULL ORDER BY id DESC LIMIT 1"), (ws,))
+            head = (cur if pg else c).fetchone()
+            heads[ws] = head[0] if head else ""
+        ids: List[int] = []
+        sql = "INSERT INTO audit_events(workspace_id, actor_user_id, event_type, created_at, payload_json, prev_hash, row_hash) VALUES (?,?,?,?,?,?,?)"
+        for ws, actor, event_type, created_at, payload_json in rows:
+            prev = heads[ws]
+            h = chain_hash(prev, ws, actor, event_type, created_at, payload_json)
+            params = (ws, actor, event_type, created_at, payload_json, prev, h)
+            if pg:
+                cur.execute(_q(sql + " RETURNING id"), params)
+                ids.append(int(cur.fetchone()[0]))
+            else:
+                ids.append(int(conn.execute(sql, params).lastrowid))
+            heads[ws] = h
+        conn.commit()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        try: conn.close()
+        except Exception: pass
+
+class AuditWriter:
+    """Single writer thread per process; callers block on (or hold) a Future for their row id."""
+    def __init__(self, batch_size: int = BATCH):
+        self.batch_size = max(1, int(batch_size))
+        self.q: "queue.Queue[Any]" = queue.Queue()
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def submit(self, row: Row) -> "Future[int]":
+        if self._pid != os.getpid():
+            self._start()
+        fut: "Future[int]" = Future()
+        self.q.put((fut, row))
+        return fut
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.q = queue.Queue()
+            threading.Thread(target=self._run, name="audit-writer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.q.get_nowait())
+                except queue.Empty:
+                    break
+            pending = [item for item in batch if not isinstance(item, threading.Event)]
+            if pending:
+                try:
+                    with telemetry.stage("audit_write"):
+                        ids = _insert([row for _, row in pending])
+                    for (fut, _), rid in zip(pending, ids):
+                        fut.set_result(rid)
+                except Exception as e:
+                    for fut, _ in pending:
+                        fut.set_exception(e)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self.q.put(done)
+        return done.wait(timeout)
+
+_WRITER = AuditWriter()
+atexit.register(_WRITER.flush, 5.0)
+
+def enqueue(workspace_id: int, actor_user_id: int, event_type: str, payload: Dict[str, Any]) -> "Future[int]":
+    """Write-behind: queue the event and return a Future for its id."""
+    payload_json = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return _WRITER.submit((int(workspace_id), int(actor_user_id), str(event_type), now(), payload_json))
 
 def log_event(workspace_id: int, actor_user_id: int, event_type: str, payload: Dict[str, Any]) -> int:
-    migrate()
-    payload_json = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
-    exec_commit(
-        "INSERT INTO audit_events(workspace_id, actor_user_id, event_type, created_at, payload_json) VALUES (?,?,?,?,?)",
-        (int(workspace_id), int(actor_user_id), str(event_type), now(), payload_json),
-    )
-    row = fetchone("SELECT last_insert_rowid()")
-    return int(row[0]) if row else 0
+    return enqueue(workspace_id, actor_user_id, event_type, payload).result()
+
+def log_events(events: List[Tuple[int, int, str, Dict[str, Any]]]) -> List[int]:
+    """Many events at once (committed together); ids in input order."""
+    futs = [enqueue(*e) for e in events]
+    return [f.result() for f in futs]
+
+def flush(timeout: float = 10.0) -> bool:
+    return _WRITER.flush(timeout)
 
 def list_events(workspace_id: int, limit: int = 200) -> List[Dict[str, Any]]:
-    migrate()
+    ensure(migrate)
     rows = fetchall(
-        "SELECT id, created_at, actor_user_id, event_type, payload_json FROM audit_events WHERE workspace_id=? ORDER BY created_at DESC LIMIT ?",
+        "SELECT id, created_at, actor_user_id, event_type, payload_json FROM audit_events WHERE workspace_id=? ORDER BY created_at DESC, id DESC LIMIT ?",
         (int(workspace_id), int(limit)),
     )
     out: List[Dict[str, Any]] = []
@@ -47,3 +215,32 @@ def list_events(workspace_id: int, limit: int = 200) -> List[Dict[str, Any]]:
             "payload": payload,
         })
     return out
+
+def verify_chain(workspace_id: int, after_id: int = 0, last_hash: Optional[str] = None, page: int = VERIFY_PAGE) -> Dict[str, Any]:
+    """Recompute a workspace's chain in id order from a checkpoint.
+
+    Pass the previous result's last_id / last_hash to check only rows added
+    since. ok is False at the first row that was altered, removed or inserted
+    out of chain (bad_id).
+    """
+    ensure(migrate)
+    ws = int(workspace_id)
+    res: Dict[str, Any] = {"ok": True, "checked": 0, "legacy": 0, "bad_id": None, "last_id": int(after_id), "last_hash": last_hash}
+    while True:
+        rows = fetchall(
+            "SELECT id, actor_user_id, event_type, created_at, payload_json, prev_hash, row_hash FROM audit_events "
+            "WHERE workspace_id=? AND id>? ORDER BY id LIMIT ?",
+            (ws, res["last_id"], int(page)),
+        )
+        for rid, actor, event_type, created_at, payload_json, prev, h in rows:
+            if h is None and res["last_hash"] is None:
+                res["legacy"] += 1  # before the chain started
+            elif (prev or "") != (res["last_hash"] or "") or h != chain_hash(prev, ws, actor, event_type, created_at, payload_json):
+                res.update(ok=False, bad_id=int(rid))
+                return res
+            else:
+                res["checked"] += 1
+                res["last_hash"] = h
+            res["last_id"] = int(rid)
+        if len(rows) < page:
+            return res
@@ -0,0 +1,120 @@
+"""The tracked hot paths. Each setup builds its (seeded) inputs and returns the timed callable.
+
+Storage / outcomes / API cases use the SQLite file in SQLITE_PATH; the runner
+points it at a temporary file before importing this module.
+"""
+import itertools
+from typing import Any, Callable
+
+import irr_utils
+import learning
+import underwriting
+import vector_engine
+from benchmarks import synthetic
+from benchmarks.harness import case
+
+@case("underwriting.run_underwriting")
+def _run_underwriting() -> Callable[[], Any]:
+    d = synthetic.deals(1)[0]
+    return lambda: underwriting.run_underwriting(d)
+
+@case("underwriting.run_underwriting_x200")
+def _run_underwriting_batch() -> Callable[[], Any]:
+    ds = synthetic.deals(200)
+
+    def go():
+        for d in ds:
+            underwriting.run_underwriting(d, explain=False, include_cashflows=False)
+    return go
+
+@case("vector_engine.evaluate_x1000")
+def _vector_batch() -> Callable[[], Any]:
+    ds = synthetic.deals(1_000)
+    stacked = vector_engine.stack_inputs(ds)
+    return lambda: vector_engine.evaluate(ds[0], stacked)
+
+@case("irr.bisection_x100")
+def _irr_bisection() -> Callable[[], Any]:
+    cfs = synthetic.cashflows(100)
+
+    def go():
+        for cf in cfs:
+            underwriting.irr(cf)
+    return go
+
+@case("irr.newton_x100")
+def _irr_newton() -> Callable[[], Any]:
+    cfs = synthetic.cashflows(100)
+
+    def go():
+        for cf in cfs:
+            irr_utils.irr(cf)
+    return go
+
+@case("learning.train_sgd_2000x3")
+def _train_sgd() -> Callable[[], Any]:
+    rows = synthetic.training_rows(2_000)
+    return lambda: learning.train_sgd(rows, epochs=3)
+
+@case("learning.predict_proba")
+def _predict() -> Callable[[], Any]:
+    feats = synthetic.training_rows(1)[0][0]
+    w = learning.default_weights()
+    return lambda: learning.predict_proba(w, feats)
+
+@case("outcomes.find_best_report_match_800")
+def _find_match() -> Callable[[], Any]:
+    import random
+
+    import storage
+    from outcomes import find_best_report_match
+    rng = random.Random(11)
+    ws = 9_001  # keeps these rows apart from the storage cycle below
+    addrs = [synthetic.address(rng) for _ in range(800)]
+    storage.save_reports_bulk([{"address": a, "grade": "B", "score": 80.0, "confidence": 0.8, "payload": {}}
+                               for a in addrs], workspace_id=ws)
+    target = addrs[400].replace(" St,", " Street,")
+    return lambda: find_best_report_match(ws, address=target)
+
+@case("storage.save_list_read")
+def _storage_cycle() -> Callable[[], Any]:
+    import storage
+    d = synthetic.deals(1)[0]
+    out = underwriting.run_underwriting(d)
+    payload = {"inputs": d.__dict__, "outputs": {"metrics": out.metrics, "rationale": out.rationale}}
+
+    def go():
+        rid = storage.save_report(d.address, "", out.grade, out.score, out.confidence, payload)
+        storage.list_reports(50)
+        storage.read_report(rid)
+    return go
+
+@case("api.v1_grade")
+def _api_grade() -> Callable[[], Any]:
+    from fastapi.testclient import TestClient
+
+    import api_server
+    import providers
+
+    async def _ok(*a, **k):
+        return 1
+
+    async def _noop(*a, **k):
+        return None
+
+    async def _pulled(address, keys, client=None):
+        return {"price": 325_000.0, "monthly_rent": 2_450.0, "last_sale_price": 290_000.0,
+                "last_sale_date": "2019-06-01", "notes": ["stub"]}
+
+    api_server._authenticate = _ok
+    api_server._consume_quota = _noop
+    providers.apull_property_data_cached = _pulled
+    client = TestClient(api_server.app)
+    client.__enter__()  # run the lifespan warmup once; the process exits after the run
+    prices = itertools.count(200_000, 7)  # a new price per call so the response cache never hits
+
+    def go():
+        r = client.post("/v1/grade", json={"raw": "12 Main St, Austin, TX 78701", "price": float(next(prices)),
+                                           "monthly_expenses": 900.0, "use_auto": True})
+        r.raise_for_status()
+    return go
@@ -0,0 +1,88 @@
+"""Timing, baselines and the regression check.
+
+Each case is timed as the best of `repeat` samples, where one sample runs the
+callable enough times to take at least MIN_SAMPLE_SEC. Best-of is used because
+noise on a shared box only ever makes things slower. Baselines are plain JSON
+keyed by case name; check() flags any case slower than baseline x (1 + threshold).
+"""
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+MIN_SAMPLE_SEC = 0.05
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+
+CASES: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+def case(name: str):
+    """Register a benchmark: the decorated function does the setup and returns the callable to time."""
+    def wrap(setup: Callable[[], Callable[[], Any]]):
+        CASES[name] = setup
+        return setup
+    return wrap
+
+def time_call(fn: Callable[[], Any], repeat: int = DEFAULT_REPEAT, min_sample: float = MIN_SAMPLE_SEC) -> Dict[str, Any]:
+    fn()  # warm caches / imports
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_sample or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [dt / loops]
+    for _ in range(max(0, repeat - 1)):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t0) / loops)
+    samples.sort()
+    return {"sec": samples[0], "median": samples[len(samples) // 2], "loops": loops, "repeat": len(samples)}
+
+def run(names: Optional[List[str]] = None, repeat: int = DEFAULT_REPEAT, log=None) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, setup in CASES.items():
+        if names and not any(n in name for n in names):
+            continue
+        out[name] = time_call(setup(), repeat=repeat)
+        if log:
+            log(f"{name:<40} {out[name]['sec'] * 1e3:10.3f} ms")
+    return out
+
+def environment() -> Dict[str, Any]:
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "recorded_at": int(time.time())}
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    # Merge so a filtered run (--only) only refreshes the cases it measured
+    data = load_baseline(path) or {"cases": {}}
+    data["environment"] = environment()
+    data["cases"].update({k: {"sec": v["sec"]} for k, v in results.items()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def check(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+          threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Rows for every measured case that has a baseline; `regressed` marks the failures."""
+    rows = []
+    for name, r in results.items():
+        base = (baseline.get("cases") or {}).get(name)
+        if not base or not base.get("sec"):
+            continue
+        ratio = r["sec"] / base["sec"]
+        rows.append({"case": name, "baseline_ms": base["sec"] * 1e3, "current_ms": r["sec"] * 1e3,
+                     "ratio": ratio, "regressed": ratio > 1.0 + threshold})
+    return rows
@@ -0,0 +1,60 @@
+"""Benchmark runner.
+
+    python -m benchmarks.run                      # measure and print
+    python -m benchmarks.run --save               # record benchmarks/baseline.json
+    python -m benchmarks.run --check              # exit 1 if a case slowed > threshold
+    python -m benchmarks.run --only irr --check --threshold 0.5
+
+Baselines are machine-specific: record them on the box (or CI runner class)
+that runs the check.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks import harness
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    p.add_argument("--only", nargs="*", help="substring filter on case names")
+    p.add_argument("--repeat", type=int, default=harness.DEFAULT_REPEAT)
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--save", action="store_true", help="write results into the baseline file")
+    p.add_argument("--check", action="store_true", help="compare against the baseline and fail on regressions")
+    p.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", harness.DEFAULT_THRESHOLD)),
+                   help="allowed slowdown as a fraction (0.25 = 25%%)")
+    p.add_argument("--json", help="also write the raw results to this file")
+    args = p.parse_args(argv)
+
+    # Storage / API cases write to a throwaway SQLite file, never the app DB
+    os.environ["SQLITE_PATH"] = os.getenv("BENCH_SQLITE_PATH") or os.path.join(tempfile.mkdtemp(prefix="aire-bench-"), "bench.db")
+    from benchmarks import cases  # noqa: F401  (registers the cases)
+
+    results = harness.run(args.only, repeat=args.repeat, log=print)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": harness.environment(), "cases": results}, f, indent=2)
+    if args.save:
+        harness.save_baseline(args.baseline, results)
+        print(f"baseline written: {args.baseline}")
+    if args.check:
+        baseline = harness.load_baseline(args.baseline)
+        if not baseline:
+            print(f"no baseline at {args.baseline}; run with --save first", file=sys.stderr)
+            return 2
+        rows = harness.check(results, baseline, args.threshold)
+        failed = [r for r in rows if r["regressed"]]
+        for r in rows:
+            mark = "REGRESSED" if r["regressed"] else "ok"
+            print(f"{r['case']:<40} {r['baseline_ms']:10.3f} -> {r['current_ms']:10.3f} ms  x{r['ratio']:.2f}  {mark}")
+        if failed:
+            print(f"{len(failed)} case(s) slower than baseline by more than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
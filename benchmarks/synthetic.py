@@ -0,0 +1,58 @@
+"""Seeded synthetic inputs for the benchmarks (same seed -> same workload)."""
+import random
+from typing import Any, Dict, List, Tuple
+
+import learning
+from underwriting import DealInputs
+
+STREETS = ("Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Pine St", "Elm Ct", "Lakeview Rd", "2nd Ave")
+CITIES = (("Austin", "TX", "787"), ("Tulsa", "OK", "741"), ("Columbus", "OH", "432"), ("Tampa", "FL", "336"))
+
+def address(rng: random.Random) -> str:
+    city, state, zip3 = rng.choice(CITIES)
+    return f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}, {state} {zip3}{rng.randint(0, 99):02d}"
+
+def deal(rng: random.Random) -> DealInputs:
+    price = rng.randint(80, 900) * 1_000.0
+    rent = price * rng.uniform(0.005, 0.011)
+    return DealInputs(
+        address=address(rng),
+        price=price,
+        monthly_rent=round(rent, 2),
+        monthly_expenses=round(rent * rng.uniform(0.30, 0.55), 2),
+        vacancy_rate=rng.choice((0.05, 0.08, 0.10)),
+        down_payment_pct=rng.choice((20.0, 25.0, 30.0)),
+        interest_rate_pct=round(rng.uniform(5.5, 8.5), 3),
+        hold_years=rng.choice((5, 7, 10)),
+        last_sale_price=price * rng.uniform(0.7, 1.1) if rng.random() < 0.6 else None,
+    )
+
+def deals(n: int, seed: int = 7) -> List[DealInputs]:
+    rng = random.Random(seed)
+    return [deal(rng) for _ in range(n)]
+
+def cashflows(n: int, seed: int = 7) -> List[List[float]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        equity = rng.uniform(20_000, 200_000)
+        years = rng.choice((5, 7, 10))
+        yearly = [equity * rng.uniform(-0.02, 0.09) for _ in range(years)]
+        yearly[-1] += equity * rng.uniform(0.8, 2.2)
+        out.append([-equity] + yearly)
+    return out
+
+def training_rows(n: int, seed: int = 7) -> List[Tuple[Dict[str, float], int]]:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        payload: Dict[str, Any] = {
+            "underwriting": {"cap_rate": rng.uniform(0.02, 0.11), "cash_on_cash": rng.uniform(-0.05, 0.15),
+                             "dscr": rng.uniform(0.6, 1.8), "rent_to_price": rng.uniform(0.05, 0.13),
+                             "price_to_rent": rng.uniform(7, 20)},
+            "market": {"days_on_market": rng.randint(0, 180), "yoy_growth_pct": rng.uniform(-5, 12)},
+            "risk": {"crime_index": rng.randint(0, 100), "school_score": rng.randint(0, 10)},
+        }
+        feats = learning.extract_features(payload)
+        rows.append((feats, int(payload["underwriting"]["dscr"] > 1.2 and rng.random() < 0.8)))
+    return rows
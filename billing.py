@@ -1,5 +1,5 @@
 import time
-from db import backend, connect, exec_commit, fetchone
+from db import backend, connect, exec_commit, fetchone, afetchone, aensure
 from typing import Dict, Any, Optional
 
 def now() -> int:
@@ -57,6 +57,13 @@ def get_subscription(workspace_id: int) -> Dict[str, Any]:
         return {"plan": "free", "status": "active"}
     return {"plan": row[0], "status": row[1], "stripe_customer_id": row[2], "stripe_subscription_id": row[3], "current_period_end": row[4]}
 
+async def aget_subscription(workspace_id: int) -> Dict[str, Any]:
+    await aensure(migrate)
+    row = await afetchone("SELECT plan, status, stripe_customer_id, stripe_subscription_id, current_period_end FROM subscriptions WHERE workspace_id=?", (int(workspace_id),))
+    if not row:
+        return {"plan": "free", "status": "active"}
+    return {"plan": row[0], "status": row[1], "stripe_customer_id": row[2], "stripe_subscription_id": row[3], "current_period_end": row[4]}
+
 def set_plan(workspace_id: int, plan: str, status: str="active",
              stripe_customer_id: Optional[str]=None, stripe_subscription_id: Optional[str]=None,
              current_period_end: Optional[int]=None) -> None:
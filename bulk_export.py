@@ -0,0 +1,164 @@
+"""Bulk PDF export: many reports as a streamed ZIP of PDFs or one multi-page PDF.
+
+    chunks = iter_zip(iter_reports(ids, workspace_id))        # bytes chunks, ready to stream
+    write_export(rows_from_batch(results), "out.zip")         # or to a file (the app)
+
+Reports are read from storage READ_CHUNK at a time and only the fields the PDF
+prints travel to the workers. PDFs are rendered on a process pool
+(EXPORT_WORKERS) in RENDER_CHUNK-report tasks with at most 2 x workers tasks
+in flight, and each one is written
+to the ZIP and handed to the caller as soon as it is ready. The ZIP is
+written in streaming mode (data descriptors), so neither the archive nor the
+full set of PDFs is held in memory. Single PDFs go through pdf_cache, so a
+report exported before is read from disk rather than redrawn.
+
+A multi-page PDF is drawn on a single canvas: reportlab keeps the document in
+memory until save(), so that format is capped at PDF_MAX_PAGES.
+"""
+import itertools
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+
+import pdf_cache
+from export_pdf import build_report_pdf, draw_report
+from storage import READ_CHUNK, read_reports
+
+WORKERS = int(os.getenv("EXPORT_WORKERS", "0") or 0) or min(4, os.cpu_count() or 1)
+MAX_REPORTS = int(os.getenv("EXPORT_MAX_REPORTS", "2000"))
+PDF_MAX_PAGES = 500
+RENDER_CHUNK = 32  # reports per worker task (one page renders in ~1 ms; per-task IPC would dominate)
+INLINE_BELOW = 4 * RENDER_CHUNK  # smaller exports render in-process; pool start-up costs more than it saves
+FORMATS = ("zip", "pdf")
+
+def pdf_fields(report_id: Any, payload: Dict[str, Any], address: Optional[str] = None) -> Dict[str, Any]:
+    """What build_report_pdf reads, from a saved payload (keeps worker pickles small)."""
+    o = payload.get("outputs") or {}
+    return {
+        "report_id": report_id,
+        "address": address or (payload.get("inputs") or {}).get("address"),
+        "grade": o.get("grade"),
+        "grade_detail": o.get("grade_detail"),
+        "score": o.get("score"),
+        "confidence": o.get("confidence"),
+        "verdict": o.get("verdict"),
+        "metrics": o.get("metrics_summary") or {},
+        "flags": o.get("flags") or [],
+        "rationale": o.get("rationale") or [],
+        "payload": {"provenance": payload.get("provenance") or {}},
+    }
+
+def iter_reports(report_ids: List[int], workspace_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+    """Saved reports in the given order, read READ_CHUNK at a time (ids outside the workspace are skipped)."""
+    ids = list(dict.fromkeys(int(x) for x in report_ids))
+    for k in range(0, len(ids), READ_CHUNK):
+        chunk = ids[k:k + READ_CHUNK]
+        payloads = read_reports(chunk, workspace_id)
+        for rid in chunk:
+            if rid in payloads:
+                yield pdf_fields(rid, payloads[rid])
+
+def rows_from_batch(results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Batch Screener rows (run_one results) -> export rows."""
+    for r in results:
+        yield pdf_fields(r.get("report_id"), r.get("payload") or {}, r.get("address"))
+
+def filename(report: Dict[str, Any]) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", str(report.get("address") or "").lower()).strip("-")[:60]
+    return f"aire_report_{report.get('report_id')}{'_' + slug if slug else ''}.pdf"
+
+def _render(report: Dict[str, Any]) -> Tuple[str, bytes]:
+    if report.get("report_id") is None:
+        return filename(report), build_report_pdf(report)
+    return filename(report), pdf_cache.get_pdf(report["report_id"], lambda: build_report_pdf(report))
+
+def _render_chunk(reports: List[Dict[str, Any]]) -> List[Tuple[str, bytes]]:
+    return [_render(r) for r in reports]
+
+def _chunks(it: Iterator[Dict[str, Any]], n: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(itertools.islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+def render_pdfs(reports: Iterable[Dict[str, Any]], workers: int = WORKERS) -> Iterator[Tuple[str, bytes]]:
+    """(filename, pdf bytes) in input order; parallel across processes for larger exports."""
+    it = iter(reports)
+    head = list(itertools.islice(it, INLINE_BELOW))
+    if workers <= 1 or len(head) < INLINE_BELOW:
+        for r in itertools.chain(head, it):
+            yield _render(r)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in _chunks(itertools.chain(head, it), RENDER_CHUNK):
+            pending.append(pool.submit(_render_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+class _Sink:
+    """Write-only, non-seekable file for ZipFile; drain() hands back what was written since the last call."""
+    def __init__(self):
+        self._buf = BytesIO()
+        self._pos = 0
+
+    def write(self, b) -> int:
+        self._pos += len(b)
+        return self._buf.write(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = self._buf.getvalue()
+        self._buf = BytesIO()
+        return data
+
+def iter_zip(reports: Iterable[Dict[str, Any]], workers: int = WORKERS) -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, pdf in render_pdfs(reports, workers):
+            zf.writestr(name, pdf)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()  # central directory
+
+def iter_pdf(reports: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """One multi-page PDF (one page per report)."""
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=LETTER)
+    for r in itertools.islice(reports, PDF_MAX_PAGES):
+        draw_report(c, r)
+    c.save()
+    yield buf.getvalue()
+
+def iter_export(reports: Iterable[Dict[str, Any]], fmt: str = "zip", workers: int = WORKERS) -> Iterator[bytes]:
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    return iter_zip(reports, workers) if fmt == "zip" else iter_pdf(reports)
+
+def write_export(reports: Iterable[Dict[str, Any]], path: str, fmt: str = "zip", workers: int = WORKERS) -> int:
+    """Stream an export to a file; returns its size in bytes."""
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in iter_export(reports, fmt, workers):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+def media_type(fmt: str) -> str:
+    return "application/zip" if fmt == "zip" else "application/pdf"
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and LRU bound."""
+
+    def __init__(self, ttl_sec: float, maxsize: int = 4096, clock: Callable[[], float] = time.monotonic):
+        self.ttl_sec = float(ttl_sec)
+        self.maxsize = int(maxsize)
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_sec: Optional[float] = None) -> None:
+        ttl = self.ttl_sec if ttl_sec is None else float(ttl_sec)
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class AsyncSingleFlight:
+    """Coalesce concurrent async calls for the same key into one in-flight task."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # shield: one cancelled caller must not cancel the lookup for everyone else
+        return await asyncio.shield(task)
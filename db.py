@@ -1,8 +1,12 @@
+import asyncio
+import hashlib
 import os
 import sqlite3
 import time
 from typing import Any, Iterable, Optional, Tuple, List, Dict
 
+import telemetry
+
 _BACKEND = None  # "sqlite" or "postgres"
 
 def now() -> int:
@@ -45,22 +49,36 @@ def _adapt_sql(sql: str) -> str:
         return sql.replace("?", "%s")
     return sql
 
+def _observe(sql: str, t0: float) -> None:
+    telemetry.DB_QUERIES.observe(time.perf_counter() - t0, backend=backend(), op=telemetry.sql_op(sql))
+
+def _abort(conn) -> None:
+    """Roll back and close after a failed statement; an open SQLite write transaction would lock out other writers."""
+    try:
+        conn.rollback()
+        conn.close()
+    except Exception:
+        pass
+
 def execute(sql: str, params: Optional[Iterable[Any]] = None, *, commit: bool = False):
+    t0 = time.perf_counter()
     conn = connect()
     cur = conn.cursor() if backend() == "postgres" else conn
     q = _adapt_sql(sql)
     if params is None:
         params = ()
-    if backend() == "postgres":
-        cur.execute(q, tuple(params))
-        if commit:
-            conn.commit()
-        return conn, cur
-    else:
-        cur = conn.execute(q, tuple(params))
+    try:
+        if backend() == "postgres":
+            cur.execute(q, tuple(params))
+        else:
+            cur = conn.execute(q, tuple(params))
         if commit:
             conn.commit()
-        return conn, cur
+    except Exception:
+        _abort(conn)
+        raise
+    _observe(sql, t0)
+    return conn, cur
 
 def fetchone(sql: str, params: Optional[Iterable[Any]] = None):
     conn, cur = execute(sql, params)
@@ -87,8 +105,30 @@ def exec_commit(sql: str, params: Optional[Iterable[Any]] = None) -> None:
     except Exception:
         pass
 
+def exec_many(sql: str, seq_params: Iterable[Iterable[Any]]) -> int:
+    """executemany in one transaction (bulk inserts); returns the number of parameter rows."""
+    t0 = time.perf_counter()
+    rows = [tuple(p) for p in seq_params]
+    if not rows:
+        return 0
+    conn = connect()
+    cur = conn.cursor() if backend() == "postgres" else conn
+    try:
+        cur.executemany(_adapt_sql(sql), rows)
+        conn.commit()
+    except Exception:
+        _abort(conn)
+        raise
+    try:
+        conn.close()
+    except Exception:
+        pass
+    _observe(sql, t0)
+    return len(rows)
+
 def insert_returning_id(sql_sqlite: str, params: Iterable[Any], *, sql_postgres: Optional[str] = None) -> int:
     """Insert and return integer id for both backends."""
+    t0 = time.perf_counter()
     if backend() == "postgres":
         q = sql_postgres or (sql_sqlite + " RETURNING id")
         conn = connect()
@@ -97,13 +137,19 @@ def insert_returning_id(sql_sqlite: str, params: Iterable[Any], *, sql_postgres:
         row = cur.fetchone()
         conn.commit()
         conn.close()
+        _observe(q, t0)
         return int(row[0])
     # sqlite
     conn = connect()
-    cur = conn.execute(sql_sqlite, tuple(params))
-    conn.commit()
+    try:
+        cur = conn.execute(sql_sqlite, tuple(params))
+        conn.commit()
+    except Exception:
+        _abort(conn)
+        raise
     rid = cur.lastrowid
     conn.close()
+    _observe(sql_sqlite, t0)
     return int(rid)
 
 def ensure_column(table: str, col: str, coldef_sqlite: str, coldef_postgres: Optional[str] = None) -> None:
@@ -118,3 +164,227 @@ def ensure_column(table: str, col: str, coldef_sqlite: str, coldef_postgres: Opt
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {coldef_sqlite}")
         conn.commit()
     conn.close()
+
+# ---- Async access (API service) ----
+# Same call shapes as the sync helpers above, for use inside async request
+# handlers. Uses aiosqlite / asyncpg when installed; otherwise the sync helper
+# runs in a worker thread so the event loop is never blocked. The aiosqlite
+# connection is shared by every request on the loop, so each call holds its
+# lock for the whole statement + commit: transactions never interleave.
+# asyncpg is optional like psycopg2 (see README); pool connections are per call.
+
+_AIOSQLITE_CONN = None  # (event loop, SQLite path, connection, lock)
+_PG_POOL = None
+
+def _pg_placeholders(sql: str) -> str:
+    # Convert SQLite qmark placeholders to asyncpg $1..$n placeholders
+    out: List[str] = []
+    n = 0
+    for ch in sql:
+        if ch == "?":
+            n += 1
+            out.append(f"${n}")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+async def arun(fn, *args, **kwargs):
+    """Run a blocking callable (e.g. a module's migrate()) off the event loop."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+_MIGRATED: set = set()
+
+def target() -> str:
+    """The database this process talks to (DATABASE_URL or the SQLite path)."""
+    return os.getenv("DATABASE_URL") or os.getenv("SQLITE_PATH", "/tmp/aire.db")
+
+def target_id() -> str:
+    """Short, credential-free identity of target() for keys and file names shared across databases."""
+    return hashlib.sha256(target().encode("utf-8")).hexdigest()[:12]
+
+def _migrate_key(migrate_fn) -> tuple:
+    return (migrate_fn.__module__, migrate_fn.__qualname__, target())
+
+def ensure(migrate_fn) -> None:
+    """Sync counterpart of aensure for hot write paths."""
+    key = _migrate_key(migrate_fn)
+    if key not in _MIGRATED:
+        migrate_fn()
+        _MIGRATED.add(key)
+
+async def aensure(migrate_fn) -> None:
+    """Run a module's migrate() once per process and database (API warmup runs them all up front)."""
+    key = _migrate_key(migrate_fn)
+    if key in _MIGRATED:
+        return
+    await arun(migrate_fn)
+    _MIGRATED.add(key)
+
+async def _aiosqlite():
+    global _AIOSQLITE_CONN
+    try:
+        import aiosqlite
+    except ImportError:
+        return None
+    loop = asyncio.get_running_loop()
+    path = os.getenv("SQLITE_PATH", "/tmp/aire.db")
+    if _AIOSQLITE_CONN is None or _AIOSQLITE_CONN[0] is not loop or _AIOSQLITE_CONN[1] != path:
+        if _AIOSQLITE_CONN is not None and _AIOSQLITE_CONN[0] is loop:
+            await _AIOSQLITE_CONN[2].close()
+        conn = await aiosqlite.connect(path)
+        await conn.execute("PRAGMA journal_mode=WAL;")
+        await conn.execute("PRAGMA synchronous=NORMAL;")
+        if _AIOSQLITE_CONN is not None and _AIOSQLITE_CONN[0] is loop and _AIOSQLITE_CONN[1] == path:
+            await conn.close()  # another request opened it while we were connecting
+        else:
+            _AIOSQLITE_CONN = (loop, path, conn, asyncio.Lock())
+    return _AIOSQLITE_CONN[2:]
+
+async def _asyncpg_pool():
+    global _PG_POOL
+    try:
+        import asyncpg
+    except ImportError:
+        return None
+    if _PG_POOL is None:
+        _PG_POOL = await asyncpg.create_pool(
+            os.getenv("DATABASE_URL"),
+            min_size=1,
+            max_size=int(os.getenv("DB_POOL_MAX", "10")),
+        )
+    return _PG_POOL
+
+async def aclose() -> None:
+    """Close async connections (call from the API shutdown hook)."""
+    global _AIOSQLITE_CONN, _PG_POOL
+    if _AIOSQLITE_CONN is not None:
+        try:
+            await _AIOSQLITE_CONN[2].close()
+        except Exception:
+            pass
+        _AIOSQLITE_CONN = None
+    if _PG_POOL is not None:
+        try:
+            await _PG_POOL.close()
+        except Exception:
+            pass
+        _PG_POOL = None
+
+async def _awrite(conn, statement):
+    """Await one write on the shared aiosqlite connection and commit it (rolled back on error); caller holds the lock."""
+    try:
+        cur = await statement
+        await conn.commit()
+    except BaseException:
+        await conn.rollback()
+        raise
+    return cur
+
+async def afetchone(sql: str, params: Optional[Iterable[Any]] = None):
+    params = tuple(params or ())
+    t0 = time.perf_counter()
+    if backend() == "postgres":
+        pool = await _asyncpg_pool()
+        if pool is None:
+            return await arun(fetchone, sql, params)
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(_pg_placeholders(sql), *params)
+        _observe(sql, t0)
+        return tuple(row) if row is not None else None
+    sq = await _aiosqlite()
+    if sq is None:
+        return await arun(fetchone, sql, params)
+    conn, lock = sq
+    async with lock:
+        async with conn.execute(sql, params) as cur:
+            row = await cur.fetchone()
+    _observe(sql, t0)
+    return row
+
+async def afetchall(sql: str, params: Optional[Iterable[Any]] = None):
+    params = tuple(params or ())
+    t0 = time.perf_counter()
+    if backend() == "postgres":
+        pool = await _asyncpg_pool()
+        if pool is None:
+            return await arun(fetchall, sql, params)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(_pg_placeholders(sql), *params)
+        _observe(sql, t0)
+        return [tuple(r) for r in rows]
+    sq = await _aiosqlite()
+    if sq is None:
+        return await arun(fetchall, sql, params)
+    conn, lock = sq
+    async with lock:
+        async with conn.execute(sql, params) as cur:
+            rows = list(await cur.fetchall())
+    _observe(sql, t0)
+    return rows
+
+async def aexec_commit(sql: str, params: Optional[Iterable[Any]] = None) -> None:
+    params = tuple(params or ())
+    t0 = time.perf_counter()
+    if backend() == "postgres":
+        pool = await _asyncpg_pool()
+        if pool is None:
+            await arun(exec_commit, sql, params)
+            return
+        async with pool.acquire() as conn:
+            await conn.execute(_pg_placeholders(sql), *params)
+        _observe(sql, t0)
+        return
+    sq = await _aiosqlite()
+    if sq is None:
+        await arun(exec_commit, sql, params)
+        return
+    conn, lock = sq
+    async with lock:
+        await _awrite(conn, conn.execute(sql, params))
+    _observe(sql, t0)
+
+async def aexec_many(sql: str, seq_params: Iterable[Iterable[Any]]) -> int:
+    """Async exec_many(): one executemany + commit; returns the number of parameter rows."""
+    rows = [tuple(p) for p in seq_params]
+    if not rows:
+        return 0
+    t0 = time.perf_counter()
+    if backend() == "postgres":
+        pool = await _asyncpg_pool()
+        if pool is None:
+            return await arun(exec_many, sql, rows)
+        async with pool.acquire() as conn:
+            await conn.executemany(_pg_placeholders(sql), rows)
+        _observe(sql, t0)
+        return len(rows)
+    sq = await _aiosqlite()
+    if sq is None:
+        return await arun(exec_many, sql, rows)
+    conn, lock = sq
+    async with lock:
+        await _awrite(conn, conn.executemany(sql, rows))
+    _observe(sql, t0)
+    return len(rows)
+
+async def ainsert_returning_id(sql_sqlite: str, params: Iterable[Any], *, sql_postgres: Optional[str] = None) -> int:
+    """Async insert_returning_id(); sql_postgres keeps its %s placeholders for the fallback path."""
+    params = tuple(params)
+    t0 = time.perf_counter()
+    if backend() == "postgres":
+        pool = await _asyncpg_pool()
+        if pool is None:
+            return await arun(insert_returning_id, sql_sqlite, params, sql_postgres=sql_postgres)
+        async with pool.acquire() as conn:
+            rid = await conn.fetchval(_pg_placeholders(sql_sqlite + " RETURNING id"), *params)
+        _observe(sql_sqlite, t0)
+        return int(rid)
+    sq = await _aiosqlite()
+    if sq is None:
+        return await arun(insert_returning_id, sql_sqlite, params)
+    conn, lock = sq
+    async with lock:
+        cur = await _awrite(conn, conn.execute(sql_sqlite, params))
+        rid = cur.lastrowid
+        await cur.close()
+    _observe(sql_sqlite, t0)
+    return int(rid)
@@ -7,3 +7,10 @@ def property_lookup(token: str, address: str) -> Optional[Dict[str, Any]]:
         return r.json() if r.status_code == 200 else None
     except Exception:
         return None
+
+async def property_lookup_async(client, token: str, address: str) -> Optional[Dict[str, Any]]:
+    try:
+        r = await client.get("https://api.estated.com/v4/property", params={"token": token, "address": address}, timeout=20)
+        return r.json() if r.status_code == 200 else None
+    except Exception:
+        return None
@@ -0,0 +1,98 @@
+"""Incremental re-grading for interactive what-if edits.
+
+The underwriting pipeline as a small dependency graph:
+
+    inputs -> financing -> noi -> cashflows -> irr -> metrics -> scores -> rationale
+
+Each node declares the DealInputs fields and upstream nodes it reads. On
+update() only the nodes downstream of the changed fields are dropped; the
+rest keep their memoized values, so moving the hold-period slider re-runs
+cashflows / IRR / scores but not financing or year-one NOI, and nothing
+re-fetches provider data or writes a report. Keep one EvalGraph per
+session (and per workspace, since the AI model is part of the scores node).
+Outputs match run_underwriting for the same inputs.
+"""
+import dataclasses
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from underwriting import (
+    DealInputs, DealOutputs, ai_blend, ai_rationale, assemble_outputs, blended_score, cashflow_model,
+    financing, merge_metrics, operating_metrics, returns, score_and_grade,
+)
+
+_FINANCING = ("price", "down_payment_pct", "interest_rate_pct", "term_years")
+_OPERATING = ("price", "monthly_rent", "monthly_expenses", "vacancy_rate", "last_sale_price")
+_FORWARD = ("price", "monthly_rent", "monthly_expenses", "vacancy_rate", "interest_rate_pct", "term_years",
+            "hold_years", "rent_growth", "expense_growth", "appreciation", "sale_cost_pct",
+            "use_exit_cap", "exit_cap_rate")
+# score_and_grade's confidence counts which core inputs are present
+_CORE = ("price", "monthly_rent", "monthly_expenses", "last_sale_price")
+
+# name -> (input fields, upstream nodes, fn(graph, inputs)); listed in topological order
+NODES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...], Callable[["EvalGraph", DealInputs], Any]]] = {
+    "financing": (_FINANCING, (), lambda g, i: financing(i)),
+    "noi": (_OPERATING, ("financing",), lambda g, i: operating_metrics(i, g.get("financing"))),
+    "cashflows": (_FORWARD, ("financing",), lambda g, i: cashflow_model(i, g.get("financing"))),
+    "irr": ((), ("cashflows",), lambda g, i: returns(g.get("cashflows")["cashflows"])),
+    "metrics": ((), ("noi", "cashflows", "irr"),
+                lambda g, i: merge_metrics(g.get("noi"), {**g.get("cashflows"), **g.get("irr")})),
+    "scores": (_CORE, ("metrics",), lambda g, i: g._scores(i)),
+    "rationale": (_CORE, ("scores",), lambda g, i: g._rationale(i)),
+}
+
+def _changed(old: Optional[DealInputs], new: DealInputs) -> List[str]:
+    if old is None:
+        return [f.name for f in dataclasses.fields(DealInputs)]
+    return [f.name for f in dataclasses.fields(DealInputs) if getattr(old, f.name) != getattr(new, f.name)]
+
+class EvalGraph:
+    def __init__(self, workspace_id: int = 0):
+        self.workspace_id = int(workspace_id)
+        self.inputs: Optional[DealInputs] = None
+        self._values: Dict[str, Any] = {}
+        self.computed: Counter = Counter()  # node -> times evaluated (for tests / telemetry)
+        self.last_recomputed: List[str] = []
+
+    def update(self, i: DealInputs) -> List[str]:
+        """Set new inputs; returns the nodes that were invalidated."""
+        changed = set(_changed(self.inputs, i))
+        dirty: List[str] = []
+        for name, (fields, deps, _) in NODES.items():
+            if changed.intersection(fields) or any(d in dirty for d in deps):
+                dirty.append(name)
+                self._values.pop(name, None)
+        self.inputs = dataclasses.replace(i)
+        self.last_recomputed = []
+        return dirty
+
+    def get(self, name: str) -> Any:
+        if name not in self._values:
+            if self.inputs is None:
+                raise ValueError("EvalGraph.update() must be called before get()")
+            fn = NODES[name][2]
+            self._values[name] = fn(self, self.inputs)
+            self.computed[name] += 1
+            self.last_recomputed.append(name)
+        return self._values[name]
+
+    def _scores(self, i: DealInputs) -> Dict[str, Any]:
+        m = self.get("metrics")
+        base_score, conf, flags, _ = score_and_grade(i, m, explain=False)
+        return {"base_score": base_score, "confidence": conf, "flags": flags,
+                "ai": ai_blend(i, m, self.workspace_id)}
+
+    def _rationale(self, i: DealInputs) -> List[str]:
+        s = self.get("scores")
+        _, _, _, reasons = score_and_grade(i, self.get("metrics"), explain=True)
+        return reasons + ai_rationale(blended_score(s["base_score"], s["ai"]), s["ai"])
+
+    def outputs(self, explain: bool = True) -> DealOutputs:
+        s = self.get("scores")
+        reasons = list(self.get("rationale")) if explain else []
+        return assemble_outputs(self.inputs, self.get("metrics"), s["base_score"], s["confidence"],
+                                list(s["flags"]), reasons, s["ai"])
+
+    def evaluate(self, i: DealInputs, explain: bool = True) -> DealOutputs:
+        self.update(i)
+        return self.outputs(explain=explain)
@@ -4,6 +4,8 @@ from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 
+LAYOUT_VERSION = 1  # bump on any change to what draw_report prints; keys pdf_cache entries
+
 def _safe(v):
     return "" if v is None else str(v)
 
@@ -11,6 +13,12 @@ def build_report_pdf(report: Dict[str, Any]) -> bytes:
     """Create a clean one-page PDF investment report."""
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=LETTER)
+    draw_report(c, report)
+    c.save()
+    return buf.getvalue()
+
+def draw_report(c: canvas.Canvas, report: Dict[str, Any]) -> None:
+    """Draw one report as the canvas's current page and finish the page (bulk_export stacks these)."""
     w, h = LETTER
 
     c.setFont("Helvetica-Bold", 18)
@@ -91,5 +99,3 @@ def build_report_pdf(report: Dict[str, Any]) -> bytes:
     c.setFont("Helvetica", 8)
     c.drawString(0.75*inch, 0.65*inch, "Not financial advice. Verify all figures; data may be incomplete or delayed.")
     c.showPage()
-    c.save()
-    return buf.getvalue()
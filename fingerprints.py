@@ -0,0 +1,52 @@
+"""Change detection for enriched property inputs.
+
+A fingerprint is a hash of everything that determines a grade: the provider
+fields returned by pull_property_data (price, rent, expenses, last sale),
+manual overrides, the normalized template and the workspace's model
+version. Equal fingerprints mean a regrade would reproduce the previous
+result, so callers reuse that result instead of grading and storing again:
+- watchlist items keep theirs on the item row (watch_key(): the same key from
+  the background scanner and the Alerts page, which share that column),
+- Batch Screener rows keep theirs per (workspace, address),
+- the API keeps them in memory.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from providers import normalize_address
+
+FIELDS = ("price", "monthly_rent", "monthly_expenses", "last_sale_price", "last_sale_date")
+
+def _canon(v: Any) -> Any:
+    if v is None or v == "":
+        return None
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float)):
+        return round(float(v), 2) or None  # 0 and missing both mean "not provided"
+    return str(v).strip()
+
+def enriched_inputs(pulled: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    pulled = pulled or {}
+    return {k: _canon(pulled.get(k)) for k in FIELDS}
+
+def fingerprint(pulled: Optional[Dict[str, Any]], *, template: Optional[Dict[str, Any]] = None,
+                model_version: str = "", manual: Optional[Dict[str, Any]] = None,
+                extra: Optional[Dict[str, Any]] = None) -> str:
+    basis = {
+        "inputs": enriched_inputs(pulled),
+        "manual": {k: _canon(v) for k, v in sorted((manual or {}).items())},
+        "template": template or {},
+        "model": model_version,
+        "extra": extra or {},
+    }
+    return hashlib.sha256(json.dumps(basis, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def watch_key(item: Dict[str, Any], pulled: Optional[Dict[str, Any]], template: Dict[str, Any], model_version: str) -> str:
+    """Fingerprint of one watchlist item's scan: provider data, template, model and the item's target."""
+    return fingerprint(pulled, template=template, model_version=model_version,
+                       extra={"target": [item.get("target_grade"), item.get("target_score")]})
+
+def address_key(address: str) -> str:
+    return normalize_address(address or "")
@@ -0,0 +1,153 @@
+"""Goal-seek: the highest price at which a deal still meets its targets.
+
+    max_offer(inputs, {"grade": "B", "dscr": 1.25})
+    -> {"max_price": 271_430.0, "status": "ok", "binding": ["grade"], ...}
+
+Targets: grade (letter or detail, e.g. "B" or "B+"), score, dscr, coc, irr,
+cap_rate; several are combined with AND. The search is bracketed: a coarse
+vectorized sweep over the price range finds the highest feasible price whose
+next step up fails, then that bracket is narrowed by repeated k-section
+until it is under `tol` dollars. Each round is one vector_engine.evaluate
+call over all candidate prices (and, in max_offer_batch, all deals at once),
+so price-independent work is shared and no DealInputs is rebuilt per step.
+
+Metrics are not monotone in price everywhere (the last-sale discount bonus and
+the appreciation-driven exit both move with price); the answer is the top of
+the highest feasible region on the coarse sweep.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import vector_engine
+from underwriting import DealInputs
+
+# Minimum final score for each letter / detail grade
+GRADE_MIN_SCORE = {
+    "A+": 97, "A": 90, "A-": 90, "B+": 87, "B": 80, "B-": 80, "C+": 77, "C": 70, "C-": 70,
+    "D+": 67, "D": 60, "D-": 60, "F+": 55, "F": 0,
+}
+# A plain letter means "this letter or better"; "A"/"B"/... as details need the middle band
+_DETAIL_MIN = {"A": 93, "B": 83, "C": 73, "D": 63, "F": 50}
+
+TARGET_METRICS = {"score": "score", "dscr": "DSCR", "coc": "CoC", "irr": "IRR", "cap_rate": "CapRate"}
+COARSE_STEPS = 64
+REFINE_STEPS = 16
+
+def _min_score(grade: str, detail: bool = False) -> float:
+    g = str(grade).strip().upper()
+    if detail and g in _DETAIL_MIN:
+        return float(_DETAIL_MIN[g])
+    if g not in GRADE_MIN_SCORE:
+        raise ValueError(f"unknown grade target: {grade}")
+    return float(GRADE_MIN_SCORE[g])
+
+def normalize_targets(targets: Dict[str, Any]) -> Dict[str, float]:
+    """{'grade': 'B', 'dscr': 1.25} -> {'score': 80.0, 'dscr': 1.25} (score = max of both)."""
+    out: Dict[str, float] = {}
+    for k, v in (targets or {}).items():
+        if v is None or v == "":
+            continue
+        k = k.lower()
+        if k in ("grade", "grade_detail"):
+            out["score"] = max(out.get("score", 0.0), _min_score(v, detail=(k == "grade_detail")))
+        elif k in TARGET_METRICS:
+            out[k] = max(out.get(k, float("-inf")), float(v))
+        else:
+            raise ValueError(f"unknown target: {k}")
+    if not out:
+        raise ValueError("at least one target is required")
+    return out
+
+def _feasible(res: Dict[str, np.ndarray], targets: Dict[str, float]) -> np.ndarray:
+    ok = np.ones(res["score"].shape, dtype=bool)
+    for k, thr in targets.items():
+        ok &= np.nan_to_num(res[TARGET_METRICS[k]], nan=-np.inf) >= thr
+    return ok
+
+def _failing(res: Dict[str, np.ndarray], targets: Dict[str, float], idx) -> List[str]:
+    return [k for k, thr in targets.items() if not np.nan_to_num(res[TARGET_METRICS[k]][idx], nan=-np.inf) >= thr]
+
+def _price_range(d: DealInputs, min_price: Optional[float], max_price: Optional[float]):
+    ref = d.price or (d.monthly_rent or 0.0) * 150.0
+    lo = float(min_price) if min_price else max(1_000.0, ref * 0.05)
+    hi = float(max_price) if max_price else max(lo * 2, ref * 3.0)
+    return lo, hi
+
+def max_offer_batch(deals: List[DealInputs], targets: Dict[str, Any], *, workspace_id: int = 0,
+                    min_price: Optional[float] = None, max_price: Optional[float] = None,
+                    tol: float = 1.0) -> List[Optional[Dict[str, Any]]]:
+    """max_offer for many deals in one vectorized search (None for deals without rent/expenses)."""
+    tg = normalize_targets(targets)
+    idx = [k for k, d in enumerate(deals) if d.monthly_rent is not None and d.monthly_expenses is not None]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(deals)
+    if not idx:
+        return results
+    ok_deals = [deals[k] for k in idx]
+    D = len(ok_deals)
+    weights = vector_engine.model_weights(workspace_id)
+    stacked = vector_engine.stack_inputs(ok_deals)
+    base = ok_deals[0]
+
+    def run(prices: np.ndarray) -> Dict[str, np.ndarray]:
+        ov = dict(stacked)
+        ov["price"] = prices
+        return vector_engine.evaluate(base, ov, weights=weights)
+
+    bounds = np.array([_price_range(d, min_price, max_price) for d in ok_deals])
+    frac = np.linspace(0.0, 1.0, COARSE_STEPS)[None, :]
+    prices = bounds[:, :1] + (bounds[:, 1:] - bounds[:, :1]) * frac
+    res = run(prices)
+    feas = _feasible(res, tg)
+    rows = np.arange(D)
+    any_ok = feas.any(axis=1)
+    top = np.where(any_ok, COARSE_STEPS - 1 - np.argmax(feas[:, ::-1], axis=1), 0)
+    capped = any_ok & (top == COARSE_STEPS - 1)
+    lo = prices[rows, top]
+    hi = prices[rows, np.minimum(top + 1, COARSE_STEPS - 1)]
+    rounds = 0
+
+    # k-section on [lo feasible, hi infeasible]
+    refine = any_ok & ~capped
+    frac = np.linspace(0.0, 1.0, REFINE_STEPS)[None, :]
+    while refine.any() and np.max((hi - lo)[refine]) > tol and rounds < 20:
+        rounds += 1
+        grid = lo[:, None] + (hi - lo)[:, None] * frac
+        f = _feasible(run(grid), tg)
+        f[:, 0] = True  # lo is feasible by construction
+        j = REFINE_STEPS - 1 - np.argmax(f[:, ::-1], axis=1)
+        j = np.minimum(j, REFINE_STEPS - 2)
+        lo = np.where(refine, grid[rows, j], lo)
+        hi = np.where(refine, grid[rows, j + 1], hi)
+
+    lo = np.floor(lo)
+    at_max = run(lo[:, None])
+    just_above = run(hi[:, None])
+    for n, k in enumerate(idx):
+        d = deals[k]
+        if not any_ok[n]:
+            results[k] = {"max_price": None, "status": "infeasible", "targets": tg,
+                          "binding": _failing(res, tg, (n, 0)),  # still failing at the lowest price
+                          "search_range": bounds[n].tolist()}
+            continue
+        max_p = float(lo[n])
+        results[k] = {
+            "max_price": max_p,
+            "status": "capped" if capped[n] else "ok",
+            "targets": tg,
+            "list_price": d.price,
+            "discount_pct": ((d.price - max_p) / d.price) if d.price else None,
+            "binding": [] if capped[n] else _failing(just_above, tg, (n, 0)),
+            "at_max": {m: (None if isinstance(at_max[m][n, 0], float) and np.isnan(at_max[m][n, 0]) else
+                           (str(at_max[m][n, 0]) if m == "grade_detail" else float(at_max[m][n, 0])))
+                       for m in ("score", "grade_detail", "DSCR", "CoC", "IRR", "CapRate")},
+            "search_range": bounds[n].tolist(),
+            "rounds": rounds,
+        }
+    return results
+
+def max_offer(i: DealInputs, targets: Dict[str, Any], *, workspace_id: int = 0,
+              min_price: Optional[float] = None, max_price: Optional[float] = None,
+              tol: float = 1.0) -> Optional[Dict[str, Any]]:
+    return max_offer_batch([i], targets, workspace_id=workspace_id, min_price=min_price,
+                           max_price=max_price, tol=tol)[0]
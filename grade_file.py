@@ -0,0 +1,289 @@
+"""Offline batch grader: CSV / Parquet / JSONL in, graded rows out.
+
+    python -m grade_file in.csv out.parquet --template BRRRR --workers 8
+    python -m grade_file listings.parquet graded.csv --save-reports --workspace-id 3
+
+Input rows need an `address` (or `raw`) column; `price`, `monthly_rent`
+(or `rent`), `monthly_expenses` (or `expenses`), `last_sale_price`,
+`last_sale_date`, `listing_url` (or `url`) and a per-row `template` are
+optional. A row's template is matched like --template (exact, case-insensitive,
+then substring); an unknown name makes that row an error. No provider calls are made, so missing rent / price give
+incomplete grades instead of network traffic.
+
+The input is read in chunks and each chunk is graded by run_underwriting
+on a process pool. At most 2 x workers chunks are in flight, and results are
+written in input order as soon as their chunk is done, so memory is bounded
+by the chunk size rather than the file size. With --save-reports each chunk
+is also inserted into `reports` in one transaction.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from templates import BUILTIN_TEMPLATES, apply_template, normalize_template
+from underwriting import DealInputs, run_underwriting
+
+DEFAULT_CHUNK = 2_000
+FORMATS = ("csv", "parquet", "jsonl")
+
+COLUMNS = [
+    "row", "address", "template", "price", "monthly_rent", "monthly_expenses",
+    "grade", "grade_detail", "score", "score_base", "score_ai", "confidence", "verdict",
+    "cap_rate", "coc", "dscr", "irr", "npv10", "cashflow_monthly", "equity_multiple", "flags", "error",
+]
+_METRICS = {"cap_rate": "CapRate", "coc": "CoC", "dscr": "DSCR", "irr": "IRR", "npv10": "NPV10",
+            "cashflow_monthly": "CashFlowMonthly", "equity_multiple": "EquityMultiple"}
+_ALIASES = {"address": ("address", "raw"), "monthly_rent": ("monthly_rent", "rent"),
+            "monthly_expenses": ("monthly_expenses", "expenses"), "listing_url": ("listing_url", "url")}
+
+def file_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    fmt = {"ndjson": "jsonl", "json": "jsonl", "pq": "parquet"}.get(ext, ext)
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported file type: {path} (use .csv, .parquet or .jsonl)")
+    return fmt
+
+def resolve_template(name: Optional[str], saved: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Exact name, then case-insensitive, then substring ('LTR', 'brrrr'); built-ins before saved."""
+    options = [(n, t) for n, t in BUILTIN_TEMPLATES.items()] + [(t["name"], t["template"]) for t in (saved or [])]
+    if not name:
+        name = "Long-Term Rental (LTR)"
+    for test in (lambda n: n == name, lambda n: n.lower() == name.lower(), lambda n: name.lower() in n.lower()):
+        for n, t in options:
+            if test(n):
+                return n, normalize_template(t)
+    raise ValueError(f"unknown template: {name}")
+
+# ---- readers: yield lists of row dicts ----
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    fmt = file_format(path)
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet input needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+    import pandas as pd
+    reader = (pd.read_csv(path, chunksize=chunk_size, dtype={"last_sale_date": str}) if fmt == "csv"
+              else pd.read_json(path, lines=True, chunksize=chunk_size, dtype={"last_sale_date": str}))
+    with reader:
+        for df in reader:
+            yield df.to_dict("records")
+
+# ---- writers: write(rows) per chunk, close() at the end ----
+class CsvWriter:
+    def __init__(self, path: str):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=COLUMNS)
+        self._w.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._w.writerows(rows)
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._f.writelines(json.dumps(r) + "\n" for r in rows)
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        self._pa = pa
+        num = {"row": pa.int64()}
+        text = {"address", "template", "grade", "grade_detail", "verdict", "flags", "error"}
+        self._schema = pa.schema([(c, num.get(c, pa.string() if c in text else pa.float64())) for c in COLUMNS])
+        self._w = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._w.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        self._w.close()
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+def open_writer(path: str):
+    return WRITERS[file_format(path)](path)
+
+# ---- grading (runs in worker processes) ----
+def _field(row: Dict[str, Any], key: str) -> Any:
+    for k in _ALIASES.get(key, (key,)):
+        v = row.get(k)
+        if v is None or (isinstance(v, float) and math.isnan(v)) or v == "":
+            continue
+        return v
+    return None
+
+def _float(v: Any) -> float:
+    try:
+        return float(v) if v is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+def grade_row(n: int, row: Dict[str, Any], name: str, template: Dict[str, Any],
+              workspace_id: int = 0, keep_payload: bool = False) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"row": n, "template": name}
+    addr = str(_field(row, "address") or "").strip()
+    out["address"] = addr
+    if not addr:
+        out["error"] = "missing address"
+        return out
+    merged = apply_template(template, _float(_field(row, "price")), _float(_field(row, "monthly_rent")),
+                            _float(_field(row, "monthly_expenses")))
+    last_sale = _float(_field(row, "last_sale_price"))
+    i = DealInputs(address=addr, listing_url=str(_field(row, "listing_url") or ""),
+                   last_sale_price=last_sale or None,
+                   last_sale_date=str(_field(row, "last_sale_date")) if _field(row, "last_sale_date") else None,
+                   **merged)
+    try:
+        o = run_underwriting(i, explain=False, include_cashflows=False, workspace_id=workspace_id)
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+        return out
+    out.update({
+        "price": i.price, "monthly_rent": i.monthly_rent, "monthly_expenses": i.monthly_expenses,
+        "grade": o.grade, "grade_detail": o.grade_detail, "score": o.score, "score_base": o.score_base,
+        "score_ai": o.score_ai, "confidence": o.confidence, "verdict": o.verdict,
+        "flags": "; ".join(o.flags),
+        **{k: o.metrics.get(m) for k, m in _METRICS.items()},
+    })
+    if keep_payload:
+        out["_report"] = {"address": addr, "url": i.listing_url, "grade": o.grade, "score": o.score,
+                          "confidence": o.confidence,
+                          "payload": {"inputs": i.__dict__, "outputs": {
+                              "score": o.score, "score_base": o.score_base, "score_ai": o.score_ai,
+                              "ai_weight": o.ai_weight, "grade": o.grade, "grade_detail": o.grade_detail,
+                              "verdict": o.verdict, "confidence": o.confidence, "metrics": o.metrics,
+                              "flags": o.flags}, "sources": ["grade_file"]}}
+    return out
+
+def grade_chunk(start: int, rows: List[Dict[str, Any]], default: Tuple[str, Dict[str, Any]],
+                saved: Optional[List[Dict[str, Any]]] = None, workspace_id: int = 0,
+                keep_payload: bool = False) -> List[Dict[str, Any]]:
+    """Grade one chunk; a `template` column picks a per-row template (blank: the default)."""
+    resolved: Dict[str, Any] = {}  # per-row names repeat: resolve each once per chunk
+    graded = []
+    for k, row in enumerate(rows):
+        name = str(_field(row, "template") or "").strip()
+        if not name:
+            graded.append(grade_row(start + k, row, *default, workspace_id, keep_payload))
+            continue
+        if name not in resolved:
+            try:
+                resolved[name] = resolve_template(name, saved)
+            except ValueError as e:
+                resolved[name] = str(e)
+        hit = resolved[name]
+        if isinstance(hit, str):
+            graded.append({"row": start + k, "address": str(_field(row, "address") or "").strip(), "template": name, "error": hit})
+            continue
+        graded.append(grade_row(start + k, row, *hit, workspace_id, keep_payload))
+    return graded
+
+def _executor(workers: int) -> Executor:
+    # workers=1: one background thread, no process spin-up (small files, debugging)
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else ThreadPoolExecutor(max_workers=1)
+
+def run(src: str, dst: str, *, template: Optional[str] = None, workers: int = 0, chunk_size: int = DEFAULT_CHUNK,
+        save_reports: bool = False, workspace_id: int = 0, user_id: int = 0, limit: Optional[int] = None,
+        progress=None) -> Dict[str, Any]:
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    saved = []
+    if workspace_id:
+        import storage
+        saved = storage.list_templates(workspace_id)
+    default = resolve_template(template, saved)
+    writer = open_writer(dst)
+    stats = {"rows": 0, "graded": 0, "errors": 0, "saved": 0, "chunks": 0}
+    t0 = time.perf_counter()
+
+    def drain(fut) -> None:
+        rows = fut.result()
+        reports = [r.pop("_report") for r in rows if "_report" in r]
+        writer.write(rows)
+        if reports:
+            import storage
+            stats["saved"] += storage.save_reports_bulk(reports, workspace_id=workspace_id, user_id=user_id)
+        stats["rows"] += len(rows)
+        stats["errors"] += sum(1 for r in rows if r.get("error"))
+        stats["graded"] = stats["rows"] - stats["errors"]
+        stats["chunks"] += 1
+        if progress:
+            progress(stats, time.perf_counter() - t0)
+
+    try:
+        with _executor(workers) as ex:
+            inflight: deque = deque()
+            start = 0
+            for rows in read_chunks(src, chunk_size):
+                if limit is not None:
+                    rows = rows[:max(0, limit - start)]
+                    if not rows:
+                        break
+                inflight.append(ex.submit(grade_chunk, start, rows, default, saved, workspace_id, save_reports))
+                start += len(rows)
+                while len(inflight) >= 2 * workers:
+                    drain(inflight.popleft())
+            while inflight:
+                drain(inflight.popleft())
+    finally:
+        writer.close()
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    stats["template"] = default[0]
+    return stats
+
+def _print_progress(stats: Dict[str, Any], elapsed: float) -> None:
+    rate = stats["rows"] / elapsed if elapsed > 0 else 0.0
+    print(f"\r{stats['rows']:,} rows ({rate:,.0f}/s), {stats['errors']:,} errors", end="", file=sys.stderr, flush=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m grade_file", description="Grade a CSV / Parquet / JSONL file of properties.")
+    p.add_argument("input")
+    p.add_argument("output", help="destination; .csv, .parquet or .jsonl")
+    p.add_argument("--template", default=None, help="template name or part of it (default: Long-Term Rental)")
+    p.add_argument("--workers", type=int, default=0, help="grading processes (default: CPUs - 1)")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    p.add_argument("--limit", type=int, default=None, help="grade only the first N rows")
+    p.add_argument("--save-reports", action="store_true", help="also insert every graded row into reports")
+    p.add_argument("--workspace-id", type=int, default=0, help="workspace model, saved templates and report owner")
+    p.add_argument("--user-id", type=int, default=0)
+    p.add_argument("--quiet", action="store_true")
+    args = p.parse_args(argv)
+    try:
+        file_format(args.input), file_format(args.output)
+        stats = run(args.input, args.output, template=args.template, workers=args.workers, chunk_size=args.chunk_size,
+                    save_reports=args.save_reports, workspace_id=args.workspace_id, user_id=args.user_id,
+                    limit=args.limit, progress=None if args.quiet else _print_progress)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps(stats))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
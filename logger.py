@@ -1,12 +1,174 @@
-import json
+"""Structured JSON logging (stdout; Streamlit Cloud and the API host capture it).
+
+log_event() only filters, samples and enqueues: a background thread formats
+the queued events and writes them in batches, so a large batch logging per row
+pays roughly a queue put per event. Configuration (env):
+
+    LOG_LEVEL=info                           # debug | info | warning | error
+    LOG_SAMPLE=grade_start=0.05,grade_saved=0.2   # per-event keep rate (info/debug only)
+    LOG_QUEUE_MAX=10000                      # beyond this, events are dropped and counted
+
+Ids bound with context(request_id=...) or context(job_id=...) are added to
+every event logged inside the block (across awaits and asyncio.to_thread),
+together with elapsed_ms since the block was entered. Sampled events carry
+their sample_rate so counts can be re-weighted. Field values are captured when
+log_event() is called (dicts and lists are shallow-copied), so a caller that
+keeps mutating them afterwards does not change what is written.
+"""
+import atexit
+import contextlib
+import contextvars
 import datetime
-from typing import Any, Dict
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+BATCH = 512
+
+def _parse_sample(spec: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "info").lower(), LEVELS["info"])
+SAMPLE = _parse_sample(os.getenv("LOG_SAMPLE", ""))
+QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+# (ids, perf_counter at entry) of the innermost context() block
+_CONTEXT: contextvars.ContextVar[Tuple[Dict[str, Any], float]] = contextvars.ContextVar("log_context", default=({}, 0.0))
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+@contextlib.contextmanager
+def context(**ids: Any) -> Iterator[Dict[str, Any]]:
+    """Bind ids (request_id, job_id, ...) to the events logged inside; nested blocks add to the outer ids."""
+    outer, _ = _CONTEXT.get()
+    merged = {**outer, **ids}
+    token = _CONTEXT.set((merged, time.perf_counter()))
+    try:
+        yield merged
+    finally:
+        _CONTEXT.reset(token)
 
-def log_event(event: str, **kwargs: Any) -> None:
-    """Lightweight structured logging (stdout). Streamlit Cloud captures logs."""
+def configure(level: Optional[str] = None, sample: Optional[Dict[str, float]] = None) -> None:
+    global LEVEL, SAMPLE
+    if level is not None:
+        LEVEL = LEVELS[level.lower()]
+    if sample is not None:
+        SAMPLE = dict(sample)
+
+class _Writer:
+    """Owns the queue and the thread that drains it; restarted lazily after a fork."""
+    def __init__(self, maxsize: int):
+        self.q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def put(self, item: Tuple[Any, ...]) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.q.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.q = queue.Queue(maxsize=self.q.maxsize)  # a forked child must not share the parent's queue lock
+            threading.Thread(target=self._run, name="log-writer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self.q.get()]
+            while len(batch) < BATCH:
+                try:
+                    batch.append(self.q.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [_format(item) for item in batch if not isinstance(item, threading.Event)]
+            if self.dropped:
+                n, self.dropped = self.dropped, 0
+                lines.append(_format((time.time(), "warning", "log_dropped", {}, None, {"count": n}, None)))
+            if lines:
+                try:
+                    sys.stdout.write("".join(lines))
+                    sys.stdout.flush()
+                except Exception:
+                    pass  # a closed or broken stdout must not kill the writer
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written."""
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        try:
+            self.q.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+_WRITER = _Writer(QUEUE_MAX)
+atexit.register(_WRITER.flush, 2.0)
+
+def _format(item: Tuple[Any, ...]) -> str:
+    ts, level, event, ids, elapsed_ms, fields, rate = item
     payload: Dict[str, Any] = {
-        "ts": datetime.datetime.utcnow().isoformat() + "Z",
+        "ts": datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "level": level,
         "event": event,
-        **kwargs
+        **ids,
     }
-    print(json.dumps(payload, default=str))
+    if elapsed_ms is not None:
+        payload["elapsed_ms"] = elapsed_ms
+    if rate is not None:
+        payload["sample_rate"] = rate
+    payload.update(fields)
+    try:
+        return json.dumps(payload, default=str) + "\n"
+    except Exception as e:  # e.g. circular structures: keep the event, not the fields
+        return json.dumps({"ts": payload["ts"], "level": level, "event": event, **ids, "log_error": repr(e)}, default=str) + "\n"
+
+def _snapshot(v: Any) -> Any:
+    # the writer formats later, on another thread: don't let the caller's later edits leak in
+    if isinstance(v, dict):
+        return dict(v)
+    if isinstance(v, list):
+        return list(v)
+    return v
+
+def log_event(event: str, level: str = "info", **kwargs: Any) -> None:
+    """Queue one structured event; formatting and the write happen on the log-writer thread."""
+    lv = LEVELS.get(level, LEVELS["info"])
+    if lv < LEVEL:
+        return
+    rate = SAMPLE.get(event) if lv < LEVELS["warning"] else None
+    if rate is not None:
+        if rate < 1.0 and random.random() >= rate:
+            return
+        if rate >= 1.0:
+            rate = None
+    ids, t0 = _CONTEXT.get()
+    elapsed_ms = round((time.perf_counter() - t0) * 1000, 3) if t0 else None
+    fields = {k: _snapshot(v) for k, v in kwargs.items()}
+    _WRITER.put((time.time(), level, event, dict(ids), elapsed_ms, fields, rate))
+
+def flush(timeout: float = 5.0) -> bool:
+    return _WRITER.flush(timeout)
@@ -1,8 +1,12 @@
 import json
+import os
 import time
 from typing import Dict, Any, Optional, List
 
-from db import backend, connect, fetchone, fetchall, exec_commit, insert_returning_id
+import telemetry
+from cache import TTLCache
+
+from db import backend, connect, fetchone, fetchall, exec_commit, insert_returning_id, arun
 
 def now() -> int:
     return int(time.time())
@@ -74,6 +78,47 @@ def get_active_model(workspace_id: int) -> Optional[Dict[str, Any]]:
         return None
     return get_model(int(row[0]))
 
+# Grading looks up the active model on every call; keep it briefly in-process.
+# activate_model() invalidates locally; other processes pick changes up within the TTL.
+_ACTIVE_CACHE = TTLCache(ttl_sec=float(os.getenv("MODEL_CACHE_TTL_SEC", "60")), maxsize=10000)
+telemetry.register_cache("active_model", _ACTIVE_CACHE)
+
+def get_active_model_cached(workspace_id: int) -> Optional[Dict[str, Any]]:
+    hit = _ACTIVE_CACHE.get(int(workspace_id))
+    if hit is None:
+        hit = get_active_model(int(workspace_id)) or {}
+        _ACTIVE_CACHE.set(int(workspace_id), hit)
+    return hit or None
+
+def model_version(model: Optional[Dict[str, Any]]) -> str:
+    """Identifier of a model as used in cache keys and fingerprints ("baseline" or "model:<id>")."""
+    return f"model:{int(model['id'])}" if model else "baseline"
+
+def get_model_version(workspace_id: int) -> str:
+    return model_version(get_active_model_cached(workspace_id))
+
+async def aget_active_model(workspace_id: int) -> Optional[Dict[str, Any]]:
+    """Async counterpart of get_active_model_cached (same cache, so keys and scoring agree).
+
+    Callers that key results by model_version() should pass this model to
+    run_underwriting rather than letting scoring look it up again.
+    """
+    hit = _ACTIVE_CACHE.get(int(workspace_id))
+    if hit is None:
+        return await arun(get_active_model_cached, int(workspace_id))
+    return hit or None
+
+async def aget_model_version(workspace_id: int) -> str:
+    return model_version(await aget_active_model(workspace_id))
+
+def warm_model_cache() -> int:
+    """Preload every workspace's active model (API warmup). Returns how many were loaded."""
+    migrate()
+    rows = fetchall("SELECT DISTINCT workspace_id FROM models WHERE status='active'")
+    for r in rows:
+        _ACTIVE_CACHE.set(int(r[0]), get_active_model(int(r[0])) or {})
+    return len(rows)
+
 def create_candidate_model(workspace_id: int, name: str, weights: Dict[str, float], metrics: Optional[Dict[str, Any]] = None, notes: str = "") -> int:
     migrate()
     return insert_returning_id(
@@ -86,3 +131,4 @@ def activate_model(workspace_id: int, model_id: int) -> None:
     migrate()
     exec_commit("UPDATE models SET status='archived' WHERE workspace_id=? AND status='active'", (int(workspace_id),))
     exec_commit("UPDATE models SET status='active' WHERE id=? AND workspace_id=?", (int(model_id), int(workspace_id)))
+    _ACTIVE_CACHE.pop(int(workspace_id))
@@ -0,0 +1,213 @@
+"""Monte Carlo risk simulation for project_cashflows.
+
+The deterministic model follows one path for rent growth, expense growth,
+appreciation and vacancy. Here each of those drivers is drawn per path and
+per year from a configurable distribution, and every path is valued with the
+same cashflow recursion as underwriting.project_cashflows over an
+(N paths x hold_years) matrix. A path whose draws equal the deal's own
+assumptions reproduces the deterministic IRR exactly.
+
+Vacancy enters as a shortfall against the assumed rate: in year t the NOI is
+adjusted by gross_rent_t * (vacancy_rate - vacancy_t).
+
+simulate_batch stacks several deals into one matrix and uses common random
+numbers (the same seeded draws for every deal), so their risk figures are
+directly comparable.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import vector_engine
+from amortization import balance_after
+from underwriting import DealInputs, financing
+
+DEFAULT_PATHS = 10_000
+MAX_PATHS = 200_000
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+@dataclass
+class Driver:
+    """dist: normal (mean, sd) | uniform (lo, hi) | triangular (lo, mean=mode, hi) | fixed.
+    mean=None uses the deal's own assumption."""
+    dist: str = "normal"
+    mean: Optional[float] = None
+    sd: float = 0.0
+    lo: Optional[float] = None
+    hi: Optional[float] = None
+
+@dataclass
+class SimConfig:
+    n_paths: int = DEFAULT_PATHS
+    seed: int = 7
+    hurdle: float = 0.10
+    discount: float = 0.10
+    rent_growth: Driver = field(default_factory=lambda: Driver("normal", sd=0.02))
+    expense_growth: Driver = field(default_factory=lambda: Driver("normal", sd=0.015))
+    appreciation: Driver = field(default_factory=lambda: Driver("normal", sd=0.04))
+    vacancy_rate: Driver = field(default_factory=lambda: Driver("normal", sd=0.03))
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict[str, Any]]) -> "SimConfig":
+        d = dict(d or {})
+        kw: Dict[str, Any] = {}
+        for k in ("n_paths", "seed"):
+            if k in d:
+                kw[k] = int(d[k])
+        for k in ("hurdle", "discount"):
+            if k in d:
+                kw[k] = float(d[k])
+        for k in DRIVERS:
+            if isinstance(d.get(k), dict):
+                kw[k] = Driver(**d[k])
+        return cls(**kw)
+
+DRIVERS = ("rent_growth", "expense_growth", "appreciation", "vacancy_rate")
+_BOUNDS = {"vacancy_rate": (0.0, 0.50), "appreciation": (-0.95, None), "rent_growth": (-0.95, None)}
+
+def _draw(rng: np.random.Generator, drv: Driver, shape) -> np.ndarray:
+    """Standardized draws for one driver; _scale() maps them onto each deal's parameters."""
+    if drv.dist == "normal":
+        return rng.standard_normal(shape)
+    if drv.dist in ("uniform", "triangular"):
+        return rng.random(shape)
+    if drv.dist == "fixed":
+        return np.zeros(shape)
+    raise ValueError(f"unknown distribution: {drv.dist}")
+
+def _scale(drv: Driver, z: np.ndarray, mean: np.ndarray, name: str) -> np.ndarray:
+    """z: (N, H) standardized draws; mean: (D, 1, 1) per-deal assumption -> (D, N, H)."""
+    m = mean if drv.mean is None else np.full_like(mean, float(drv.mean))
+    if drv.dist == "normal":
+        x = m + float(drv.sd) * z
+    elif drv.dist == "uniform":
+        lo = m - float(drv.sd) if drv.lo is None else float(drv.lo)
+        hi = m + float(drv.sd) if drv.hi is None else float(drv.hi)
+        x = lo + (hi - lo) * z
+    elif drv.dist == "triangular":
+        lo = m - float(drv.sd) if drv.lo is None else np.full_like(m, float(drv.lo))
+        hi = m + float(drv.sd) if drv.hi is None else np.full_like(m, float(drv.hi))
+        span = np.where(hi > lo, hi - lo, 1.0)
+        c = np.clip((m - lo) / span, 0.0, 1.0)
+        x = np.where(z < c, lo + np.sqrt(z * span * (m - lo)), hi - np.sqrt((1 - z) * span * (hi - m)))
+    else:
+        x = np.broadcast_to(m, m.shape[:1] + z.shape)
+    lo_b, hi_b = _BOUNDS.get(name, (None, None))
+    if lo_b is not None or hi_b is not None:
+        x = np.clip(x, lo_b, hi_b)
+    return np.broadcast_to(x, mean.shape[:1] + z.shape)
+
+def _base(i: DealInputs) -> Dict[str, float]:
+    """Deterministic pieces of project_cashflows (year-0 NOI, debt service, equity, exit loan balance)."""
+    vac = max(0.0, min(0.50, float(i.vacancy_rate or 0.0)))
+    rent0 = float(i.monthly_rent or 0.0) * 12.0
+    exp0 = float(i.monthly_expenses or 0.0) * 12.0
+    fin = financing(i)
+    loan, debt_m = fin["loan"], fin["payment"]
+    hold = max(1, int(i.hold_years))
+    balance = balance_after(loan, i.interest_rate_pct / 100.0, int(i.term_years), hold * 12, debt_m) if loan > 0 else 0.0
+    return {
+        "price": float(i.price), "rent0": rent0, "vac": vac,
+        "noi0": (rent0 * (1 - vac)) - exp0, "debt0": (debt_m or 0.0) * 12.0,
+        "equity0": fin["equity"], "balance_exit": balance, "hold": hold,
+        "rent_growth": float(i.rent_growth), "expense_growth": float(i.expense_growth),
+        "appreciation": float(i.appreciation), "vacancy_rate": vac,
+        "sale_cost_pct": float(i.sale_cost_pct),
+        "exit_cap": float(i.exit_cap_rate) if (i.use_exit_cap and i.exit_cap_rate and i.exit_cap_rate > 0) else 0.0,
+    }
+
+def _pct_summary(x: np.ndarray) -> Dict[str, Optional[float]]:
+    x = x[np.isfinite(x)]
+    if x.size == 0:
+        return {"mean": None, **{f"p{p}": None for p in PERCENTILES}}
+    qs = np.percentile(x, PERCENTILES)
+    return {"mean": float(x.mean()), **{f"p{p}": float(q) for p, q in zip(PERCENTILES, qs)}}
+
+# Bisection steps per path (bracket width 4 / 2**50 < 1e-14)
+IRR_ITERATIONS = 50
+# Deals are simulated in chunks so D * n_paths rows stay within this budget
+CHUNK_ROWS = 200_000
+
+def _simulate_chunk(bases: List[Dict[str, float]], draws: Dict[str, np.ndarray], cfg: SimConfig) -> List[Dict[str, Any]]:
+    D, n = len(bases), next(iter(draws.values())).shape[0]
+    H = max(b["hold"] for b in bases)
+    col = lambda k: np.array([b[k] for b in bases], dtype=float).reshape(D, 1, 1)
+    drivers = {k: _scale(getattr(cfg, k), draws[k][:, :H], col(k), k) for k in DRIVERS}
+
+    hold = col("hold").reshape(D, 1).astype(int)
+    active = (np.arange(1, H + 1).reshape(1, H) <= hold)[:, None, :]  # (D, 1, H)
+
+    # ---- NOI paths: same recursion as project_cashflows, per path ----
+    noi = np.repeat(col("noi0")[..., 0], n, axis=1)
+    rent = np.repeat(col("rent0")[..., 0], n, axis=1)
+    cf = np.zeros((D, n, H + 1))
+    cf[:, :, 0] = -col("equity0")[..., 0]
+    debt0, vac0 = col("debt0")[..., 0], col("vac")[..., 0]
+    rg, eg, vac = drivers["rent_growth"], drivers["expense_growth"], drivers["vacancy_rate"]
+    noi_final = noi
+    for t in range(H):
+        act = active[:, :, t]
+        if t > 0:
+            grown = noi * (1 + rg[:, :, t])
+            grown = grown - np.abs(grown) * eg[:, :, t] * 0.35
+            noi = np.where(act, grown, noi)
+            rent = np.where(act, rent * (1 + rg[:, :, t]), rent)
+        year_noi = noi + rent * (vac0 - vac[:, :, t])
+        cf[:, :, t + 1] = np.where(act, year_noi - debt0, 0.0)
+        noi_final = np.where(act, year_noi, noi_final)
+
+    growth = np.where(active, 1 + drivers["appreciation"], 1.0).prod(axis=2)
+    exit_cap = col("exit_cap")[..., 0]
+    exit_value = np.where(exit_cap > 0, noi_final / np.where(exit_cap > 0, exit_cap, 1.0), col("price")[..., 0] * growth)
+    net_sale = exit_value * (1 - col("sale_cost_pct")[..., 0]) - col("balance_exit")[..., 0]
+    cf[np.arange(D)[:, None], np.arange(n)[None, :], hold] += net_sale
+
+    flat = cf.reshape(D * n, H + 1)
+    irr = vector_engine.irr(flat, np.repeat(hold.ravel() + 1, n), max_iter=IRR_ITERATIONS, exact=False).reshape(D, n)
+    npv = vector_engine._npv(np.full(D * n, cfg.discount), flat).reshape(D, n)
+    total = flat.sum(axis=1).reshape(D, n)
+
+    out: List[Dict[str, Any]] = []
+    for k in range(D):
+        ir, nv = irr[k], npv[k]
+        # no IRR (no sign change): below the hurdle only if the undiscounted total is a loss
+        below = np.where(np.isnan(ir), total[k] < 0, ir < cfg.hurdle)
+        counts, edges = np.histogram(np.clip(ir[np.isfinite(ir)], -0.5, 0.5), bins=20, range=(-0.5, 0.5))
+        irr_s = _pct_summary(ir)
+        out.append({
+            "n_paths": n, "seed": cfg.seed, "hurdle": cfg.hurdle, "discount": cfg.discount,
+            "irr": irr_s, "npv": _pct_summary(nv),
+            "p_irr_below_hurdle": float(below.mean()),
+            "p_npv_negative": float((nv < 0).mean()),
+            "p_loss": float((total[k] < 0).mean()),
+            # VaR-style: 5th-percentile outcomes (NPV loss stated as a positive number)
+            "irr_var95": irr_s["p5"],
+            "npv_var95": max(0.0, -float(np.percentile(nv, 5))),
+            "irr_hist": {"edges": edges.tolist(), "counts": counts.tolist()},
+            "drivers": {d: asdict(getattr(cfg, d)) for d in DRIVERS},
+        })
+    return out
+
+def simulate_batch(deals: List[DealInputs], config: Optional[SimConfig] = None) -> List[Optional[Dict[str, Any]]]:
+    """Risk summary per deal (None for deals without price/rent/expenses)."""
+    cfg = config or SimConfig()
+    n = max(1, min(MAX_PATHS, int(cfg.n_paths)))
+    idx = [k for k, d in enumerate(deals) if d.price and d.monthly_rent is not None and d.monthly_expenses is not None]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(deals)
+    if not idx:
+        return results
+    bases = [_base(deals[k]) for k in idx]
+    H = max(b["hold"] for b in bases)
+    # One stream per driver, drawn year by year: a deal's draws do not depend on
+    # which other deals (or hold periods) are in the batch.
+    draws = {k: _draw(np.random.default_rng([cfg.seed, j]), getattr(cfg, k), (H, n)).T
+             for j, k in enumerate(DRIVERS)}
+    step = max(1, CHUNK_ROWS // n)
+    for s in range(0, len(idx), step):
+        for k, res in zip(idx[s:s + step], _simulate_chunk(bases[s:s + step], draws, cfg)):
+            results[k] = res
+    return results
+
+def simulate(i: DealInputs, config: Optional[SimConfig] = None) -> Optional[Dict[str, Any]]:
+    return simulate_batch([i], config)[0]
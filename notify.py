@@ -0,0 +1,353 @@
+"""Alert notification outbox and digest dispatcher.
+
+    python -m notify                 # drain the outbox every NOTIFY_INTERVAL_SEC (default 30s)
+    python -m notify --once          # one pass, then exit
+
+Scans never send anything themselves: route_hits() looks up each workspace's
+own recipient (set_workspace_route; workspaces without one get nothing, there
+is no global fallback) and enqueue_hits() writes one outbox row per hit. A
+Dispatcher (background thread in the app / watch_daemon, or this CLI) claims
+due rows, coalesces them per (workspace, channel, recipient) into one digest,
+so a digest never mixes tenants, and hands it to a transport. Failed digests are retried with
+exponential backoff; rows that fail NOTIFY_MAX_ATTEMPTS times are marked dead.
+
+Transports: sendgrid, smtp, webhook (recipient is the URL), file (JSONL sink,
+for tests / local runs) and log. transports_from_env() builds the configured
+ones; channels() lists those a workspace can pick.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from db import backend, connect, exec_commit, exec_many, fetchall
+from logger import log_event
+
+INTERVAL_SEC = float(os.getenv("NOTIFY_INTERVAL_SEC", "30"))
+BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "500"))
+MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "6"))
+BACKOFF_SEC = float(os.getenv("NOTIFY_BACKOFF_SEC", "30"))
+BACKOFF_MAX_SEC = float(os.getenv("NOTIFY_BACKOFF_MAX_SEC", "3600"))
+LEASE_SEC = 120  # a claimed row whose dispatcher died becomes due again after this
+DIGEST_MAX_LINES = 100
+TIMEOUT_SEC = float(os.getenv("API_TIMEOUT_SEC", "15"))
+
+def now() -> int:
+    return int(time.time())
+
+def migrate() -> None:
+    conn = connect()
+    b = backend()
+    cur = conn.cursor() if b == "postgres" else conn
+    cur.execute("""CREATE TABLE IF NOT EXISTS notifications(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at INTEGER NOT NULL,
+        workspace_id INTEGER,
+        channel TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload_json TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL,
+        claim TEXT,
+        last_error TEXT,
+        sent_at INTEGER
+    )""" if b == "sqlite" else """CREATE TABLE IF NOT EXISTS notifications(
+        id BIGSERIAL PRIMARY KEY,
+        created_at BIGINT NOT NULL,
+        workspace_id BIGINT,
+        channel TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload_json TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at BIGINT NOT NULL,
+        claim TEXT,
+        last_error TEXT,
+        sent_at BIGINT
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications(status, next_attempt_at)")
+    cur.execute("""CREATE TABLE IF NOT EXISTS notify_routes(
+        workspace_id INTEGER PRIMARY KEY,
+        channel TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        updated_at INTEGER NOT NULL
+    )""" if b == "sqlite" else """CREATE TABLE IF NOT EXISTS notify_routes(
+        workspace_id BIGINT PRIMARY KEY,
+        channel TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        updated_at BIGINT NOT NULL
+    )""")
+    conn.commit()
+    try: conn.close()
+    except Exception: pass
+
+# ---- Transports: send(recipient, subject, body, items) raises on failure ----
+class SendGridTransport:
+    def __init__(self, api_key: str, sender: str = ""):
+        self.api_key, self.sender = api_key, sender
+
+    def send(self, recipient: str, subject: str, body: str, items: List[Dict[str, Any]]) -> None:
+        import requests
+        resp = requests.post(
+            "https://api.sendgrid.com/v3/mail/send",
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            json={"personalizations": [{"to": [{"email": recipient}]}], "from": {"email": self.sender or recipient},
+                  "subject": subject, "content": [{"type": "text/plain", "value": body}]},
+            timeout=TIMEOUT_SEC,
+        )
+        if not 200 <= resp.status_code < 300:
+            raise RuntimeError(f"sendgrid status {resp.status_code}")
+
+class SmtpTransport:
+    def __init__(self, host: str, port: int = 587, username: str = "", password: str = "", sender: str = "", starttls: bool = True):
+        self.host, self.port, self.username, self.password = host, int(port), username, password
+        self.sender, self.starttls = sender, starttls
+
+    def send(self, recipient: str, subject: str, body: str, items: List[Dict[str, Any]]) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.sender or self.username or recipient
+        msg["To"] = recipient
+        msg["Subject"] = subject
+        msg.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=TIMEOUT_SEC) as s:
+            if self.starttls:
+                s.starttls()
+            if self.username:
+                s.login(self.username, self.password)
+            s.send_message(msg)
+
+class WebhookTransport:
+    """POSTs the digest as JSON to the recipient URL; signed with HMAC-SHA256 when a secret is set."""
+    def __init__(self, secret: str = ""):
+        self.secret = secret
+
+    def send(self, recipient: str, subject: str, body: str, items: List[Dict[str, Any]]) -> None:
+        import requests
+        data = json.dumps({"subject": subject, "text": body, "items": items}, default=str).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["X-AIRE-Signature"] = hmac.new(self.secret.encode("utf-8"), data, hashlib.sha256).hexdigest()
+        resp = requests.post(recipient, data=data, headers=headers, timeout=TIMEOUT_SEC)
+        if not 200 <= resp.status_code < 300:
+            raise RuntimeError(f"webhook status {resp.status_code}")
+
+class FileTransport:
+    """Appends one JSON line per digest (tests / local development)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, recipient: str, subject: str, body: str, items: List[Dict[str, Any]]) -> None:
+        line = json.dumps({"at": now(), "to": recipient, "subject": subject, "body": body, "items": items}, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+class LogTransport:
+    def send(self, recipient: str, subject: str, body: str, items: List[Dict[str, Any]]) -> None:
+        log_event("notify_digest_logged", recipient=recipient, subject=subject, items=len(items))
+
+def transports_from_env(env: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    env = os.environ if env is None else env
+    out: Dict[str, Any] = {"webhook": WebhookTransport(env.get("NOTIFY_WEBHOOK_SECRET", "")), "log": LogTransport()}
+    if env.get("SENDGRID_API_KEY"):
+        out["sendgrid"] = SendGridTransport(env["SENDGRID_API_KEY"], env.get("NOTIFY_FROM", ""))
+    if env.get("SMTP_HOST"):
+        out["smtp"] = SmtpTransport(env["SMTP_HOST"], int(env.get("SMTP_PORT") or 587), env.get("SMTP_USER", ""),
+                                    env.get("SMTP_PASSWORD", ""), env.get("NOTIFY_FROM", ""),
+                                    str(env.get("SMTP_STARTTLS", "1")).lower() not in ("0", "false", "no"))
+    if env.get("NOTIFY_FILE_PATH"):
+        out["file"] = FileTransport(env["NOTIFY_FILE_PATH"])
+    return out
+
+def channels(env: Optional[Mapping[str, str]] = None) -> List[str]:
+    """Channels a workspace can route to (log is internal only)."""
+    return sorted(c for c in transports_from_env(env) if c != "log")
+
+# ---- Per-workspace routes ----
+def set_workspace_route(workspace_id: int, channel: str, recipient: str) -> None:
+    recipient = (recipient or "").strip()
+    if not recipient:
+        raise ValueError("recipient is required")
+    if channel == "webhook" and not recipient.startswith("https://"):
+        raise ValueError("webhook recipient must be an https:// URL")
+    if channel in ("sendgrid", "smtp") and "@" not in recipient:
+        raise ValueError("email recipient must be an email address")
+    migrate()
+    exec_commit(
+        "INSERT INTO notify_routes(workspace_id, channel, recipient, updated_at) VALUES(?,?,?,?) "
+        "ON CONFLICT(workspace_id) DO UPDATE SET channel=excluded.channel, recipient=excluded.recipient, updated_at=excluded.updated_at",
+        (int(workspace_id), channel, recipient, now()),
+    )
+
+def clear_workspace_route(workspace_id: int) -> None:
+    migrate()
+    exec_commit("DELETE FROM notify_routes WHERE workspace_id=?", (int(workspace_id),))
+
+def workspace_routes(workspace_ids: List[int]) -> Dict[int, Tuple[str, str]]:
+    """{workspace_id: (channel, recipient)} for the workspaces that configured one."""
+    ids = sorted({int(x) for x in workspace_ids})
+    if not ids:
+        return {}
+    migrate()
+    rows = fetchall(f"SELECT workspace_id, channel, recipient FROM notify_routes WHERE workspace_id IN ({','.join('?' * len(ids))})",
+                    tuple(ids))
+    return {int(r[0]): (r[1], r[2]) for r in rows if r[2]}
+
+def get_workspace_route(workspace_id: int) -> Optional[Tuple[str, str]]:
+    return workspace_routes([workspace_id]).get(int(workspace_id))
+
+def route_hits(hits: List[Dict[str, Any]], kind: str = "watch_hit") -> Dict[str, int]:
+    """Queue each hit to its own workspace's route; hits of workspaces without a route are dropped."""
+    by_ws: Dict[int, List[Dict[str, Any]]] = {}
+    for h in hits:
+        by_ws.setdefault(int(h.get("workspace_id") or 0), []).append(h)
+    routes = workspace_routes(list(by_ws))
+    stats = {"queued": 0, "unrouted": 0}
+    for ws, group in by_ws.items():
+        if ws in routes:
+            stats["queued"] += enqueue_hits(group, *routes[ws], workspace_id=ws, kind=kind)
+        else:
+            stats["unrouted"] += len(group)
+    return stats
+
+# ---- Outbox ----
+def enqueue_hits(hits: List[Dict[str, Any]], channel: str, recipient: str, workspace_id: int, kind: str = "watch_hit") -> int:
+    """One outbox row per hit, all for one workspace; returns immediately (delivery is the dispatcher's job)."""
+    migrate()
+    t = now()
+    ws = int(workspace_id)
+    return exec_many(
+        "INSERT INTO notifications(created_at, workspace_id, channel, recipient, kind, payload_json, status, attempts, next_attempt_at) "
+        "VALUES(?,?,?,?,?,?,'pending',0,?)",
+        [(t, ws, channel, recipient, kind, json.dumps({**h, "workspace_id": ws}, default=str), t) for h in hits],
+    )
+
+def outbox_stats(workspace_id: int = 0) -> Dict[str, int]:
+    migrate()
+    rows = fetchall("SELECT status, COUNT(1) FROM notifications WHERE (?=0 OR workspace_id=?) GROUP BY status",
+                    (int(workspace_id), int(workspace_id)))
+    return {r[0]: int(r[1]) for r in rows}
+
+def render_digest(items: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """Subject and body for one workspace's hits (the dispatcher never mixes workspaces in a digest)."""
+    lines: List[str] = []
+    for h in items:
+        score = h.get("score")
+        score_s = f"{float(score):.1f}" if isinstance(score, (int, float)) else "—"
+        lines.append(f"  {h.get('address')} — {h.get('grade_detail') or h.get('grade')} ({score_s}) — {h.get('verdict') or ''}")
+    if len(lines) > DIGEST_MAX_LINES:
+        lines = lines[:DIGEST_MAX_LINES] + [f"  … and {len(lines) - DIGEST_MAX_LINES} more"]
+    return f"AIRE Alert digest: {len(items)} new hit(s)", "New watchlist hits:\n" + "\n".join(lines)
+
+def backoff(attempts: int) -> float:
+    """Seconds until the next try after `attempts` failures (exponential, ±20% jitter)."""
+    return min(BACKOFF_MAX_SEC, BACKOFF_SEC * 2 ** max(0, attempts - 1)) * random.uniform(0.8, 1.2)
+
+class Dispatcher:
+    def __init__(self, transports: Dict[str, Any], *, batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS,
+                 clock: Callable[[], float] = time.time):
+        self.transports = transports
+        self.batch_size = max(1, int(batch_size))
+        self.max_attempts = max(1, int(max_attempts))
+        self.clock = clock
+        self._stop = threading.Event()
+
+    def _claim(self) -> List[Tuple]:
+        channels = sorted(self.transports)
+        if not channels:
+            return []
+        t = int(self.clock())
+        token = uuid.uuid4().hex
+        marks = ",".join("?" * len(channels))
+        exec_commit(
+            f"UPDATE notifications SET status='sending', claim=?, next_attempt_at=? WHERE id IN ("
+            f"SELECT id FROM notifications WHERE status IN ('pending','sending') AND next_attempt_at<=? "
+            f"AND channel IN ({marks}) ORDER BY id LIMIT ?) AND next_attempt_at<=?",
+            (token, t + LEASE_SEC, t, *channels, self.batch_size, t),
+        )
+        return fetchall("SELECT id, channel, recipient, payload_json, attempts, workspace_id FROM notifications WHERE claim=? ORDER BY id", (token,))
+
+    def drain_once(self) -> Dict[str, int]:
+        migrate()
+        stats = {"claimed": 0, "digests": 0, "sent": 0, "retried": 0, "dead": 0}
+        rows = self._claim()
+        stats["claimed"] = len(rows)
+        groups: Dict[Tuple[int, str, str], List[Tuple]] = {}
+        for r in rows:
+            groups.setdefault((int(r[5] or 0), r[1], r[2]), []).append(r)
+        for (_, channel, recipient), group in groups.items():
+            items = [json.loads(r[3]) for r in group]
+            subject, body = render_digest(items)
+            stats["digests"] += 1
+            try:
+                self.transports[channel].send(recipient, subject, body, items)
+            except Exception as e:
+                self._failed(group, f"{type(e).__name__}: {e}", stats)
+                log_event("notify_digest_failed", level="warning", channel=channel, items=len(group), error=f"{type(e).__name__}: {e}")
+                continue
+            exec_many("UPDATE notifications SET status='sent', sent_at=?, claim=NULL, last_error=NULL WHERE id=?",
+                      [(int(self.clock()), int(r[0])) for r in group])
+            stats["sent"] += len(group)
+            log_event("notify_digest_sent", channel=channel, items=len(group))
+        return stats
+
+    def _failed(self, group: List[Tuple], error: str, stats: Dict[str, int]) -> None:
+        t = self.clock()
+        params = []
+        for r in group:
+            attempts = int(r[4] or 0) + 1
+            dead = attempts >= self.max_attempts
+            stats["dead" if dead else "retried"] += 1
+            params.append(("dead" if dead else "pending", attempts, int(t + backoff(attempts)), error[:500], int(r[0])))
+        exec_many("UPDATE notifications SET status=?, attempts=?, next_attempt_at=?, claim=NULL, last_error=? WHERE id=?", params)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, interval: float = INTERVAL_SEC) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as e:
+                log_event("notify_drain_failed", level="error", error=f"{type(e).__name__}: {e}")
+            self._stop.wait(interval)
+
+_BACKGROUND: Optional[Dispatcher] = None
+_BACKGROUND_LOCK = threading.Lock()
+
+def start_background(transports: Dict[str, Any], interval: float = INTERVAL_SEC) -> Dispatcher:
+    """Start one daemon-thread dispatcher per process (later calls return the running one)."""
+    global _BACKGROUND
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND is None:
+            _BACKGROUND = Dispatcher(transports)
+            threading.Thread(target=_BACKGROUND.run_forever, args=(interval,), name="notify-dispatcher", daemon=True).start()
+        return _BACKGROUND
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(prog="python -m notify", description="Deliver queued alert notifications as digests.")
+    p.add_argument("--interval", type=float, default=INTERVAL_SEC, help="seconds between outbox passes")
+    p.add_argument("--once", action="store_true", help="drain once and exit")
+    args = p.parse_args(argv)
+    d = Dispatcher(transports_from_env())
+    if args.once:
+        print(json.dumps(d.drain_once()))
+        return
+    try:
+        d.run_forever(args.interval)
+    except KeyboardInterrupt:
+        d.stop()
+
+if __name__ == "__main__":
+    main()
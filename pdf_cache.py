@@ -0,0 +1,116 @@
+"""On-disk cache of rendered report PDFs.
+
+Saved reports do not change in any field the PDF prints (later attachments
+such as memos or risk simulations are not on the page), so a rendered PDF is
+valid for as long as the layout is: files are keyed by the database identity
+(db.target_id(), so staging and prod or a reset DB never share entries),
+report id and export_pdf.LAYOUT_VERSION. The default directory is per
+database too. Reads refresh the file's mtime; when the directory
+grows past PDF_CACHE_MAX_BYTES the least recently used files are removed until
+it is back under 90% of the bound. Writes are atomic (temp file + rename), so
+threads, bulk-export workers and API processes can share one directory.
+"""
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Tuple
+
+import db
+import telemetry
+from export_pdf import LAYOUT_VERSION
+
+CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")  # default: default_dir(), one per database
+MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+def default_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), f"aire-pdf-cache-{db.target_id()}")
+
+def etag(report_id: int) -> str:
+    return f'"pdf-{db.target_id()}-{int(report_id)}-v{LAYOUT_VERSION}"'
+
+class PdfCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self._cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._approx_bytes: Dict[str, int] = {}  # per directory, running total in this process; rescanned on eviction
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or default_dir()
+
+    def path_for(self, report_id: int) -> str:
+        return os.path.join(self.cache_dir, f"report-{db.target_id()}-{int(report_id)}-v{LAYOUT_VERSION}.pdf")
+
+    def get(self, report_id: int, render: Callable[[], bytes]) -> bytes:
+        """The cached PDF for a saved report, rendering (and storing) it on a miss."""
+        path = self.path_for(report_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU: reads count as use
+            self.hits += 1
+            return data
+        except FileNotFoundError:
+            pass
+        self.misses += 1
+        with telemetry.stage("pdf_render"):
+            data = render()
+        self._store(path, data)
+        return data
+
+    def _store(self, path: str, data: bytes) -> None:
+        d = os.path.dirname(path)
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if d not in self._approx_bytes:
+                self._approx_bytes[d] = sum(size for _, size, _ in self._entries())
+            else:
+                self._approx_bytes[d] += len(data)
+            if self._approx_bytes[d] > self.max_bytes:
+                self._approx_bytes[d] = self.evict(int(self.max_bytes * 0.9))
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        out = []
+        try:
+            it = os.scandir(self.cache_dir)
+        except FileNotFoundError:
+            return out
+        with it:
+            for e in it:
+                if e.name.endswith(".pdf"):
+                    try:
+                        st = e.stat()
+                    except FileNotFoundError:  # removed by another process
+                        continue
+                    out.append((st.st_mtime, st.st_size, e.path))
+        return out
+
+    def evict(self, target_bytes: int = 0) -> int:
+        """Delete least recently used PDFs until at most target_bytes remain; returns the bytes left."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+CACHE = PdfCache()
+telemetry.register_cache("report_pdf", CACHE)
+
+def get_pdf(report_id: int, render: Callable[[], bytes]) -> bytes:
+    return CACHE.get(report_id, render)
@@ -0,0 +1,175 @@
+"""Portfolio view over saved reports (or a batch screener result).
+
+    analyze(holdings_from_reports([12, 15, 19], workspace_id))
+    -> {"count": 3, "noi": 61_200.0, "cap_rate": 0.068, "irr": 0.112, "dscr": {...}, ...}
+
+Holdings are flattened into NumPy columns (price, equity, NOI, debt service,
+DSCR) and a stacked (holdings x years) cashflow matrix. All deals are
+treated as bought at t0, so the portfolio cashflow is the column sum of that
+matrix (shorter holds are zero-padded after their exit year) and the
+portfolio IRR is the IRR of that sum. Reports are loaded with one query per
+storage.READ_CHUNK ids, so thousands of holdings stay cheap.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from storage import read_reports
+from underwriting import DealInputs, irr, npv, project_cashflows
+
+DSCR_BUCKETS = ((None, 1.0, "<1.00"), (1.0, 1.2, "1.00-1.20"), (1.2, 1.35, "1.20-1.35"), (1.35, None, ">=1.35"))
+TOP_N = 5
+
+_STATE_ZIP = re.compile(r",\s*([A-Za-z]{2})\.?\s*(\d{5})?(?:-\d{4})?\s*$")
+
+def location_of(address: str) -> Dict[str, Optional[str]]:
+    """Best-effort state / ZIP from a one-line US address ('..., Austin, TX 78701')."""
+    m = _STATE_ZIP.search(address or "")
+    if not m:
+        return {"state": None, "zip": None}
+    return {"state": m.group(1).upper(), "zip": m.group(2)}
+
+def _num(x: Any) -> float:
+    try:
+        return float(x) if x is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+def holding_from_payload(report_id: Optional[int], payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    inp = payload.get("inputs") or {}
+    m = (payload.get("outputs") or {}).get("metrics") or {}
+    if not inp.get("price"):
+        return None
+    cashflows = m.get("Cashflows")
+    if not cashflows:
+        # compact reports (include_cashflows=False) only store the summary; rebuild the cashflows
+        try:
+            cashflows = project_cashflows(DealInputs(**inp))["cashflows"]
+        except TypeError:
+            cashflows = []
+    price = float(inp["price"])
+    return {
+        "report_id": report_id,
+        "address": inp.get("address", ""),
+        "price": price,
+        "equity": price * float(inp.get("down_payment_pct", 20.0)) / 100.0,
+        "noi": _num(m.get("NOI")),
+        "debt_annual": _num(m.get("DebtAnnual")),
+        "dscr": _num(m.get("DSCR")),
+        "cashflows": [float(c) for c in cashflows],
+        **location_of(inp.get("address", "")),
+    }
+
+def holdings_from_reports(report_ids: List[int], workspace_id: Optional[int]) -> List[Dict[str, Any]]:
+    payloads = read_reports(report_ids, workspace_id=workspace_id)
+    out = []
+    for rid in dict.fromkeys(int(x) for x in report_ids):
+        h = holding_from_payload(rid, payloads.get(rid) or {})
+        if h:
+            out.append(h)
+    return out
+
+def holdings_from_batch(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rows returned by the batch screener (each carries its saved payload)."""
+    out = []
+    for r in results:
+        h = holding_from_payload(r.get("report_id"), r.get("payload") or {})
+        if h:
+            out.append(h)
+    return out
+
+def cashflow_matrix(holdings: List[Dict[str, Any]]) -> np.ndarray:
+    """(holdings, max_years+1) matrix, zero past each holding's exit year."""
+    lengths = np.fromiter((len(h["cashflows"]) for h in holdings), dtype=np.int64, count=len(holdings))
+    T = int(lengths.max()) if lengths.size else 0
+    cf = np.zeros((len(holdings), T))
+    if T:
+        rows = np.repeat(np.arange(len(holdings)), lengths)
+        cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cf[rows, cols] = np.fromiter((c for h in holdings for c in h["cashflows"]), dtype=float, count=int(lengths.sum()))
+    return cf
+
+def _shares(weights: np.ndarray) -> np.ndarray:
+    total = weights.sum()
+    return weights / total if total > 0 else np.zeros_like(weights)
+
+def _concentration(keys: List[Optional[str]], weights: np.ndarray) -> Dict[str, Any]:
+    known = np.array([k is not None for k in keys], dtype=bool)
+    if not known.any():
+        return {"hhi": None, "shares": {}, "unknown_share": 1.0 if len(keys) else None}
+    labels, inv = np.unique(np.array([k for k in keys if k is not None]), return_inverse=True)
+    by = np.bincount(inv, weights=weights[known], minlength=len(labels))
+    s = _shares(by)
+    total = weights.sum()
+    order = np.argsort(-s)
+    return {
+        "hhi": float(np.sum(s ** 2)),
+        "shares": {str(labels[k]): float(s[k]) for k in order},
+        "unknown_share": float(weights[~known].sum() / total) if total > 0 else 0.0,
+    }
+
+def analyze(holdings: List[Dict[str, Any]], *, discount: float = 0.10) -> Dict[str, Any]:
+    n = len(holdings)
+    if not n:
+        return {"count": 0}
+    price = np.array([h["price"] for h in holdings])
+    equity = np.array([h["equity"] for h in holdings])
+    noi = np.array([h["noi"] for h in holdings])
+    debt = np.array([h["debt_annual"] for h in holdings])
+    dscr = np.array([h["dscr"] for h in holdings])
+
+    cf = cashflow_matrix(holdings)
+    port_cf = cf.sum(axis=0).tolist()
+    has_noi = ~np.isnan(noi)
+    agg_noi = float(noi[has_noi].sum())
+    total_debt = float(np.nansum(debt[has_noi]))
+
+    known_dscr = dscr[~np.isnan(dscr)]
+    buckets = {}
+    for lo, hi, label in DSCR_BUCKETS:
+        mask = np.ones(known_dscr.shape, dtype=bool)
+        if lo is not None:
+            mask &= known_dscr >= lo
+        if hi is not None:
+            mask &= known_dscr < hi
+        buckets[label] = int(mask.sum())
+    buckets["missing"] = int(n - known_dscr.size)
+
+    value_share = _shares(price)
+    top = np.sort(value_share)[::-1]
+    return {
+        "count": n,
+        "total_price": float(price.sum()),
+        "total_equity": float(equity.sum()),
+        "noi": agg_noi,
+        "cap_rate": (agg_noi / float(price[has_noi].sum())) if has_noi.any() and price[has_noi].sum() > 0 else None,
+        "debt_service": total_debt,
+        "dscr_portfolio": (agg_noi / total_debt) if total_debt > 0 else None,
+        "irr": irr(port_cf),
+        "npv": npv(discount, port_cf) if port_cf else None,
+        "equity_multiple": (float(sum(port_cf[1:])) / float(equity.sum())) if equity.sum() > 0 and len(port_cf) > 1 else None,
+        "cashflows": port_cf,
+        "dscr": {
+            "p10": float(np.percentile(known_dscr, 10)) if known_dscr.size else None,
+            "p50": float(np.percentile(known_dscr, 50)) if known_dscr.size else None,
+            "p90": float(np.percentile(known_dscr, 90)) if known_dscr.size else None,
+            "min": float(known_dscr.min()) if known_dscr.size else None,
+            "buckets": buckets,
+            "below_1_share": float((known_dscr < 1.0).mean()) if known_dscr.size else None,
+        },
+        "concentration": {
+            "hhi": float(np.sum(value_share ** 2)),
+            "effective_holdings": float(1.0 / np.sum(value_share ** 2)) if value_share.sum() > 0 else None,
+            "largest_share": float(top[0]),
+            f"top{TOP_N}_share": float(top[:TOP_N].sum()),
+            "by_state": _concentration([h["state"] for h in holdings], price),
+            "by_zip": _concentration([h["zip"] for h in holdings], price),
+        },
+    }
+
+def analyze_reports(report_ids: List[int], workspace_id: Optional[int]) -> Dict[str, Any]:
+    holdings = holdings_from_reports(report_ids, workspace_id=workspace_id)
+    out = analyze(holdings)
+    out["missing_ids"] = sorted(set(int(x) for x in report_ids) - {h["report_id"] for h in holdings})
+    return out
@@ -0,0 +1,221 @@
+import asyncio
+import copy
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+import rentcast as rc
+import estated as es
+import attom as at
+import telemetry
+from cache import TTLCache, AsyncSingleFlight
+
+@dataclass(frozen=True)
+class ProviderKeys:
+    rentcast_apikey: str = ""
+    estated_token: str = ""
+    attom_apikey: str = ""
+
+def keys_from_env() -> ProviderKeys:
+    """API service reads provider keys from the environment (the UI uses st.secrets)."""
+    return ProviderKeys(
+        rentcast_apikey=os.getenv("RENTCAST_APIKEY", ""),
+        estated_token=os.getenv("ESTATED_TOKEN", ""),
+        attom_apikey=os.getenv("ATTOM_APIKEY", ""),
+    )
+
+_SUFFIXES = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "boulevard": "blvd",
+    "lane": "ln", "court": "ct", "place": "pl", "terrace": "ter", "apartment": "apt",
+    "suite": "ste", "north": "n", "south": "s", "east": "e", "west": "w",
+}
+
+def normalize_address(address: str) -> str:
+    """Canonical cache key for an address ("123 Main Street, Austin TX" == "123 main st austin tx")."""
+    s = re.sub(r"[^\w\s#]", " ", (address or "").lower())
+    return " ".join(_SUFFIXES.get(tok, tok) for tok in s.split())
+
+def infer_last_sale(payload: dict):
+    if not payload or not isinstance(payload, dict):
+        return None, None
+    price = None
+    for k in ["lastSalePrice","last_sale_price","salePrice","last_sale_amount"]:
+        v = payload.get(k)
+        if isinstance(v, (int,float)) and v > 0:
+            price = float(v); break
+    date = payload.get("lastSaleDate") or payload.get("last_sale_date") or payload.get("saleDate") or payload.get("lastSaleRecordingDate")
+    return price, date
+
+def merge_property_data(keys: ProviderKeys, v: Any = None, r: Any = None, pr: Any = None,
+                        estated_json: Any = None, attom_json: Any = None) -> Dict[str, Any]:
+    """Merge raw provider responses into the flat dict the grading pipeline expects."""
+    notes: List[str] = []
+    out: Dict[str, Any] = {}
+    if keys.rentcast_apikey:
+        if isinstance(v, dict):
+            out["price"] = v.get("price") or v.get("value") or v.get("estimatedValue")
+            out["price_source"] = "RentCast"
+            notes.append("RentCast value AVM")
+        if isinstance(r, dict):
+            out["monthly_rent"] = r.get("rent") or r.get("estimatedRent")
+            out["rent_source"] = "RentCast"
+            notes.append("RentCast rent AVM")
+        if isinstance(pr, dict):
+            lsp, lsd = infer_last_sale(pr)
+            out["last_sale_price"], out["last_sale_date"] = lsp, lsd
+            if (lsp or lsd):
+                out["last_sale_source"] = "RentCast"
+            notes.append("RentCast property record")
+    if keys.estated_token:
+        j = estated_json
+        if isinstance(j, dict):
+            cand = j.get("data") or j.get("property") or j
+            if isinstance(cand, dict):
+                out["price"] = out.get("price") or cand.get("market_value") or cand.get("avm") or cand.get("value")
+                if out.get("price") and not out.get("price_source"):
+                    out["price_source"] = "Estated"
+                lsp, lsd = infer_last_sale(cand)
+                out["last_sale_price"] = out.get("last_sale_price") or lsp
+                if lsp and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "ATTOM"
+                if lsp and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "Estated"
+                out["last_sale_date"] = out.get("last_sale_date") or lsd
+                if lsd and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "ATTOM"
+                if lsd and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "Estated"
+            notes.append("Estated lookup")
+    if keys.attom_apikey:
+        j = attom_json
+        if isinstance(j, dict):
+            cand = j.get("property") or j.get("data") or j
+            if isinstance(cand, dict):
+                lsp, lsd = infer_last_sale(cand)
+                out["last_sale_price"] = out.get("last_sale_price") or lsp
+                if lsp and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "Estated"
+                out["last_sale_date"] = out.get("last_sale_date") or lsd
+                if lsd and not out.get("last_sale_source"):
+                    out["last_sale_source"] = "Estated"
+            notes.append("ATTOM detail")
+    out["notes"] = notes
+    return out
+
+def _record_calls(keys: ProviderKeys, v: Any, r: Any, pr: Any, ej: Any, aj: Any) -> int:
+    """Provider helpers return None on any failure; count those as errors. Returns the number that failed."""
+    calls = []
+    if keys.rentcast_apikey:
+        calls += [("rentcast_value", v), ("rentcast_rent", r), ("rentcast_property", pr)]
+    if keys.estated_token:
+        calls.append(("estated", ej))
+    if keys.attom_apikey:
+        calls.append(("attom", aj))
+    for provider, result in calls:
+        telemetry.PROVIDER_CALLS.inc(provider=provider, outcome="ok" if result is not None else "error")
+    return sum(1 for _, result in calls if result is None)
+
+def pull_property_data(address: str, keys: ProviderKeys) -> Dict[str, Any]:
+    """Blocking provider pull (Streamlit UI)."""
+    v = r = pr = ej = aj = None
+    if keys.rentcast_apikey:
+        v = rc.value_avm(keys.rentcast_apikey, address)
+        r = rc.rent_avm(keys.rentcast_apikey, address)
+        pr = rc.property_record(keys.rentcast_apikey, address)
+    if keys.estated_token:
+        ej = es.property_lookup(keys.estated_token, address)
+    if keys.attom_apikey:
+        aj = at.property_detail(keys.attom_apikey, address)
+    _record_calls(keys, v, r, pr, ej, aj)
+    return merge_property_data(keys, v, r, pr, ej, aj)
+
+# ---- Async pull (API service) ----
+_ASYNC_CLIENT = None
+
+def get_async_client():
+    """Process-wide httpx.AsyncClient so provider calls reuse pooled connections."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        import httpx
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            timeout=float(os.getenv("API_TIMEOUT_SEC", "15")),
+            limits=httpx.Limits(max_connections=int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100")), max_keepalive_connections=20),
+        )
+    return _ASYNC_CLIENT
+
+_PROVIDER_HOSTS = {
+    "rentcast_apikey": "https://api.rentcast.io",
+    "estated_token": "https://api.estated.com",
+    "attom_apikey": "https://api.gateway.attomdata.com",
+}
+
+async def warm_pool(keys: ProviderKeys) -> None:
+    """Open keep-alive connections (DNS + TLS) to configured providers before traffic arrives."""
+    client = get_async_client()
+    hosts = [url for field, url in _PROVIDER_HOSTS.items() if getattr(keys, field)]
+
+    async def _touch(url: str) -> None:
+        try:
+            await client.head(url, timeout=3.0)
+        except Exception:
+            pass
+
+    await asyncio.gather(*[_touch(u) for u in hosts])
+
+async def aclose() -> None:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        try:
+            await _ASYNC_CLIENT.aclose()
+        except Exception:
+            pass
+        _ASYNC_CLIENT = None
+
+async def _none():
+    return None
+
+async def apull_property_data(address: str, keys: ProviderKeys, client=None) -> Dict[str, Any]:
+    """Non-blocking provider pull: all configured providers are queried concurrently."""
+    out, _ = await _apull(address, keys, client)
+    return out
+
+async def _apull(address: str, keys: ProviderKeys, client=None) -> Tuple[Dict[str, Any], int]:
+    """apull_property_data plus the number of provider calls that failed."""
+    client = client or get_async_client()
+    rckey, estoken, atkey = keys.rentcast_apikey, keys.estated_token, keys.attom_apikey
+    v, r, pr, ej, aj = await asyncio.gather(
+        rc.value_avm_async(client, rckey, address) if rckey else _none(),
+        rc.rent_avm_async(client, rckey, address) if rckey else _none(),
+        rc.property_record_async(client, rckey, address) if rckey else _none(),
+        es.property_lookup_async(client, estoken, address) if estoken else _none(),
+        at.property_detail_async(client, atkey, address) if atkey else _none(),
+    )
+    failed = _record_calls(keys, v, r, pr, ej, aj)
+    return merge_property_data(keys, v, r, pr, ej, aj), failed
+
+# ---- Shared cache + request coalescing (API service) ----
+# Concurrent requests for the same normalized address share one in-flight pull,
+# and results are kept for CACHE_TTL_SEC so hot listings don't multiply paid calls.
+# A pull where some provider failed is kept only PARTIAL_TTL_SEC (the failure is
+# likely transient); one where every provider failed is not kept at all.
+PARTIAL_TTL_SEC = float(os.getenv("PROVIDER_PARTIAL_TTL_SEC", "60"))
+_PULL_CACHE = TTLCache(ttl_sec=float(os.getenv("CACHE_TTL_SEC", "3600")), maxsize=int(os.getenv("PROVIDER_CACHE_MAX", "10000")))
+_PULL_FLIGHTS = AsyncSingleFlight()
+telemetry.register_cache("provider_pull", _PULL_CACHE)
+
+async def apull_property_data_cached(address: str, keys: ProviderKeys, client=None) -> Dict[str, Any]:
+    key = (normalize_address(address), keys)
+    hit = _PULL_CACHE.get(key)
+    if hit is not None:
+        return copy.deepcopy(hit)  # callers may edit their result; the cached entry is shared
+
+    async def _pull() -> Dict[str, Any]:
+        out, failed = await _apull(address, keys, client=client)
+        if not failed:
+            _PULL_CACHE.set(key, out)
+        elif out.get("notes"):
+            _PULL_CACHE.set(key, out, ttl_sec=PARTIAL_TTL_SEC)
+        return out
+
+    return copy.deepcopy(await _PULL_FLIGHTS.do(key, _pull))
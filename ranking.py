@@ -0,0 +1,125 @@
+"""Streaming top-K selection for screens, alert scans and API batch jobs.
+
+    top = TopK(50, constraints=Constraints(min_dscr=1.2, max_price=400_000))
+    for row in graded_rows():
+        top.push(row)
+    best = top.results()          # best first, at most 50 rows
+
+Rows are plain dicts (the shape run_one / _grade_content already return).
+A bounded min-heap holds the K best rows seen so far, so memory stays O(K)
+however many rows stream through; rows that fail the constraints or fall
+out of the heap are dropped together with their payloads. Ordering is
+multi-key: (field, descending) pairs compared left to right, with missing
+values ranked last and ties going to the row that arrived first.
+"""
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (field, descending)
+Order = Sequence[Tuple[str, bool]]
+DEFAULT_ORDER: Order = (("score", True), ("confidence", True))
+# Bulky per-row fields that only survivors need
+HEAVY_FIELDS = ("payload", "rationale", "ai_meta", "memo")
+
+@dataclass
+class Constraints:
+    min_score: Optional[float] = None
+    min_dscr: Optional[float] = None
+    min_coc: Optional[float] = None
+    min_irr: Optional[float] = None
+    max_price: Optional[float] = None
+
+    # constraint -> (row field, is_minimum)
+    FIELDS = {"min_score": ("score", True), "min_dscr": ("dscr", True), "min_coc": ("coc", True),
+              "min_irr": ("irr", True), "max_price": ("price", False)}
+
+    def admits(self, row: Dict[str, Any]) -> bool:
+        """A row with the constrained metric missing does not pass that constraint."""
+        for name, (field, is_min) in self.FIELDS.items():
+            limit = getattr(self, name)
+            if limit is None:
+                continue
+            v = _number(row.get(field))
+            if v is None or (v < limit if is_min else v > limit):
+                return False
+        return True
+
+def _number(v: Any) -> Optional[float]:
+    if v is None or isinstance(v, str):
+        return None
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(v) else v
+
+def sort_key(row: Dict[str, Any], order: Order = DEFAULT_ORDER) -> Tuple[float, ...]:
+    """Larger is better for every component (missing = -inf)."""
+    key = []
+    for field, descending in order:
+        v = _number(row.get(field))
+        key.append(float("-inf") if v is None else (v if descending else -v))
+    return tuple(key)
+
+def slim(row: Dict[str, Any], heavy: Iterable[str] = HEAVY_FIELDS) -> Dict[str, Any]:
+    drop = set(heavy)
+    return {k: v for k, v in row.items() if k not in drop}
+
+class TopK:
+    def __init__(self, k: int, order: Order = DEFAULT_ORDER, constraints: Optional[Constraints] = None):
+        if int(k) <= 0:
+            raise ValueError("k must be positive")
+        self.k = int(k)
+        self.order = tuple(order)
+        self.constraints = constraints or Constraints()
+        self._heap: List[Tuple[Tuple[float, ...], int, Dict[str, Any]]] = []
+        self.seen = 0
+        self.filtered = 0  # failed constraints
+        self.evicted = 0   # passed, but not in the top K
+
+    def push(self, row: Dict[str, Any], seq: Optional[int] = None) -> bool:
+        """Offer a row; True if it is (for now) among the top K. seq (default: arrival
+        order) breaks ties, lower first; pass the input position when rows complete out of order."""
+        self.seen += 1
+        if not self.constraints.admits(row):
+            self.filtered += 1
+            return False
+        # -seq: on equal keys the earlier row compares greater and survives
+        item = (sort_key(row, self.order), -(self.seen if seq is None else seq), row)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+            return True
+        if item[:2] <= self._heap[0][:2]:
+            self.evicted += 1
+            return False
+        heapq.heapreplace(self._heap, item)
+        self.evicted += 1
+        return True
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> "TopK":
+        for row in rows:
+            self.push(row)
+        return self
+
+    def threshold(self) -> Optional[Tuple[float, ...]]:
+        """Sort key a new row must beat once the heap is full (None until then)."""
+        return self._heap[0][0] if len(self._heap) >= self.k else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Survivors, best first. Each row gets its 1-based `rank`."""
+        rows = [item[2] for item in sorted(self._heap, key=lambda it: it[:2], reverse=True)]
+        for n, row in enumerate(rows, start=1):
+            row["rank"] = n
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return {"seen": self.seen, "kept": len(self._heap), "filtered": self.filtered, "evicted": self.evicted}
+
+def top_k(rows: Iterable[Dict[str, Any]], k: int, order: Order = DEFAULT_ORDER,
+          constraints: Optional[Constraints] = None) -> List[Dict[str, Any]]:
+    return TopK(k, order, constraints).extend(rows).results()
@@ -31,3 +31,30 @@ def property_record(api_key: str, address: str) -> Optional[Dict[str, Any]]:
         return data if isinstance(data, dict) else None
     except Exception:
         return None
+
+# ---- Async variants (share one httpx.AsyncClient per process) ----
+async def value_avm_async(client, api_key: str, address: str) -> Optional[Dict[str, Any]]:
+    try:
+        r = await client.get(f"{BASE}/avm/value", headers=_headers(api_key), params={"address": address}, timeout=20)
+        return r.json() if r.status_code == 200 else None
+    except Exception:
+        return None
+
+async def rent_avm_async(client, api_key: str, address: str) -> Optional[Dict[str, Any]]:
+    try:
+        r = await client.get(f"{BASE}/avm/rent/long-term", headers=_headers(api_key), params={"address": address}, timeout=20)
+        return r.json() if r.status_code == 200 else None
+    except Exception:
+        return None
+
+async def property_record_async(client, api_key: str, address: str) -> Optional[Dict[str, Any]]:
+    try:
+        r = await client.get(f"{BASE}/properties", headers=_headers(api_key), params={"address": address}, timeout=20)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        if isinstance(data, list) and data:
+            return data[0]
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
@@ -0,0 +1,83 @@
+"""Price / rent / rate sensitivity grids on top of the vectorized underwriting engine.
+
+    g = grid(inputs, Axis.pct("price", inputs.price, 0.20, 21), Axis.linspace("interest_rate_pct", 5, 9, 17))
+    g["score"]  # 17 x 21 array (rows = y axis, columns = x axis)
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import vector_engine
+from underwriting import DealInputs
+
+MAX_STEPS = 201
+GRID_METRICS = ("score", "grade", "grade_detail", "IRR", "DSCR", "CoC", "CapRate", "CashFlowMonthly")
+
+AXIS_LABELS = {
+    "price": "Price ($)",
+    "monthly_rent": "Rent ($/mo)",
+    "monthly_expenses": "Expenses ($/mo)",
+    "interest_rate_pct": "Interest rate (%)",
+    "down_payment_pct": "Down payment (%)",
+    "vacancy_rate": "Vacancy",
+    "hold_years": "Hold (years)",
+    "appreciation": "Appreciation",
+    "rent_growth": "Rent growth",
+    "exit_cap_rate": "Exit cap rate",
+}
+
+@dataclass
+class Axis:
+    field: str
+    values: List[float]
+
+    @classmethod
+    def pct(cls, field: str, base: float, pct: float, steps: int) -> "Axis":
+        """base ±pct (0.20 = ±20%) in `steps` evenly spaced values."""
+        return cls(field, list(np.linspace(base * (1 - pct), base * (1 + pct), int(steps))))
+
+    @classmethod
+    def linspace(cls, field: str, lo: float, hi: float, steps: int) -> "Axis":
+        return cls(field, list(np.linspace(lo, hi, int(steps))))
+
+    def validate(self) -> None:
+        if self.field not in vector_engine.FIELDS:
+            raise ValueError(f"unknown axis field: {self.field}")
+        if not 1 <= len(self.values) <= MAX_STEPS:
+            raise ValueError(f"axis {self.field} needs 1..{MAX_STEPS} values")
+
+def grid(i: DealInputs, x: Axis, y: Axis, *, workspace_id: int = 0,
+         metrics: Sequence[str] = GRID_METRICS) -> Dict[str, Any]:
+    """Full x*y what-if grid in one vectorized pass (nothing is saved)."""
+    x.validate()
+    y.validate()
+    if x.field == y.field:
+        raise ValueError("x and y must vary different inputs")
+    xs = np.asarray(x.values, dtype=float)
+    ys = np.asarray(y.values, dtype=float)
+    res = vector_engine.evaluate(i, {x.field: xs[None, :], y.field: ys[:, None]}, workspace_id=workspace_id)
+    out: Dict[str, Any] = {"x": {"field": x.field, "values": xs.tolist()},
+                           "y": {"field": y.field, "values": ys.tolist()}}
+    for k in metrics:
+        out[k] = res[k]
+    return out
+
+def to_json(g: Dict[str, Any]) -> Dict[str, Any]:
+    """Nested lists with NaN -> None (API / report payloads)."""
+    out: Dict[str, Any] = {}
+    for k, v in g.items():
+        if isinstance(v, np.ndarray):
+            if v.dtype.kind == "f":
+                v = np.where(np.isnan(v), None, v.astype(object))
+            out[k] = v.tolist()
+        else:
+            out[k] = v
+    return out
+
+def frame(g: Dict[str, Any], metric: str = "score", x_fmt: Optional[str] = None, y_fmt: Optional[str] = None) -> pd.DataFrame:
+    """One grid metric as a DataFrame (index = y values, columns = x values)."""
+    fx = (lambda v: x_fmt.format(v)) if x_fmt else (lambda v: v)
+    fy = (lambda v: y_fmt.format(v)) if y_fmt else (lambda v: v)
+    return pd.DataFrame(g[metric], index=[fy(v) for v in g["y"]["values"]], columns=[fx(v) for v in g["x"]["values"]])
@@ -0,0 +1,93 @@
+"""Production launcher for the AIRE API.
+
+    python serve.py --workers 4 --port 8000
+
+Runs gunicorn with uvicorn workers and `preload_app` (api_server, Stripe and
+the scoring stack are imported once in the master, then forked). Each worker
+runs the api_server warmup hook before it reports ready on `/ready`.
+Workers share METRICS_MULTIPROC_DIR (a fresh temp dir unless set; emptied at
+start) so `/metrics` on any worker reports totals for the whole server.
+Falls back to `uvicorn --workers` when gunicorn is not installed (e.g. Windows).
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import tempfile
+
+def default_workers() -> int:
+    env = os.getenv("WEB_CONCURRENCY", "")
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return max(2, min(8, multiprocessing.cpu_count() * 2 + 1))
+
+def prepare_metrics_dir() -> str:
+    """One snapshot directory per server run, set before the workers fork."""
+    d = os.getenv("METRICS_MULTIPROC_DIR", "")
+    if d:
+        os.makedirs(d, exist_ok=True)
+        for path in glob.glob(os.path.join(d, "metrics-*.json")):
+            os.remove(path)  # a previous run's totals
+    else:
+        d = tempfile.mkdtemp(prefix="aire-metrics-")
+        os.environ["METRICS_MULTIPROC_DIR"] = d
+    return d
+
+def run_gunicorn(args: argparse.Namespace) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class _App(BaseApplication):
+        def load_config(self):
+            cfg = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "timeout": args.timeout,
+                "graceful_timeout": args.timeout,
+                "keepalive": 5,
+                # Recycle workers periodically (with jitter) to cap slow memory growth
+                "max_requests": args.max_requests,
+                "max_requests_jitter": max(0, args.max_requests // 10),
+                "accesslog": "-" if args.access_log else None,
+            }
+            for k, v in cfg.items():
+                if v is not None:
+                    self.cfg.set(k, v)
+
+        def load(self):
+            from api_server import app
+            return app
+
+    _App().run()
+
+def run_uvicorn(args: argparse.Namespace) -> None:
+    import uvicorn
+    uvicorn.run(
+        "api_server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=5,
+        access_log=args.access_log,
+    )
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Run the AIRE API with multiple worker processes.")
+    ap.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=default_workers())
+    ap.add_argument("--timeout", type=int, default=int(os.getenv("WORKER_TIMEOUT_SEC", "60")))
+    ap.add_argument("--max-requests", type=int, default=int(os.getenv("WORKER_MAX_REQUESTS", "0")))
+    ap.add_argument("--access-log", action="store_true")
+    args = ap.parse_args(argv)
+    prepare_metrics_dir()
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        run_uvicorn(args)
+        return
+    run_gunicorn(args)
+
+if __name__ == "__main__":
+    main()
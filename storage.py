@@ -1,8 +1,9 @@
 import json
+import os
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-from db import backend, connect, ensure_column, insert_returning_id, fetchall, fetchone, exec_commit
+from db import backend, connect, ensure_column, insert_returning_id, fetchall, fetchone, exec_commit, exec_many
 
 def now() -> int:
     return int(time.time())
@@ -59,6 +60,14 @@ def migrate() -> None:
             workspace_id BIGINT,
             user_id BIGINT
         )""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS fingerprints (
+            workspace_id BIGINT NOT NULL,
+            address_key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            report_id BIGINT,
+            updated_at BIGINT NOT NULL,
+            PRIMARY KEY (workspace_id, address_key)
+        )""")
     else:
         cur.execute("""CREATE TABLE IF NOT EXISTS reports (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -106,12 +115,32 @@ def migrate() -> None:
             workspace_id INTEGER,
             user_id INTEGER
         )""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS fingerprints (
+            workspace_id INTEGER NOT NULL,
+            address_key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            report_id INTEGER,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (workspace_id, address_key)
+        )""")
 
     conn.commit()
     try:
         conn.close()
     except Exception:
         pass
+    _ensure_columns()
+
+_COLUMNS_ADDED: set = set()
+
+def _ensure_columns() -> None:
+    """Columns added after the first release (once per process and database)."""
+    target = os.getenv("DATABASE_URL") or os.getenv("SQLITE_PATH", "")
+    if target in _COLUMNS_ADDED:
+        return
+    ensure_column("watchlist", "fingerprint", "TEXT")
+    ensure_column("watchlist", "fingerprint_run_id", "INTEGER")
+    _COLUMNS_ADDED.add(target)
 
 # ---- Reports ----
 def save_report(address: str, url: str, grade: str, score: float, confidence: float, payload: Dict[str, Any], workspace_id: int = 0, user_id: int = 0) -> int:
@@ -123,6 +152,16 @@ def save_report(address: str, url: str, grade: str, score: float, confidence: fl
         sql_postgres="INSERT INTO reports(created_at, address, url, grade, score, confidence, payload_json, workspace_id, user_id) VALUES(%s,%s,%s,%s,%s,%s,%s,%s,%s) RETURNING id",
     )
 
+def save_reports_bulk(reports: List[Dict[str, Any]], workspace_id: int = 0, user_id: int = 0) -> int:
+    """save_report for many rows in one transaction (offline batch grading). Returns rows written."""
+    migrate()
+    ts = now()
+    return exec_many(
+        "INSERT INTO reports(created_at, address, url, grade, score, confidence, payload_json, workspace_id, user_id) VALUES(?,?,?,?,?,?,?,?,?)",
+        [(ts, r["address"], r.get("url", ""), r["grade"], float(r["score"]), float(r["confidence"]),
+          json.dumps(r["payload"]), int(workspace_id), int(user_id)) for r in reports],
+    )
+
 def list_reports(limit: int = 50, workspace_id: int = 0) -> List[Dict[str, Any]]:
     migrate()
     rows = fetchall(
@@ -141,6 +180,70 @@ def read_report(report_id: int) -> Dict[str, Any]:
     except Exception:
         return {}
 
+READ_CHUNK = 500
+
+def _in_workspace(workspace_id: Optional[int]) -> Tuple[List[str], List[Any]]:
+    """WHERE terms for a workspace-scoped read; None is an explicit, unscoped (admin) read."""
+    return ([], []) if workspace_id is None else (["workspace_id=?"], [int(workspace_id)])
+
+def read_reports(report_ids: List[int], workspace_id: Optional[int]) -> Dict[int, Dict[str, Any]]:
+    """Bulk read_report: {id: payload} in one query per READ_CHUNK ids (missing ids and other workspaces' are omitted)."""
+    migrate()
+    ids = list(dict.fromkeys(int(x) for x in report_ids))
+    where, params = _in_workspace(workspace_id)
+    out: Dict[int, Dict[str, Any]] = {}
+    for k in range(0, len(ids), READ_CHUNK):
+        chunk = ids[k:k + READ_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        rows = fetchall(
+            f"SELECT id, payload_json FROM reports WHERE {' AND '.join([f'id IN ({marks})', *where])}",
+            (*chunk, *params),
+        )
+        for r in rows:
+            try:
+                out[int(r[0])] = json.loads(r[1])
+            except Exception:
+                out[int(r[0])] = {}
+    return out
+
+def list_report_ids(workspace_id: Optional[int], ids: Optional[List[int]] = None, since: Optional[int] = None,
+                    until: Optional[int] = None) -> List[int]:
+    """Ids of the workspace's reports (None: every workspace), optionally limited to `ids` and a created_at window, oldest first."""
+    migrate()
+    where, params = _in_workspace(workspace_id)
+    if since is not None:
+        where.append("created_at>=?")
+        params.append(int(since))
+    if until is not None:
+        where.append("created_at<?")
+        params.append(int(until))
+    sql = f"SELECT id FROM reports WHERE {' AND '.join(where) or '1=1'}"
+    if ids is None:
+        return [int(r[0]) for r in fetchall(sql + " ORDER BY id", params)]
+    wanted = list(dict.fromkeys(int(x) for x in ids))
+    found: set = set()
+    for k in range(0, len(wanted), READ_CHUNK):
+        chunk = wanted[k:k + READ_CHUNK]
+        found.update(int(r[0]) for r in fetchall(f"{sql} AND id IN ({','.join('?' * len(chunk))})", (*params, *chunk)))
+    return [x for x in wanted if x in found]
+
+def attach_to_report(report_id: int, key: str, value: Any) -> None:
+    """Add an analysis section (e.g. risk simulation) to a saved report's outputs.
+
+    Only outputs[key] is written, inside the UPDATE, so concurrent attaches of
+    different sections (memo, risk_sim) never overwrite each other.
+    """
+    migrate()
+    if backend() == "postgres":
+        exec_commit(
+            "UPDATE reports SET payload_json=jsonb_set(jsonb_set(payload_json::jsonb, '{outputs}', "
+            "COALESCE(payload_json::jsonb->'outputs', '{}'::jsonb)), ARRAY['outputs', ?], ?::jsonb)::text WHERE id=?",
+            (key, json.dumps(value), int(report_id)),
+        )
+    else:
+        exec_commit("UPDATE reports SET payload_json=json_set(payload_json, ?, json(?)) WHERE id=?",
+                    (f'$.outputs."{key}"', json.dumps(value), int(report_id)))
+
 # ---- Templates ----
 def upsert_template(name: str, template: Dict[str, Any], template_id: Optional[int] = None, workspace_id: int = 0, user_id: int = 0) -> int:
     migrate()
@@ -170,6 +273,22 @@ def delete_template(template_id: int) -> None:
     migrate()
     exec_commit("DELETE FROM templates WHERE id=?", (int(template_id),))
 
+# ---- Input fingerprints (see fingerprints.py) ----
+def get_fingerprint(workspace_id: int, address_key: str) -> Optional[Dict[str, Any]]:
+    migrate()
+    row = fetchone("SELECT fingerprint, report_id, updated_at FROM fingerprints WHERE workspace_id=? AND address_key=?",
+                   (int(workspace_id), address_key))
+    return {"fingerprint": row[0], "report_id": row[1], "updated_at": row[2]} if row else None
+
+def set_fingerprint(workspace_id: int, address_key: str, fingerprint: str, report_id: Optional[int]) -> None:
+    migrate()
+    exec_commit(
+        "INSERT INTO fingerprints(workspace_id, address_key, fingerprint, report_id, updated_at) VALUES(?,?,?,?,?) "
+        "ON CONFLICT(workspace_id, address_key) DO UPDATE SET fingerprint=excluded.fingerprint, "
+        "report_id=excluded.report_id, updated_at=excluded.updated_at",
+        (int(workspace_id), address_key, fingerprint, int(report_id) if report_id else None, now()),
+    )
+
 # ---- Watchlist & Alerts ----
 def add_watchlist(address: str, url: str = "", target_grade: str = "B", target_score: float = 80.0, notes: str = "", workspace_id: int = 0, user_id: int = 0) -> int:
     migrate()
@@ -188,6 +307,8 @@ def update_watchlist(item_id: int, **fields) -> None:
         if k in allowed:
             sets.append(f"{k}=?")
             vals.append(v)
+    if sets:
+        sets.append("fingerprint=NULL")  # an edited item is always re-graded on the next scan
     sets.append("updated_at=?")
     vals.append(now())
     vals.append(int(item_id))
@@ -199,12 +320,19 @@ def delete_watchlist(item_id: int) -> None:
 
 def list_watchlist(workspace_id: int = 0) -> List[Dict[str, Any]]:
     migrate()
-    rows = fetchall("SELECT id, created_at, updated_at, address, url, target_grade, target_score, notes FROM watchlist WHERE (?=0 OR workspace_id=?) ORDER BY updated_at DESC", (int(workspace_id), int(workspace_id)))
+    rows = fetchall("SELECT id, created_at, updated_at, address, url, target_grade, target_score, notes, workspace_id, fingerprint, fingerprint_run_id FROM watchlist WHERE (?=0 OR workspace_id=?) ORDER BY updated_at DESC", (int(workspace_id), int(workspace_id)))
     return [{
         "id": r[0], "created_at": r[1], "updated_at": r[2], "address": r[3], "url": r[4],
-        "target_grade": r[5], "target_score": r[6], "notes": r[7]
+        "target_grade": r[5], "target_score": r[6], "notes": r[7], "workspace_id": r[8],
+        "fingerprint": r[9], "fingerprint_run_id": r[10]
     } for r in rows]
 
+def set_watchlist_fingerprint(item_id: int, fingerprint: str, run_id: Optional[int] = None) -> None:
+    """Record the input fingerprint of the item's latest graded run (does not touch updated_at)."""
+    migrate()
+    exec_commit("UPDATE watchlist SET fingerprint=?, fingerprint_run_id=? WHERE id=?",
+                (fingerprint, int(run_id) if run_id else None, int(item_id)))
+
 def save_alert_run(watchlist_id: int, address: str, url: str, grade: str, score: float, confidence: float, hit: int, payload: Dict[str, Any], workspace_id: int = 0, user_id: int = 0) -> int:
     migrate()
     payload_json = json.dumps(payload)
@@ -214,6 +342,23 @@ def save_alert_run(watchlist_id: int, address: str, url: str, grade: str, score:
         sql_postgres="INSERT INTO alert_runs(created_at, watchlist_id, address, url, grade, score, confidence, hit, payload_json, workspace_id, user_id) VALUES(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s) RETURNING id",
     )
 
+def last_alert_runs(watchlist_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """Most recent alert run per watchlist item: {watchlist_id: {...}} (all items when ids is None)."""
+    migrate()
+    where, params = "", ()
+    if watchlist_ids is not None:
+        ids = [int(x) for x in watchlist_ids]
+        if not ids:
+            return {}
+        where, params = f" WHERE watchlist_id IN ({','.join('?' * len(ids))})", tuple(ids)
+    rows = fetchall(
+        "SELECT id, created_at, watchlist_id, grade, score, confidence, hit FROM alert_runs "
+        f"WHERE id IN (SELECT MAX(id) FROM alert_runs{where} GROUP BY watchlist_id)",
+        params,
+    )
+    return {int(r[2]): {"id": r[0], "created_at": r[1], "watchlist_id": r[2], "grade": r[3], "score": r[4],
+                        "confidence": r[5], "hit": r[6]} for r in rows}
+
 def list_alert_runs(limit: int = 100, workspace_id: int = 0) -> List[Dict[str, Any]]:
     migrate()
     rows = fetchall(
@@ -0,0 +1,66 @@
+"""Grade one property under every strategy template in one pass.
+
+The property numbers (price, rent, user expenses, last sale) are pulled and
+resolved once; each template only contributes its financing / growth / exit
+assumptions. All template variants are stacked and scored with a single
+vector_engine.evaluate call. Nothing is saved.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import vector_engine
+from templates import apply_template
+from underwriting import DealInputs, run_underwriting, verdict_from_score
+
+SWEEP_METRICS = ("CapRate", "CoC", "DSCR", "IRR", "NPV10", "CashFlowMonthly")
+
+@dataclass
+class Property:
+    """Template-independent facts about a deal (after provider enrichment)."""
+    address: str
+    listing_url: str = ""
+    price: Optional[float] = None
+    monthly_rent: Optional[float] = None
+    monthly_expenses: Optional[float] = None  # None = each template estimates from rent
+    last_sale_price: Optional[float] = None
+    last_sale_date: Optional[str] = None
+
+def deal_for_template(p: Property, t: Dict[str, Any]) -> DealInputs:
+    merged = apply_template(t, float(p.price or 0.0), float(p.monthly_rent or 0.0), float(p.monthly_expenses or 0.0))
+    return DealInputs(address=p.address, listing_url=p.listing_url,
+                      last_sale_price=p.last_sale_price, last_sale_date=p.last_sale_date, **merged)
+
+def _num(x: Any) -> Optional[float]:
+    if x is None:
+        return None
+    x = float(x)
+    return None if np.isnan(x) else x
+
+def sweep(p: Property, templates: List[Dict[str, Any]], *, workspace_id: int = 0) -> List[Dict[str, Any]]:
+    """templates: [{"name": ..., "template": {...}}]. Returns rows ranked by score (best first)."""
+    if not templates:
+        return []
+    deals = [deal_for_template(p, t["template"]) for t in templates]
+    rows: List[Dict[str, Any]] = []
+    if all(d.price and d.monthly_rent is not None and d.monthly_expenses is not None for d in deals):
+        res = vector_engine.evaluate(deals[0], vector_engine.stack_inputs(deals), workspace_id=workspace_id)
+        for k, (t, d) in enumerate(zip(templates, deals)):
+            score = float(res["score"][k, 0])
+            rows.append({"template": t["name"], "score": score, "grade": str(res["grade"][k, 0]),
+                         "grade_detail": str(res["grade_detail"][k, 0]), "verdict": verdict_from_score(score),
+                         "monthly_expenses": d.monthly_expenses,
+                         **{m: _num(res[m][k, 0]) for m in SWEEP_METRICS}})
+    else:
+        # incomplete data: the scalar pipeline handles missing inputs (flags instead of metrics)
+        for t, d in zip(templates, deals):
+            out = run_underwriting(d, explain=False, include_cashflows=False, workspace_id=workspace_id)
+            rows.append({"template": t["name"], "score": float(out.score), "grade": out.grade,
+                         "grade_detail": out.grade_detail, "verdict": out.verdict,
+                         "monthly_expenses": d.monthly_expenses,
+                         **{m: out.metrics.get(m) for m in SWEEP_METRICS}})
+    rows.sort(key=lambda r: (r["score"], r["IRR"] if r["IRR"] is not None else float("-inf")), reverse=True)
+    for n, r in enumerate(rows, start=1):
+        r["rank"] = n
+    return rows
@@ -0,0 +1,277 @@
+"""In-process metrics (counters + latency histograms) exported in Prometheus text format.
+
+Used by the API (`GET /metrics`) and the Streamlit Settings page. Each process
+keeps its own registry. With METRICS_MULTIPROC_DIR set (serve.py sets it for
+its workers), every process also writes a snapshot of its registry to that
+directory (start_snapshots(): every METRICS_SNAPSHOT_SEC and at shutdown), and
+render_prometheus() sums all snapshots, so whichever worker answers a scrape
+reports totals for the whole server. Snapshots of exited workers are kept so
+counters never go backwards; serve.py empties the directory at start.
+"""
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels_str(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _fmt(v: float) -> str:
+    f = float(v)
+    if f == float("inf"):
+        return "+Inf"
+    return str(int(f)) if f.is_integer() and abs(f) < 1e15 else repr(f)
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels.get(k, "")) for k in self.labelnames), 0.0)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], float]] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        items = sorted((self.snapshot() if values is None else values).items())
+        for key, v in items:
+            lines.append(f"{self.name}{_labels_str(self.labelnames, key)} {_fmt(v)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """count / mean / approximate p50 and p95 per label set (for dashboards)."""
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, row in items:
+            count, total = row[-2], row[-1]
+            rec: Dict[str, Any] = dict(zip(self.labelnames, key))
+            rec.update({"count": int(count), "mean_ms": (total / count * 1000.0) if count else None,
+                        "p50_ms": self._quantile(row, 0.50), "p95_ms": self._quantile(row, 0.95)})
+            out.append(rec)
+        return out
+
+    def _quantile(self, row: List[float], q: float) -> Optional[float]:
+        count = row[-2]
+        if not count:
+            return None
+        target, seen = q * count, 0.0
+        for b, c in zip(self.buckets, row):
+            seen += c
+            if seen >= target:
+                return b * 1000.0
+        return None  # above the largest bucket
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._values.items()}
+
+    def render(self, values: Optional[Dict[Tuple[str, ...], List[float]]] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        items = sorted((self.snapshot() if values is None else values).items())
+        for key, row in items:
+            cum = 0.0
+            for b, c in zip(self.buckets, row):
+                cum += c
+                le = 'le="%s"' % _fmt(b)
+                lines.append(f"{self.name}_bucket{_labels_str(self.labelnames, key, le)} {_fmt(cum)}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels_str(self.labelnames, key, le)} {_fmt(row[-2])}")
+            lines.append(f"{self.name}_count{_labels_str(self.labelnames, key)} {_fmt(row[-2])}")
+            lines.append(f"{self.name}_sum{_labels_str(self.labelnames, key)} {_fmt(row[-1])}")
+        return lines
+
+# ---- Registry ----
+_METRICS: List[Any] = []
+_CACHES: Dict[str, Any] = {}
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    m = Counter(name, help, labelnames)
+    _METRICS.append(m)
+    return m
+
+def histogram(name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    m = Histogram(name, help, labelnames, buckets)
+    _METRICS.append(m)
+    return m
+
+def register_cache(name: str, cache: Any) -> None:
+    """Export hits/misses of a cache.TTLCache (read at scrape time)."""
+    _CACHES[name] = cache
+
+HTTP_REQUESTS = counter("aire_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = histogram("aire_http_request_seconds", "HTTP request latency by route.", ("method", "route"))
+STAGE_LATENCY = histogram("aire_stage_seconds", "Grading pipeline stage latency.", ("stage",))
+DB_QUERIES = histogram("aire_db_query_seconds", "Database query latency by backend and statement type.", ("backend", "op"))
+PROVIDER_CALLS = counter("aire_provider_requests_total", "Data provider calls by outcome.", ("provider", "outcome"))
+
+def stage(name: str):
+    """with telemetry.stage("underwriting"): ..."""
+    return STAGE_LATENCY.time(stage=name)
+
+def sql_op(sql: str) -> str:
+    head = sql.lstrip().split(None, 1)
+    return head[0].lower() if head else ""
+
+# ---- Multiprocess snapshots ----
+_PROC: Tuple[int, str] = (0, "")  # (pid, snapshot file id); re-derived after fork
+
+def multiproc_dir() -> str:
+    return os.getenv("METRICS_MULTIPROC_DIR", "")
+
+def _snapshot_path(d: str) -> str:
+    global _PROC
+    if _PROC[0] != os.getpid():  # a fresh id per process, so a reused pid never overwrites a dead worker
+        _PROC = (os.getpid(), uuid.uuid4().hex[:8])
+    return os.path.join(d, f"metrics-{_PROC[0]}-{_PROC[1]}.json")
+
+def _local_snapshot() -> Dict[str, Any]:
+    return {
+        "metrics": {m.name: [[list(k), v] for k, v in m.snapshot().items()] for m in _METRICS},
+        "caches": {name: [int(getattr(c, "hits", 0)), int(getattr(c, "misses", 0))] for name, c in _CACHES.items()},
+    }
+
+def write_snapshot() -> None:
+    """Publish this process's registry to METRICS_MULTIPROC_DIR (atomic replace; no-op when unset)."""
+    d = multiproc_dir()
+    if not d:
+        return
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(_local_snapshot(), f)
+    os.replace(tmp, _snapshot_path(d))
+
+def start_snapshots(interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """Per worker, after fork: write snapshots every interval seconds (daemon thread)."""
+    if not multiproc_dir():
+        return None
+    every = float(interval if interval is not None else os.getenv("METRICS_SNAPSHOT_SEC", "5"))
+
+    def loop() -> None:
+        while True:
+            time.sleep(every)
+            try:
+                write_snapshot()
+            except OSError:
+                pass
+
+    t = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+    t.start()
+    return t
+
+def _merged() -> Tuple[Dict[str, Dict[Tuple[str, ...], Any]], Dict[str, List[int]]]:
+    """Sum of every snapshot in METRICS_MULTIPROC_DIR (this process's is refreshed first)."""
+    write_snapshot()
+    metrics: Dict[str, Dict[Tuple[str, ...], Any]] = {m.name: {} for m in _METRICS}
+    caches: Dict[str, List[int]] = {}
+    for path in sorted(glob.glob(os.path.join(multiproc_dir(), "metrics-*.json"))):
+        try:
+            with open(path) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):  # removed or half-written by a foreign writer
+            continue
+        for name, items in (snap.get("metrics") or {}).items():
+            into = metrics.get(name)
+            if into is None:
+                continue
+            for key, v in items:
+                key = tuple(key)
+                if isinstance(v, list):
+                    cur = into.get(key)
+                    into[key] = list(v) if cur is None or len(cur) != len(v) else [a + b for a, b in zip(cur, v)]
+                else:
+                    into[key] = into.get(key, 0.0) + v
+        for name, (hits, misses) in (snap.get("caches") or {}).items():
+            c = caches.setdefault(name, [0, 0])
+            c[0] += int(hits)
+            c[1] += int(misses)
+    return metrics, caches
+
+def render_prometheus() -> str:
+    if multiproc_dir():
+        merged, caches = _merged()
+        lines: List[str] = []
+        for m in _METRICS:
+            lines.extend(m.render(merged[m.name]))
+    else:
+        lines = []
+        for m in _METRICS:
+            lines.extend(m.render())
+        caches = {name: [int(getattr(c, "hits", 0)), int(getattr(c, "misses", 0))] for name, c in _CACHES.items()}
+    if caches:
+        for n, metric in enumerate(("aire_cache_hits_total", "aire_cache_misses_total")):
+            lines.append(f"# HELP {metric} Cache lookups by cache name.")
+            lines.append(f"# TYPE {metric} counter")
+            for name, hm in sorted(caches.items()):
+                lines.append(f'{metric}{{cache="{_escape(name)}"}} {hm[n]}')
+    return "\n".join(lines) + "\n"
+
+def cache_stats() -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for name, cache in sorted(_CACHES.items()):
+        hits, misses = int(cache.hits), int(cache.misses)
+        out.append({"cache": name, "hits": hits, "misses": misses, "size": len(cache),
+                    "hit_ratio": (hits / (hits + misses)) if (hits + misses) else None})
+    return out
+
+def provider_stats() -> List[Dict[str, Any]]:
+    rows: Dict[str, Dict[str, Any]] = {}
+    for (provider, outcome), v in sorted(PROVIDER_CALLS._values.items()):
+        r = rows.setdefault(provider, {"provider": provider, "ok": 0, "error": 0})
+        r[outcome] = int(v)
+    for r in rows.values():
+        total = r["ok"] + r["error"]
+        r["error_rate"] = (r["error"] / total) if total else None
+    return list(rows.values())
@@ -87,3 +87,26 @@ def normalize_template(t: Dict[str, Any]) -> Dict[str, Any]:
     out.setdefault("exit_cap_rate", 0.065)
     out.setdefault("defaults", {})
     return out
+
+def apply_template(t: Dict[str, Any], price: float, rent: float, exp: float) -> Dict[str, Any]:
+    """Template assumptions + property numbers -> DealInputs keyword values.
+    Expenses default to the template's share of rent when not given."""
+    defaults = (t.get("defaults") or {})
+    exp_pct = float(defaults.get("monthly_expenses_pct_of_rent", 0.45))
+    exp_est = exp if exp and exp > 0 else (rent * exp_pct if rent and rent > 0 else 0.0)
+    return {
+        "vacancy_rate": float(t.get("vacancy_rate", 0.08)),
+        "down_payment_pct": float(t.get("down_payment_pct", 20.0)),
+        "interest_rate_pct": float(t.get("interest_rate_pct", 7.25)),
+        "term_years": int(t.get("term_years", 30)),
+        "hold_years": int(t.get("hold_years", 7)),
+        "rent_growth": float(t.get("rent_growth", 0.03)),
+        "expense_growth": float(t.get("expense_growth", 0.03)),
+        "appreciation": float(t.get("appreciation", 0.03)),
+        "sale_cost_pct": float(t.get("sale_cost_pct", 0.07)),
+        "use_exit_cap": bool(t.get("use_exit_cap", False)),
+        "exit_cap_rate": float(t.get("exit_cap_rate", 0.065)),
+        "price": price if price and price > 0 else None,
+        "monthly_rent": rent if rent and rent > 0 else None,
+        "monthly_expenses": exp_est if exp_est and exp_est > 0 else None,
+    }
@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+
+import ai_memo
+
+
+class SlowStub(ai_memo.StubBackend):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay, self.in_flight, self.peak = delay, 0, 0
+        self._lock = threading.Lock()
+
+    def complete(self, msgs, model):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return super().complete(msgs, model)
+
+
+def test_memos_are_cached_persistently_and_generated_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "m.db"))
+    seeds = [{"address": f"{n} Elm St", "grade": "B", "score": 80 + n} for n in range(5)]
+    stub = SlowStub(delay=0.2)
+    svc = ai_memo.MemoService(stub, concurrency=5)
+
+    t0 = time.perf_counter()
+    memos = svc.get_many(seeds + seeds[:2])  # duplicates are generated once
+    assert time.perf_counter() - t0 < 0.6
+    assert stub.calls == 5 and stub.peak > 1
+    assert memos[5] == memos[0] and len(set(memos[:5])) == 5
+
+    ai_memo._FRONT.clear()  # a fresh process still reads the memos table
+    again = ai_memo.MemoService(ai_memo.StubBackend())
+    assert again.get(seeds[3]) == memos[3] and again.backend.calls == 0
+    assert ai_memo.MemoService(again.backend, model="other").get(seeds[3]) != memos[3]
+
+
+def test_report_memo_streams_sse_and_saves_into_report(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api_server
+    import storage
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "s.db"))
+    stub = ai_memo.StubBackend()
+
+    async def ws_7(*a, **k):
+        return 7
+
+    async def free(*a, **k):
+        return None
+
+    charged = []
+
+    async def record(ws, n=1):
+        charged.append(ws)
+
+    monkeypatch.setattr(api_server, "_authenticate", ws_7)
+    monkeypatch.setattr(api_server, "_check_quota", free)
+    monkeypatch.setattr(api_server, "_record_quota", record)
+    monkeypatch.setattr(ai_memo, "service", lambda *a, **k: ai_memo.MemoService(stub))
+    payload = {"inputs": {"address": "5 Oak St", "price": 250_000.0}, "outputs": {"grade": "B", "score": 81.0}}
+    rid = storage.save_report("5 Oak St", "", "B", 81.0, 0.8, payload, workspace_id=7)
+    other = storage.save_report("6 Oak St", "", "B", 81.0, 0.8, payload, workspace_id=8)
+    client = TestClient(api_server.app)
+
+    r = client.get(f"/v1/reports/{rid}/memo")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in r.text.strip().split("\n\n")]
+    tokens = [json.loads(b[1][5:])["text"] for b in events if b[0] == "event: token"]
+    assert len(tokens) > 3 and events[-1][0] == "event: done"
+    assert storage.read_report(rid)["outputs"]["memo"] == "".join(tokens)
+    assert storage.read_report(rid)["outputs"]["grade"] == "B"  # only the memo key was written
+
+    again = client.get(f"/v1/reports/{rid}/memo")
+    assert '"saved": true' in again.text and stub.calls == 1 and charged == [7]  # charged once, on done
+    assert client.get(f"/v1/reports/{other}/memo").status_code == 404
+
+
+class GatedStub(ai_memo.StubBackend):
+    """Streams only after release is set; fails instead when fail is set."""
+    def __init__(self):
+        super().__init__()
+        self.release, self.fail = threading.Event(), False
+
+    def stream(self, msgs, model):
+        self.release.wait(10)
+        if self.fail:
+            self.calls += 1
+            raise RuntimeError("model down")
+        yield from super().stream(msgs, model)
+
+
+def test_concurrent_memo_requests_share_one_generation_and_failures_are_free(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api_server
+    import storage
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "c.db"))
+    stub, charged = GatedStub(), []
+
+    async def ws_7(*a, **k):
+        return 7
+
+    async def free(*a, **k):
+        return None
+
+    async def record(ws, n=1):
+        charged.append(ws)
+
+    monkeypatch.setattr(api_server, "warmup", free)
+    monkeypatch.setattr(api_server, "_authenticate", ws_7)
+    monkeypatch.setattr(api_server, "_check_quota", free)
+    monkeypatch.setattr(api_server, "_record_quota", record)
+    monkeypatch.setattr(ai_memo, "service", lambda *a, **k: ai_memo.MemoService(stub))
+    payload = {"inputs": {"address": "8 Oak St"}, "outputs": {"grade": "C", "score": 72.0}}
+    rid = storage.save_report("8 Oak St", "", "C", 72.0, 0.7, payload, workspace_id=7)
+    bad = storage.save_report("9 Oak St", "", "C", 72.0, 0.7, {**payload, "inputs": {"address": "9 Oak St"}}, workspace_id=7)
+
+    with TestClient(api_server.app) as client:  # one event loop for all requests
+        bodies = {}
+
+        def fetch(n, report):
+            bodies[n] = client.get(f"/v1/reports/{report}/memo").text
+
+        threads = [threading.Thread(target=fetch, args=(n, rid)) for n in range(3)]
+        for t in threads:
+            t.start()
+        while len(api_server._MEMO_FLIGHTS) < 1:
+            time.sleep(0.01)
+        time.sleep(0.1)  # let all three requests join
+        stub.release.set()
+        for t in threads:
+            t.join()
+        assert stub.calls == 1 and charged == [7]
+        assert len(set(bodies.values())) == 1 and "event: done" in bodies[0]
+
+        stub.fail = True
+        failed = client.get(f"/v1/reports/{bad}/memo").text
+        assert "event: error" in failed and charged == [7]  # nothing saved, nothing charged
+        assert "memo" not in storage.read_report(bad)["outputs"] and not api_server._MEMO_FLIGHTS
+
+
+def test_attach_to_report_writes_only_its_key(tmp_path, monkeypatch):
+    import storage
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "a.db"))
+    rid = storage.save_report("1 Elm St", "", "B", 80.0, 0.8, {"inputs": {"address": "1 Elm St"}})
+    threads = [threading.Thread(target=storage.attach_to_report, args=(rid, k, {"k": k, "n": [1, 2]}))
+               for k in ("memo", "risk_sim", "notes")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    payload = storage.read_report(rid)
+    assert payload["inputs"] == {"address": "1 Elm St"}
+    assert payload["outputs"] == {k: {"k": k, "n": [1, 2]} for k in ("memo", "risk_sim", "notes")}
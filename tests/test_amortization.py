@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import amortization
+from underwriting import DealInputs, compute_metrics
+
+
+def test_schedule_pays_off_loan_and_matches_closed_form():
+    s = amortization.schedule(240_000, 0.0725, 30)
+    assert len(s["balance"]) == 360
+    assert s["principal"].sum() == pytest.approx(240_000)
+    assert s["balance"][-1] == pytest.approx(0.0, abs=1e-6)
+    assert s["balance"][83] == pytest.approx(amortization.balance_after(240_000, 0.0725, 30, 84))
+    assert np.allclose(s["interest"] + s["principal"], s["payment"])
+    assert amortization.balance_after(100_000, 0.0, 10, 60) == pytest.approx(50_000)
+
+
+def test_batch_schedules_and_exit_balance_in_irr():
+    b = amortization.schedule_batch([240_000, 100_000], [0.0725, 0.05], [30, 15])
+    assert b["balance"].shape == (2, 360)
+    assert b["principal"].sum(axis=1) == pytest.approx([240_000, 100_000])
+    assert b["payment"][1, 180:].sum() == 0.0
+
+    m = compute_metrics(DealInputs(address="a", price=300_000, monthly_rent=2_500, monthly_expenses=900))
+    assert m["LoanBalanceAtExit"] == pytest.approx(amortization.balance_after(240_000, 0.0725, 30, 84))
+    assert m["LoanBalanceAtExit"] < 240_000
+    assert m["EquityMultiple"] == pytest.approx(sum(m["Cashflows"][1:]) / 60_000)
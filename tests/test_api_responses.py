@@ -0,0 +1,27 @@
+from api_responses import COMPACT_SELECTION, needs, select_fields, selection
+
+CONTENT = {
+    "address": "1 Main St", "grade": "B", "score": 84.0, "flags": ["thin margin"],
+    "metrics": {"CapRate": 0.061, "IRR": 0.11, "DSCR": 1.3},
+}
+
+
+def test_selection_from_view_and_fields():
+    assert selection("full", None) is None
+    assert selection("compact", None) == COMPACT_SELECTION
+    assert selection("compact", "grade, metrics.IRR,,") == ["grade", "metrics.IRR"]  # fields win over view
+    assert selection("full", " , ") is None
+
+
+def test_select_fields_projects_and_omits_unknown_fields():
+    assert select_fields(CONTENT, ["grade", "metrics.IRR", "metrics.CapRate"]) == {
+        "grade": "B", "metrics": {"IRR": 0.11, "CapRate": 0.061}}
+    # unknown top-level fields, unknown metrics and dotted paths into non-dicts are left out, not errors
+    assert select_fields(CONTENT, ["nope", "metrics.NOPE", "grade.x", "score"]) == {"score": 84.0}
+    assert select_fields(CONTENT, ["metrics"]) == {"metrics": CONTENT["metrics"]}
+    assert select_fields(CONTENT, []) == {}
+
+
+def test_needs():
+    assert needs("metrics", None) and needs("metrics", ["metrics.IRR"]) and needs("metrics.IRR", ["metrics"])
+    assert not needs("provenance", COMPACT_SELECTION)
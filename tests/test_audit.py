@@ -0,0 +1,82 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import audit
+import db
+
+
+def test_concurrent_events_get_their_own_ids_and_chain_verifies(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "a.db"))
+    ids = {}
+
+    def worker(n):
+        ids[n] = audit.log_event(1, n, "model_promoted", {"n": n})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    rows = dict(db.fetchall("SELECT id, actor_user_id FROM audit_events"))
+    assert len(set(ids.values())) == 20 and all(rows[rid] == n for n, rid in ids.items())
+
+    more = audit.log_events([(1, 0, "note", {"k": k}) for k in range(5)] + [(2, 0, "note", {})])
+    assert more == sorted(more)
+    res = audit.verify_chain(1, page=7)
+    assert res["ok"] and res["checked"] == 25 and res["last_id"] == more[4]
+    assert isinstance(audit.list_events(1, limit=1)[0]["created_at"], int)
+
+    audit.log_event(1, 0, "note", {"k": 99})
+    assert audit.verify_chain(1, res["last_id"], res["last_hash"])["checked"] == 1  # resume from a checkpoint
+    db.exec_commit("UPDATE audit_events SET payload_json='{\"n\":-1}' WHERE id=?", (ids[3],))
+    assert audit.verify_chain(1) == {**audit.verify_chain(1), "ok": False, "bad_id": ids[3]}
+
+
+def _legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, workspace_id INTEGER NOT NULL,
+        actor_user_id INTEGER NOT NULL, event_type TEXT NOT NULL, created_at TEXT NOT NULL, payload_json TEXT NOT NULL)""")
+    conn.execute("INSERT INTO audit_events(workspace_id, actor_user_id, event_type, created_at, payload_json) VALUES (1, 1, 'old', 1700000000, '{}')")
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_text_timestamps_are_migrated(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    monkeypatch.setenv("SQLITE_PATH", str(path))
+    _legacy_db(path)
+
+    new_id = audit.log_event(1, 1, "new", {})
+    events = audit.list_events(1)
+    assert [e["event_type"] for e in events] == ["new", "old"] and events[1]["created_at"] == 1700000000
+    assert new_id == 2 and audit.verify_chain(1) == {**audit.verify_chain(1), "ok": True, "legacy": 1, "checked": 1}
+
+
+def test_concurrent_migrations_rebuild_the_legacy_table_once(tmp_path, monkeypatch):
+    path = tmp_path / "race.db"
+    monkeypatch.setenv("SQLITE_PATH", str(path))
+    _legacy_db(path)
+    errors = []
+
+    def run():
+        try:
+            audit.migrate()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert db.fetchall("SELECT id, created_at FROM audit_events") == [(1, 1700000000)]
+
+
+def test_queued_events_are_written_at_exit(tmp_path):
+    path = tmp_path / "exit.db"
+    code = "import audit; audit.enqueue(1, 1, 'late', {})"  # exits without waiting for the Future
+    subprocess.run([sys.executable, "-c", code], check=True, env={"SQLITE_PATH": str(path), "PYTHONPATH": "."}, timeout=60)
+    assert sqlite3.connect(path).execute("SELECT event_type FROM audit_events").fetchall() == [("late",)]
@@ -0,0 +1,15 @@
+from benchmarks import harness
+
+
+def test_regression_check_flags_only_slowdowns_past_threshold():
+    baseline = {"cases": {"a": {"sec": 1.0}, "b": {"sec": 1.0}, "c": {"sec": 2.0}}}
+    results = {"a": {"sec": 1.2}, "b": {"sec": 1.3}, "c": {"sec": 1.0}, "new": {"sec": 5.0}}
+    rows = {r["case"]: r for r in harness.check(results, baseline, threshold=0.25)}
+    assert set(rows) == {"a", "b", "c"}
+    assert [rows[k]["regressed"] for k in ("a", "b", "c")] == [False, True, False]
+
+
+def test_time_call_reports_per_call_seconds():
+    calls = []
+    r = harness.time_call(lambda: calls.append(1), repeat=3, min_sample=0.001)
+    assert r["repeat"] == 3 and r["loops"] >= 1 and 0 < r["sec"] <= r["median"]
@@ -0,0 +1,33 @@
+import io
+import zipfile
+
+import bulk_export
+import pdf_cache
+import storage
+
+
+def _save(n, ws):
+    payload = {"inputs": {"address": "1 Main St, Austin TX"},
+               "outputs": {"grade": "B", "score": 81.0, "confidence": 0.8, "verdict": "BUY",
+                           "metrics_summary": {"cap_rate": 0.061}, "flags": ["thin margin"], "rationale": ["ok"]}}
+    return [storage.save_report(f"{k} Main St", "", "B", 81.0, 0.8, payload, workspace_id=ws) for k in range(n)]
+
+
+def test_zip_streams_pdfs_in_order_across_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "e.db"))
+    monkeypatch.setattr(bulk_export, "RENDER_CHUNK", 2)
+    monkeypatch.setattr(bulk_export, "INLINE_BELOW", 4)
+    monkeypatch.setattr(pdf_cache, "CACHE", pdf_cache.PdfCache(str(tmp_path / "pdf")))
+    ids = _save(9, ws=3)
+    _save(1, ws=4)
+
+    chunks = list(bulk_export.iter_zip(bulk_export.iter_reports(list(reversed(ids)) + [ids[-1] + 1], 3), workers=2))
+    assert len(chunks) > 9  # one chunk per PDF plus the central directory
+    z = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    names = z.namelist()
+    assert [n.split("_")[2] for n in names] == [str(i) for i in reversed(ids)]
+    assert z.testzip() is None and z.read(names[0]).startswith(b"%PDF")
+
+    pdf = b"".join(bulk_export.iter_export(bulk_export.iter_reports(ids, 3), "pdf"))
+    assert pdf.count(b"/Type /Page\n") == 9
+    assert storage.list_report_ids(3, ids=[ids[0], 10_000]) == [ids[0]]
@@ -0,0 +1,73 @@
+import asyncio
+
+import providers
+from cache import TTLCache, AsyncSingleFlight
+from providers import ProviderKeys, normalize_address
+
+
+def test_ttl_cache_expiry_and_bound():
+    now = [0.0]
+    c = TTLCache(ttl_sec=10, maxsize=2, clock=lambda: now[0])
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)  # evicts least-recently used "b"
+    assert c.get("b") is None
+    now[0] = 11.0
+    assert c.get("a") is None
+    assert c.hits == 1 and c.misses == 2
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"price": 100}
+
+    async def main():
+        sf = AsyncSingleFlight()
+        results = await asyncio.gather(*[sf.do("k", lookup) for _ in range(25)])
+        assert sf.inflight() == 0
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == {"price": 100} for r in results)
+
+
+def test_normalize_address():
+    assert normalize_address("123 Main Street, Austin  TX") == normalize_address("123 main st austin tx")
+
+
+def test_pull_cache_keeps_partial_pulls_briefly_and_returns_copies(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(providers, "_PULL_CACHE", TTLCache(ttl_sec=3600, clock=lambda: now[0]))
+    monkeypatch.setattr(providers, "PARTIAL_TTL_SEC", 60.0)
+    answers = {"1 full st": 0, "2 partial st": 1, "3 down st": 3}  # failed provider calls per address
+    pulls = []
+
+    async def apull(address, keys, client=None):
+        pulls.append(address)
+        failed = answers[address]
+        return {"price": 100, "notes": ["RentCast value AVM"] if failed < 3 else []}, failed
+
+    monkeypatch.setattr(providers, "_apull", apull)
+    keys = ProviderKeys(rentcast_apikey="k")
+
+    def pull(address):
+        return asyncio.run(providers.apull_property_data_cached(address, keys))
+
+    first = pull("1 full st")
+    first["price"] = 1
+    first["notes"].append("edited")
+    assert pull("1 full st") == {"price": 100, "notes": ["RentCast value AVM"]}  # not the caller's edits
+    for a in ("2 partial st", "3 down st"):
+        pull(a), pull(a)
+    assert pulls == ["1 full st", "2 partial st", "3 down st", "3 down st"]
+
+    now[0] = 61.0  # the partial pull has expired; the complete one has not
+    for a in answers:
+        pull(a)
+    assert pulls[4:] == ["2 partial st", "3 down st"]
@@ -0,0 +1,66 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _table(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t(id INTEGER PRIMARY KEY AUTOINCREMENT, n INTEGER NOT NULL)")
+    conn.commit()
+    conn.close()
+
+
+async def _writes():
+    async def bad():
+        with pytest.raises(sqlite3.IntegrityError):
+            await db.aexec_commit("INSERT INTO t(n) VALUES(?)", (None,))
+
+    try:
+        ids = await asyncio.gather(
+            *[db.ainsert_returning_id("INSERT INTO t(n) VALUES(?)", (n,)) for n in range(40)],
+            bad(),
+            db.aexec_many("INSERT INTO t(n) VALUES(?)", [(100 + n,) for n in range(10)]),
+            db.aexec_commit("INSERT INTO t(n) VALUES(?)", (200,)),
+        )
+        rows = await db.afetchall("SELECT id, n FROM t ORDER BY id")
+        count = await db.afetchone("SELECT COUNT(1) FROM t")
+        return ids[:40], ids[41], rows, count
+    finally:
+        await db.aclose()
+
+
+@pytest.mark.parametrize("driver", ["aiosqlite", "thread fallback"])
+def test_concurrent_async_writes_commit_independently(tmp_path, monkeypatch, driver):
+    path = tmp_path / "a.db"
+    monkeypatch.setenv("SQLITE_PATH", str(path))
+    if driver != "aiosqlite":
+        async def none():
+            return None
+        monkeypatch.setattr(db, "_aiosqlite", none)
+    _table(path)
+
+    ids, many, rows, count = asyncio.run(_writes())
+    assert many == 10 and count == (51,)
+    by_id = dict(rows)
+    assert len(set(ids)) == 40 and [by_id[i] for i in ids] == list(range(40))  # each caller got its own row id
+    assert sorted(by_id.values()) == list(range(40)) + list(range(100, 110)) + [200]  # the failed insert left nothing behind
+    assert sqlite3.connect(path).execute("SELECT COUNT(1) FROM t").fetchone() == (51,)  # committed, not just visible
+
+
+def test_connection_follows_sqlite_path(tmp_path, monkeypatch):
+    for name in ("one.db", "two.db"):
+        _table(tmp_path / name)
+
+    async def main():
+        try:
+            monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "one.db"))
+            await db.aexec_commit("INSERT INTO t(n) VALUES(1)")
+            monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "two.db"))
+            return await db.afetchone("SELECT COUNT(1) FROM t")
+        finally:
+            await db.aclose()
+
+    assert asyncio.run(main()) == (0,)
@@ -0,0 +1,35 @@
+import dataclasses
+
+from eval_graph import EvalGraph
+from underwriting import DealInputs, run_underwriting
+
+
+def _deal(**kw):
+    base = dict(address="1 Main St", price=300_000, monthly_rent=2_600, monthly_expenses=950, last_sale_price=280_000)
+    base.update(kw)
+    return DealInputs(**base)
+
+
+def test_graph_matches_pipeline_and_recomputes_only_downstream():
+    g = EvalGraph()
+    i = _deal()
+    out = g.evaluate(i)
+    ref = run_underwriting(i)
+    assert out.score == ref.score and out.grade_detail == ref.grade_detail
+    assert out.metrics == ref.metrics and out.rationale == ref.rationale
+
+    dirty = g.update(dataclasses.replace(i, hold_years=10))
+    assert dirty == ["cashflows", "irr", "metrics", "scores", "rationale"]
+    out = g.outputs()
+    assert g.computed["financing"] == 1 and g.computed["noi"] == 1
+    assert out.metrics["IRR"] == run_underwriting(dataclasses.replace(i, hold_years=10)).metrics["IRR"]
+
+    assert g.update(dataclasses.replace(i, hold_years=10)) == []
+    g.outputs()
+    assert g.last_recomputed == []
+
+    i2 = dataclasses.replace(i, hold_years=10, interest_rate_pct=6.0)
+    g.update(i2)
+    out = g.outputs(explain=False)
+    assert g.computed["financing"] == 2 and "rationale" not in g.last_recomputed
+    assert out.score == run_underwriting(i2).score
@@ -0,0 +1,63 @@
+import asyncio
+
+import api_server
+import db
+import fingerprints
+import providers
+import storage
+from api_server import GradeRequest
+
+
+def test_fingerprint_tracks_grade_inputs_only():
+    base = {"price": 300_000, "monthly_rent": 2_200.0, "last_sale_date": "2019-06-01", "notes": ["rentcast"]}
+    fp = fingerprints.fingerprint(base, model_version="baseline")
+    assert fingerprints.fingerprint({**base, "price": 300_000.001, "notes": ["estated"]}, model_version="baseline") == fp
+    assert fingerprints.fingerprint({**base, "monthly_rent": 2_250.0}, model_version="baseline") != fp
+    assert fingerprints.fingerprint(base, model_version="model:3") != fp
+    assert fingerprints.address_key("12 Main Street, Austin TX") == fingerprints.address_key("12 main st austin tx")
+
+
+def test_watchlist_fingerprint_is_cleared_by_edits(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "f.db"))
+    wid = storage.add_watchlist("1 Elm St", workspace_id=1)
+    storage.set_watchlist_fingerprint(wid, "abc", 7)
+    assert storage.list_watchlist(1)[0]["fingerprint"] == "abc"
+    storage.update_watchlist(wid, target_score=90)
+    assert storage.list_watchlist(1)[0]["fingerprint"] is None
+
+    storage.set_fingerprint(1, "1 elm st", "abc", 5)
+    storage.set_fingerprint(1, "1 elm st", "def", 6)
+    assert storage.get_fingerprint(1, "1 elm st")["report_id"] == 6
+    assert storage.get_fingerprint(2, "1 elm st") is None
+
+
+def test_api_reuses_content_when_inputs_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "a.db"))
+    data = {"price": 325_000.0, "monthly_rent": 2_450.0, "notes": ["stub"]}
+    scored = []
+
+    async def pull(address, keys, client=None):
+        return dict(data)
+
+    async def score(i, **kw):
+        scored.append(i.price)
+        return api_server.run_underwriting(i, **kw)
+
+    monkeypatch.setattr(providers, "apull_property_data_cached", pull)
+    monkeypatch.setattr(api_server, "_score", score)
+
+    async def go():
+        try:
+            req = GradeRequest(raw="9 Fingerprint Ln, Austin, TX", monthly_expenses=900.0, use_auto=True)
+            first = await api_server._grade_content(req, None, 42)
+            again = await api_server._grade_content(req, None, 42)
+            data["price"] = 330_000.0
+            moved = await api_server._grade_content(req, None, 42)
+            promoted = await api_server._grade_content(req, None, 42, {"id": 9, "weights": {}})
+            return first, again, moved, promoted
+        finally:
+            await db.aclose()
+
+    first, again, moved, promoted = asyncio.run(go())
+    assert again is first and moved is not first and promoted is not moved
+    assert scored == [325_000.0, 330_000.0, 330_000.0]  # a different model re-scores
@@ -0,0 +1,40 @@
+import dataclasses
+
+import pytest
+
+import goal_seek
+from underwriting import DealInputs, run_underwriting, score_to_grade_detail
+
+
+def _deal(**kw):
+    return DealInputs(address="a", price=300_000, monthly_rent=2_500, monthly_expenses=900, **kw)
+
+
+def test_max_offer_meets_grade_and_dscr_targets():
+    i = _deal()
+    offer = goal_seek.max_offer(i, {"grade": "B", "dscr": 1.25})
+    assert offer["status"] == "ok"
+    at = run_underwriting(dataclasses.replace(i, price=offer["max_price"]), explain=False)
+    above = run_underwriting(dataclasses.replace(i, price=offer["max_price"] + 2), explain=False)
+    assert at.score >= 80 and at.metrics["DSCR"] >= 1.25
+    assert above.score < 80 or above.metrics["DSCR"] < 1.25
+
+
+def test_batch_matches_single_and_flags_infeasible():
+    deals = [_deal(), DealInputs(address="no rent", price=100_000), _deal(interest_rate_pct=6.0)]
+    batch = goal_seek.max_offer_batch(deals, {"irr": 0.12})
+    assert batch[1] is None
+    assert batch[0]["max_price"] == goal_seek.max_offer(deals[0], {"irr": 0.12})["max_price"]
+    assert goal_seek.max_offer(_deal(), {"dscr": 50})["status"] == "infeasible"
+    # cap rate is met at the bottom of the range (only fails at high prices); dscr is what binds
+    stuck = goal_seek.max_offer_batch([_deal()], {"dscr": 50, "cap_rate": 0.05})[0]
+    assert stuck["status"] == "infeasible" and stuck["binding"] == ["dscr"]
+    with pytest.raises(ValueError):
+        goal_seek.normalize_targets({"grade": "Z"})
+
+
+def test_detail_targets_use_the_middle_band():
+    for letter in "ABCDF":
+        need = goal_seek.normalize_targets({"grade_detail": letter})["score"]
+        assert score_to_grade_detail(need) == letter and score_to_grade_detail(need - 1) != letter
+    assert goal_seek.normalize_targets({"grade": "F"}) == {"score": 0.0}  # "F or better"
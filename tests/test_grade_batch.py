@@ -0,0 +1,60 @@
+import asyncio
+
+from fastapi import HTTPException
+
+import api_server
+import db
+import usage
+
+
+def test_batch_http_error_cancels_the_other_items(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "b.db"))
+    cancelled = []
+
+    async def ws_5(*a, **k):
+        return 5
+
+    async def quota(ws, n=1):
+        pass
+
+    async def grade_content(req, sel, ws, model=None):
+        if req.raw == "bad":
+            raise HTTPException(status_code=402, detail="quota")
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(req.raw)
+            raise
+
+    monkeypatch.setattr(api_server, "_authenticate", ws_5)
+    monkeypatch.setattr(api_server, "_consume_quota", quota)
+    monkeypatch.setattr(api_server, "_grade_content", grade_content)
+    monkeypatch.setattr(api_server, "BATCH_CONCURRENCY", 8)
+    r = TestClient(api_server.app).post("/v1/grade/batch", json={"items": ["slow 1", "bad", "slow 2"]})
+    assert r.status_code == 402
+    assert sorted(cancelled) == ["slow 1", "slow 2"]
+
+
+def test_batch_usage_is_one_bulk_insert(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "u.db"))
+    calls = []
+    real = usage.aexec_many
+
+    async def spy(sql, rows):
+        calls.append(len(rows))
+        return await real(sql, rows)
+
+    monkeypatch.setattr(usage, "aexec_many", spy)
+
+    async def main():
+        await usage.arecord(9, 0, "api_call", n=25)
+        await usage.arecord(9, 0, "api_call")
+        try:
+            return await usage.acount_last_24h(9, "api_call")
+        finally:
+            await db.aclose()
+
+    assert asyncio.run(main()) == 26
+    assert calls == [25]
@@ -0,0 +1,107 @@
+import api_server
+import model_registry
+from api_responses import COMPACT_SELECTION
+
+
+def _client(tmp_path, monkeypatch, scored):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "g.db"))
+    charged = []
+
+    async def ws_5(*a, **k):
+        return 5
+
+    async def quota(ws, n=1):
+        charged.append(n)
+
+    async def score(i, **kw):
+        scored.append(kw.get("model"))
+        return api_server.run_underwriting(i, **kw)
+
+    monkeypatch.setattr(api_server, "_authenticate", ws_5)
+    monkeypatch.setattr(api_server, "_consume_quota", quota)
+    monkeypatch.setattr(api_server, "_score", score)
+    api_server._RESPONSES.clear()
+    api_server._IDEMPOTENCY.clear()
+    api_server._FINGERPRINTS.clear()
+    return TestClient(api_server.app), charged
+
+
+def test_etag_304_and_idempotent_replay(tmp_path, monkeypatch):
+    scored = []
+    client, charged = _client(tmp_path, monkeypatch, scored)
+    body = {"raw": "1 Cache Ct, Austin TX", "price": 250_000, "monthly_rent": 2_100, "monthly_expenses": 800}
+
+    first = client.post("/v1/grade?view=compact", json=body)
+    assert first.status_code == 200 and first.json()["grade"]
+    etag = first.headers["etag"]
+    assert client.post("/v1/grade?view=compact", json=body, headers={"If-None-Match": etag}).status_code == 304
+    assert len(scored) == 1 and charged == [1]  # the 304 is free
+
+    k = {"Idempotency-Key": "abc"}
+    a = client.post("/v1/grade", json=body, headers=k)
+    b = client.post("/v1/grade", json=body, headers=k)
+    assert b.headers.get("idempotent-replayed") == "true" and b.json() == a.json()
+    assert len(charged) == 2  # the replay is free too
+    reused = client.post("/v1/grade", json={**body, "price": 260_000}, headers=k)
+    assert reused.status_code == 422
+
+
+def test_key_and_scoring_use_the_same_cached_model(tmp_path, monkeypatch):
+    scored = []
+    client, _ = _client(tmp_path, monkeypatch, scored)
+    model_registry._ACTIVE_CACHE.set(5, {})  # this worker still has "baseline" cached
+    mid = model_registry.create_candidate_model(5, "m1", {"cap_rate": 3.0})
+    model_registry.activate_model(5, mid)    # promoted; pops the local cache ...
+    model_registry._ACTIVE_CACHE.set(5, {})  # ... but another worker's cache is still stale
+    body = {"raw": "2 Cache Ct, Austin TX", "price": 250_000, "monthly_rent": 2_100, "monthly_expenses": 800}
+
+    stale = client.post("/v1/grade", json=body)
+    assert scored == [{}]  # scored with the version it is keyed under
+    model_registry._ACTIVE_CACHE.pop(5)
+    fresh = client.post("/v1/grade", json=body, headers={"If-None-Match": stale.headers["etag"]})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != stale.headers["etag"]
+    assert scored[-1]["id"] == mid
+    model_registry._ACTIVE_CACHE.pop(5)
+
+
+def test_selected_fields_match_the_declared_response(tmp_path, monkeypatch):
+    client, _ = _client(tmp_path, monkeypatch, [])
+    body = {"raw": "3 Cache Ct, Austin TX", "price": 250_000, "monthly_rent": 2_100, "monthly_expenses": 800}
+
+    compact = client.post("/v1/grade?view=compact", json=body).json()
+    assert set(compact) == {f.split(".")[0] for f in COMPACT_SELECTION}
+    assert set(compact["metrics"]) == {"CapRate", "CoC", "DSCR", "IRR"}
+    picked = client.post("/v1/grade?fields=grade,metrics.IRR,bogus,metrics.Bogus", json=body).json()
+    assert set(picked) == {"grade", "metrics"} and set(picked["metrics"]) == {"IRR"}
+    for partial in (compact, picked):
+        api_server.GradeSelection.model_validate(partial)
+    api_server.GradeResponse.model_validate(client.post("/v1/grade", json=body).json())
+
+    schema = client.get("/openapi.json").json()["paths"]["/v1/grade"]["post"]["responses"]["200"]
+    refs = {s["$ref"].rsplit("/", 1)[-1] for s in schema["content"]["application/json"]["schema"]["anyOf"]}
+    assert refs == {"GradeResponse", "GradeSelection"}
+
+
+def test_etag_follows_the_body_when_provider_data_changes(tmp_path, monkeypatch):
+    scored = []
+    client, _ = _client(tmp_path, monkeypatch, scored)
+    pulled = {"price": 250_000, "monthly_rent": 2_100, "price_source": "p1", "rent_source": "p1"}
+
+    async def pull(addr, keys):
+        return dict(pulled)
+
+    monkeypatch.setattr(api_server.providers, "apull_property_data_cached", pull)
+    body = {"raw": "4 Cache Ct, Austin TX", "use_auto": True, "monthly_expenses": 800}
+
+    first = client.post("/v1/grade?view=compact", json=body)
+    api_server._RESPONSES.clear()  # response cache expired; same provider data
+    same = client.post("/v1/grade?view=compact", json=body, headers={"If-None-Match": first.headers["etag"]})
+    assert same.headers["etag"] == first.headers["etag"]
+
+    pulled["monthly_rent"] = 3_400
+    api_server._RESPONSES.clear()
+    moved = client.post("/v1/grade?view=compact", json=body, headers={"If-None-Match": first.headers["etag"]})
+    assert moved.status_code == 200 and moved.headers["etag"] != first.headers["etag"]
+    assert moved.json() != first.json()
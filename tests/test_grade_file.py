@@ -0,0 +1,30 @@
+import csv
+import json
+
+import grade_file
+import storage
+from underwriting import DealInputs, run_underwriting
+
+
+def test_grade_file_streams_in_order_and_saves_reports(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "g.db"))
+    src, dst = tmp_path / "in.csv", tmp_path / "out.jsonl"
+    with open(src, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["address", "price", "rent", "expenses", "template"])
+        for n in range(25):
+            w.writerow([f"{n} Oak St" if n != 7 else "", 200_000 + n * 1_000, 1_800, 700 if n % 2 else "",
+                        {3: "Flip", 5: "brrrr", 9: "Condo"}.get(n, "")])
+
+    stats = grade_file.run(str(src), str(dst), template="ltr", workers=1, chunk_size=4, save_reports=True)
+    assert stats == {**stats, "rows": 25, "errors": 2, "saved": 23, "chunks": 7, "template": "Long-Term Rental (LTR)"}
+
+    rows = [json.loads(line) for line in open(dst)]
+    assert [r["row"] for r in rows] == list(range(25))
+    assert rows[7]["error"] == "missing address" and rows[3]["template"] == "Flip"
+    assert rows[5]["template"] == "BRRRR" and rows[5]["grade"]  # matched like --template
+    assert rows[9]["error"] == "unknown template: Condo" and rows[9]["address"] == "9 Oak St" and "grade" not in rows[9]
+    ref = run_underwriting(DealInputs(address="1 Oak St", price=201_000, monthly_rent=1_800, monthly_expenses=700),
+                           explain=False, include_cashflows=False)
+    assert rows[1]["score"] == ref.score and rows[1]["irr"] == ref.metrics["IRR"]
+    assert len(storage.list_reports(100)) == 23
@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import logger
+
+
+def test_events_are_batched_filtered_sampled_and_carry_context(capsys, monkeypatch):
+    monkeypatch.setattr(logger, "LEVEL", logger.LEVELS["info"])
+    monkeypatch.setattr(logger, "SAMPLE", {"grade_start": 0.0, "grade_saved": 1.0})
+    logger.flush()
+    capsys.readouterr()  # events queued by earlier tests
+
+    async def job():
+        with logger.context(job_id="j1"):
+            await asyncio.to_thread(logger.log_event, "grade_saved", report_id=1)
+            with logger.context(request_id="r1"):
+                logger.log_event("grade_start", raw="x")              # sampled out
+                logger.log_event("cache_probe", level="debug")        # below LOG_LEVEL
+                logger.log_event("grade_start", level="error", raw="y")  # sampling never drops errors
+
+    asyncio.run(job())
+    for n in range(2000):
+        logger.log_event("row", n=n)
+    assert logger.flush()
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+
+    first, second = lines[0], lines[1]
+    assert first["event"] == "grade_saved" and first["job_id"] == "j1" and first["elapsed_ms"] >= 0
+    assert "sample_rate" not in first
+    assert second == {**second, "event": "grade_start", "level": "error", "job_id": "j1", "request_id": "r1", "raw": "y"}
+    rows = [l for l in lines if l["event"] == "row"]
+    assert [r["n"] for r in rows] == list(range(2000)) and "job_id" not in rows[0]
+
+
+def test_fields_are_captured_at_call_time(monkeypatch):
+    queued = []
+    monkeypatch.setattr(logger._WRITER, "put", queued.append)
+    monkeypatch.setattr(logger, "LEVEL", logger.LEVELS["info"])
+    monkeypatch.setattr(logger, "SAMPLE", {})
+    row, flags = {"price": 100}, ["thin"]
+    with logger.context(job_id="j2") as ids:
+        logger.log_event("row_graded", row=row, flags=flags, n=1)
+        ids["job_id"] = "changed"
+    row["price"], flags[:] = 999, []  # the caller reuses its objects before the writer runs
+
+    line = json.loads(logger._format(queued[0]))
+    assert line == {**line, "job_id": "j2", "row": {"price": 100}, "flags": ["thin"], "n": 1}
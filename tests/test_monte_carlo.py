@@ -0,0 +1,27 @@
+import pytest
+
+import monte_carlo as mc
+from underwriting import DealInputs, compute_metrics
+
+
+def _deal(**kw):
+    return DealInputs(address="a", price=300_000, monthly_rent=2_500, monthly_expenses=900, **kw)
+
+
+def test_zero_variance_reproduces_deterministic_irr():
+    flat = mc.Driver(sd=0.0)
+    cfg = mc.SimConfig(n_paths=10, rent_growth=flat, expense_growth=flat, appreciation=flat, vacancy_rate=flat)
+    for i in (_deal(), _deal(use_exit_cap=True, hold_years=5)):
+        sim = mc.simulate(i, cfg)
+        assert sim["irr"]["p50"] == pytest.approx(compute_metrics(i)["IRR"], abs=1e-9)
+
+
+def test_seeded_and_batch_consistent():
+    cfg = mc.SimConfig(n_paths=2_000, seed=11)
+    a, b = _deal(hold_years=5), _deal(hold_years=10, down_payment_pct=25)
+    single = mc.simulate(a, cfg)
+    batch = mc.simulate_batch([a, DealInputs(address="no data"), b], cfg)
+    assert batch[1] is None
+    assert batch[0]["irr"] == single["irr"]
+    assert 0.0 <= single["p_irr_below_hurdle"] <= 1.0
+    assert single["irr"]["p5"] <= single["irr"]["p50"] <= single["irr"]["p95"]
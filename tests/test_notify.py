@@ -0,0 +1,59 @@
+import json
+import time
+
+import pytest
+
+import notify
+
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures, self.sent = failures, []
+
+    def send(self, recipient, subject, body, items):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("smtp down")
+        self.sent.append((recipient, subject, len(items)))
+
+
+def test_outbox_coalesces_per_recipient_and_retries_with_backoff(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "n.db"))
+    sink = tmp_path / "digests.jsonl"
+    hits = [{"workspace_id": 1, "address": f"{n} Elm St", "grade": "B", "score": 81.0 + n, "verdict": "Buy"} for n in range(3)]
+    assert notify.enqueue_hits(hits, "file", "a@example.com", 1) == 3
+    notify.enqueue_hits(hits[:1], "file", "b@example.com", 1)
+    notify.enqueue_hits(hits[:2], "smtp", "c@example.com", 1)
+
+    clock = [time.time() + 1]
+    smtp = Flaky(failures=1)
+    d = notify.Dispatcher({"file": notify.FileTransport(str(sink)), "smtp": smtp}, clock=lambda: clock[0])
+
+    first = d.drain_once()
+    assert first == {"claimed": 6, "digests": 3, "sent": 4, "retried": 2, "dead": 0}
+    lines = [json.loads(x) for x in sink.read_text().splitlines()]
+    assert sorted((x["to"], len(x["items"])) for x in lines) == [("a@example.com", 3), ("b@example.com", 1)]
+    assert "3 new hit(s)" in lines[0]["subject"] or "3 new hit(s)" in lines[1]["subject"]
+
+    assert d.drain_once()["claimed"] == 0  # backing off
+    clock[0] += notify.BACKOFF_MAX_SEC + 1
+    assert d.drain_once()["sent"] == 2
+    assert smtp.sent == [("c@example.com", "AIRE Alert digest: 2 new hit(s)", 2)]
+    assert notify.outbox_stats() == {"sent": 6}
+
+
+def test_hits_are_routed_per_workspace_without_a_global_fallback(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "r.db"))
+    sink = tmp_path / "digests.jsonl"
+    notify.set_workspace_route(1, "file", "shared@example.com")
+    notify.set_workspace_route(2, "file", "shared@example.com")
+    hits = [{"workspace_id": ws, "address": f"{ws} Elm St", "grade": "B", "score": 80.0} for ws in (1, 2, 3)]
+    assert notify.route_hits(hits) == {"queued": 2, "unrouted": 1}
+
+    d = notify.Dispatcher({"file": notify.FileTransport(str(sink))}, clock=lambda: time.time() + 1)
+    assert d.drain_once()["digests"] == 2  # same recipient, but never one digest across workspaces
+    bodies = [json.loads(x)["body"] for x in sink.read_text().splitlines()]
+    assert sorted(b.count("Elm St") for b in bodies) == [1, 1] and not any("3 Elm St" in b for b in bodies)
+    with pytest.raises(ValueError):
+        notify.set_workspace_route(1, "webhook", "http://internal/hook")
+    assert "log" not in notify.channels({})
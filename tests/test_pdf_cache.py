@@ -0,0 +1,56 @@
+import os
+
+import pdf_cache
+import storage
+
+
+def test_cache_hits_skip_render_and_evicts_least_recently_used(tmp_path):
+    cache = pdf_cache.PdfCache(str(tmp_path / "pdf"), max_bytes=2500)
+    renders = []
+
+    def render(n):
+        renders.append(n)
+        return b"%PDF" + bytes(1000)
+
+    assert cache.get(1, lambda: render(1)) == cache.get(1, lambda: render(1))
+    assert renders == [1] and (cache.hits, cache.misses) == (1, 1)
+    cache.get(2, lambda: render(2))
+    os.utime(cache.path_for(2), (1, 1))  # 2 is now the least recently used
+    cache.get(3, lambda: render(3))      # over 2500 bytes: evict down to 90%
+    assert sorted(os.listdir(tmp_path / "pdf")) == [os.path.basename(cache.path_for(n)) for n in (1, 3)]
+    assert len(cache) == 2
+
+
+def test_entries_and_etags_are_per_database(tmp_path, monkeypatch):
+    cache = pdf_cache.PdfCache(str(tmp_path / "pdf"))
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "staging.db"))
+    staging = cache.get(1, lambda: b"%PDF staging")
+    staging_tag, staging_dir = pdf_cache.etag(1), pdf_cache.default_dir()
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "prod.db"))
+    assert cache.get(1, lambda: b"%PDF prod") == b"%PDF prod" != staging
+    assert pdf_cache.etag(1) != staging_tag and pdf_cache.default_dir() != staging_dir
+
+
+def test_report_pdf_endpoint_serves_cached_pdf_with_etag(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api_server
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "p.db"))
+    monkeypatch.setattr(pdf_cache, "CACHE", pdf_cache.PdfCache(str(tmp_path / "pdf")))
+
+    async def ws_7(*a, **k):
+        return 7
+
+    monkeypatch.setattr(api_server, "_authenticate", ws_7)
+    payload = {"inputs": {"address": "5 Oak St"}, "outputs": {"grade": "B", "score": 81.0}}
+    rid = storage.save_report("5 Oak St", "", "B", 81.0, 0.8, payload, workspace_id=7)
+    other = storage.save_report("6 Oak St", "", "B", 81.0, 0.8, payload, workspace_id=8)
+    client = TestClient(api_server.app)
+
+    r = client.get(f"/v1/reports/{rid}/pdf")
+    assert r.status_code == 200 and r.content.startswith(b"%PDF")
+    assert r.headers["etag"] == pdf_cache.etag(rid) and "max-age" in r.headers["cache-control"]
+    assert client.get(f"/v1/reports/{rid}/pdf").content == r.content and pdf_cache.CACHE.hits == 1
+    assert client.get(f"/v1/reports/{rid}/pdf", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert client.get(f"/v1/reports/{other}/pdf").status_code == 404
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import portfolio
+import storage
+from underwriting import DealInputs, irr, run_underwriting
+
+
+def _save(address, price, rent, exp, hold=7):
+    i = DealInputs(address=address, price=price, monthly_rent=rent, monthly_expenses=exp, hold_years=hold)
+    out = run_underwriting(i, explain=False)
+    payload = {"inputs": i.__dict__, "outputs": {"metrics": out.metrics}}
+    return storage.save_report(address, "", out.grade, out.score, out.confidence, payload), out.metrics
+
+
+def test_portfolio_from_saved_reports(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "p.db"))
+    r1, m1 = _save("1 A St, Austin, TX 78701", 300_000, 2_600, 900)
+    r2, m2 = _save("2 B St, Dallas, TX 75201", 200_000, 1_900, 700, hold=5)
+    r3, m3 = _save("3 C St, Tulsa, OK 74103", 150_000, 1_400, 500)
+
+    other = storage.save_report("4 D St, Reno, NV 89501", "", "B", 80.0, 0.9, {"inputs": {"price": 1}}, workspace_id=7)
+
+    p = portfolio.analyze_reports([r1, r2, r3, other, 9999], workspace_id=0)
+    assert p["count"] == 3 and p["missing_ids"] == [other, 9999]  # another workspace's report is not readable
+    assert set(storage.read_reports([r1, other], None)) == {r1, other}  # explicit unscoped read
+    assert storage.read_reports([r1, other], 7).keys() == {other}
+    assert p["noi"] == pytest.approx(m1["NOI"] + m2["NOI"] + m3["NOI"])
+    assert p["cap_rate"] == pytest.approx(p["noi"] / 650_000)
+
+    cf = np.zeros(8)
+    for m in (m1, m2, m3):
+        cf[:len(m["Cashflows"])] += m["Cashflows"]
+    assert p["cashflows"] == pytest.approx(cf.tolist())
+    assert p["irr"] == pytest.approx(irr(cf.tolist()))
+    assert sum(p["dscr"]["buckets"].values()) == 3
+    assert p["concentration"]["by_state"]["shares"]["TX"] == pytest.approx(500_000 / 650_000)
+    assert p["concentration"]["hhi"] == pytest.approx(sum((x / 650_000) ** 2 for x in (300_000, 200_000, 150_000)))
@@ -0,0 +1,22 @@
+import random
+
+from ranking import Constraints, TopK, slim, top_k
+
+
+def test_topk_matches_full_sort_and_applies_constraints():
+    rng = random.Random(3)
+    rows = [{"id": n, "score": round(rng.uniform(40, 95), 1), "confidence": rng.choice([0.6, 0.8]),
+             "dscr": rng.choice([None, 0.9, 1.1, 1.3]), "price": rng.uniform(1e5, 6e5), "payload": {"n": n}}
+            for n in range(2_000)]
+    best = top_k(rows, 25)
+    expect = sorted(rows, key=lambda r: (-r["score"], -r["confidence"], r["id"]))[:25]
+    assert [r["id"] for r in best] == [r["id"] for r in expect]
+    assert [r["rank"] for r in best] == list(range(1, 26))
+
+    top = TopK(10, order=(("price", False),), constraints=Constraints(min_dscr=1.2, max_price=3e5))
+    top.extend(rows)
+    kept = top.results()
+    ok = [r for r in rows if r["dscr"] is not None and r["dscr"] >= 1.2 and r["price"] <= 3e5]
+    assert [r["id"] for r in kept] == [r["id"] for r in sorted(ok, key=lambda r: r["price"])[:10]]
+    assert top.stats() == {"seen": 2_000, "kept": 10, "filtered": 2_000 - len(ok), "evicted": len(ok) - 10}
+    assert "payload" not in slim(kept[0])
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+import api_server
+
+
+def test_ready_is_503_until_background_warmup_finishes(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    release = threading.Event()
+    warmed = []
+
+    async def warmup():
+        await asyncio.to_thread(release.wait, 10)
+        warmed.append(True)
+
+    monkeypatch.setattr(api_server, "warmup", warmup)
+    with TestClient(api_server.app) as client:  # runs the lifespan
+        assert client.get("/health").status_code == 200  # serving while warming
+        r = client.get("/ready")
+        assert r.status_code == 503 and r.json()["detail"] == "warming up"
+        release.set()
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.02)
+        assert client.get("/ready").json() == {"ready": True} and warmed
+    assert client.get("/ready").status_code == 503  # shut down
+
+
+def test_failed_warmup_stays_unready(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    async def warmup():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(api_server, "warmup", warmup)
+    with TestClient(api_server.app) as client:
+        time.sleep(0.05)
+        assert client.get("/ready").status_code == 503
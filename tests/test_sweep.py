@@ -0,0 +1,16 @@
+import pytest
+
+import sweep
+from templates import BUILTIN_TEMPLATES, normalize_template
+from underwriting import run_underwriting
+
+
+def test_template_sweep_matches_single_template_grades():
+    prop = sweep.Property(address="a", price=300_000, monthly_rent=2_500)
+    tpls = [{"name": n, "template": normalize_template(t)} for n, t in BUILTIN_TEMPLATES.items()]
+    rows = sweep.sweep(prop, tpls)
+    assert [r["rank"] for r in rows] == list(range(1, len(tpls) + 1))
+    by_name = {r["template"]: r for r in rows}
+    for t in tpls:
+        out = run_underwriting(sweep.deal_for_template(prop, t["template"]), explain=False)
+        assert by_name[t["name"]]["score"] == pytest.approx(out.score, rel=1e-9)
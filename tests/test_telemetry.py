@@ -0,0 +1,44 @@
+import os
+
+import telemetry
+
+
+def _line(text, prefix):
+    return next(l for l in text.splitlines() if l.startswith(prefix))
+
+
+def test_render_without_shared_dir_is_this_process(monkeypatch):
+    monkeypatch.delenv("METRICS_MULTIPROC_DIR", raising=False)
+    telemetry.HTTP_REQUESTS.inc(method="GET", route="/t-local", status="200")
+    telemetry.STAGE_LATENCY.observe(0.02, stage="t_local")
+    text = telemetry.render_prometheus()
+    assert "# TYPE aire_http_requests_total counter" in text
+    assert float(_line(text, 'aire_http_requests_total{method="GET",route="/t-local",status="200"}').split()[-1]) >= 1
+    assert _line(text, 'aire_stage_seconds_count{stage="t_local"}')
+
+
+def test_scrape_sums_every_worker_snapshot(monkeypatch, tmp_path):
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path))
+    key = 'aire_http_requests_total{method="POST",route="/t-workers",status="200"}'
+    before = telemetry.HTTP_REQUESTS.snapshot().get(("POST", "/t-workers", "200"), 0.0)
+
+    pid = os.fork()
+    if pid == 0:  # a worker forked from the preloaded master
+        try:
+            telemetry.HTTP_REQUESTS.inc(3, method="POST", route="/t-workers", status="200")
+            telemetry.STAGE_LATENCY.observe(0.5, stage="t_workers")
+            telemetry.write_snapshot()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    telemetry.HTTP_REQUESTS.inc(2, method="POST", route="/t-workers", status="200")
+    telemetry.STAGE_LATENCY.observe(0.5, stage="t_workers")
+    text = telemetry.render_prometheus()
+    # the child inherited `before`, so it is counted twice
+    assert float(_line(text, key).split()[-1]) == 2 * before + 5
+    assert _line(text, 'aire_stage_seconds_count{stage="t_workers"}').split()[-1] in ("2", "2.0")
+    assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+
+    # the exited worker's snapshot stays, so totals never go backwards
+    assert float(_line(telemetry.render_prometheus(), key).split()[-1]) == 2 * before + 5
@@ -0,0 +1,39 @@
+import math
+
+import numpy as np
+import pytest
+
+import sensitivity
+import vector_engine
+from underwriting import DealInputs, run_underwriting
+
+
+def _deals():
+    yield DealInputs(address="a", price=300_000, monthly_rent=2_500, monthly_expenses=900)
+    yield DealInputs(address="b", price=180_000, monthly_rent=1_900, monthly_expenses=600, last_sale_price=220_000,
+                     down_payment_pct=25, interest_rate_pct=6.1, hold_years=10, use_exit_cap=True)
+    yield DealInputs(address="c", price=650_000, monthly_rent=2_800, monthly_expenses=1_400, down_payment_pct=100)
+
+
+def test_evaluate_matches_scalar_pipeline():
+    for i in _deals():
+        out = run_underwriting(i, explain=False)
+        v = vector_engine.evaluate(i, weights=vector_engine.model_weights(0))
+        for k in ("CapRate", "CoC", "DSCR", "IRR", "NPV10"):
+            expected = out.metrics.get(k)
+            if expected is None:
+                assert math.isnan(float(v[k]))
+            else:
+                assert float(v[k]) == pytest.approx(expected, rel=1e-9)
+        assert float(v["score"]) == pytest.approx(out.score, rel=1e-9)
+        assert str(v["grade_detail"]) == out.grade_detail
+
+
+def test_grid_shape_and_monotonic_rate():
+    i = DealInputs(address="a", price=300_000, monthly_rent=2_500, monthly_expenses=900)
+    g = sensitivity.grid(i, sensitivity.Axis.pct("price", i.price, 0.20, 21),
+                         sensitivity.Axis.linspace("interest_rate_pct", 5, 9, 17))
+    assert g["score"].shape == (17, 21)
+    # higher rate -> lower DSCR at a fixed price
+    assert np.all(np.diff(g["DSCR"][:, 10]) < 0)
+    assert sensitivity.to_json(g)["grade"][0][0] in {"A", "B", "C", "D", "F"}
@@ -0,0 +1,113 @@
+import asyncio
+
+import db
+import storage
+from watch_daemon import WatchDaemon
+
+
+def test_incremental_scan_skips_unchanged_items_and_digests_new_hits(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "w.db"))
+    data = {
+        "1 Elm St": {"price": 150_000.0, "monthly_rent": 2_400.0, "notes": ["stub"]},
+        "2 Oak St": {"price": 600_000.0, "monthly_rent": 2_000.0, "notes": ["stub"]},
+    }
+    for n, addr in enumerate(data):
+        storage.add_watchlist(addr, target_grade="C", target_score=70, workspace_id=n + 1)
+
+    async def pull(address):
+        return dict(data[address])
+
+    digests = []
+    daemon = WatchDaemon(pull=pull, notify=digests.append, concurrency=2)
+
+    async def scan():
+        try:
+            return await daemon.scan_once()
+        finally:
+            await db.aclose()
+
+    first = asyncio.run(scan())
+    assert first["graded"] == 2 and first["recorded"] == 2 and first["unchanged"] == 0
+    assert [h["address"] for h in digests[0]] == ["1 Elm St"]
+
+    second = asyncio.run(scan())
+    assert second["graded"] == 0 and second["unchanged"] == 2 and len(digests) == 1
+
+    data["2 Oak St"]["price"] = 610_000.0
+    third = asyncio.run(scan())
+    assert third["graded"] == 1 and third["new_hits"] == 0
+    runs = storage.list_alert_runs(10)
+    assert len(runs) == 3
+    latest = storage.read_alert_run(max(r["id"] for r in runs))
+    assert latest["delta"]["grade"][0] is not None and latest["inputs"]["price"] == 610_000.0
+
+
+def test_scan_keys_and_grades_with_the_same_cached_model(tmp_path, monkeypatch):
+    import model_registry
+    import watch_daemon
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "m.db"))
+    storage.add_watchlist("3 Ash St", target_grade="C", target_score=70, workspace_id=9)
+    graded = []
+    real = watch_daemon.run_underwriting
+    monkeypatch.setattr(watch_daemon, "run_underwriting", lambda i, **kw: graded.append(kw["model"]) or real(i, **kw))
+
+    async def pull(address):
+        return {"price": 150_000.0, "monthly_rent": 2_400.0}
+
+    daemon = WatchDaemon(pull=pull, notify=lambda hits: None)
+
+    async def scan():
+        try:
+            return await daemon.scan_once()
+        finally:
+            await db.aclose()
+
+    mid = model_registry.create_candidate_model(9, "m", {"cap_rate": 2.0})
+    model_registry.activate_model(9, mid)
+    model_registry._ACTIVE_CACHE.set(9, {})  # the daemon's cache has not seen the promotion yet
+    asyncio.run(scan())
+    assert graded == [{}]  # recorded under "baseline", so the next scan after expiry re-grades
+    model_registry._ACTIVE_CACHE.pop(9)
+    assert asyncio.run(scan())["graded"] == 1 and graded[-1]["id"] == mid
+    assert asyncio.run(scan())["unchanged"] == 1
+    model_registry._ACTIVE_CACHE.pop(9)
+
+
+def test_daemon_and_alerts_page_share_the_watchlist_fingerprint_and_model(tmp_path, monkeypatch):
+    import model_registry
+    import watch_daemon
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "s.db"))
+    wid = storage.add_watchlist("4 Fir St", target_grade="C", target_score=70, workspace_id=3)
+    mid = model_registry.create_candidate_model(3, "m", {"cap_rate": 2.0})
+    model_registry.activate_model(3, mid)  # both scanners must grade with this one
+    graded = []
+    real = watch_daemon.run_underwriting
+    monkeypatch.setattr(watch_daemon, "run_underwriting", lambda i, **kw: graded.append(kw["model"].get("id")) or real(i, **kw))
+    pulled = {"price": 150_000.0, "monthly_rent": 2_400.0, "notes": ["stub"]}
+
+    async def pull(address):
+        return dict(pulled)
+
+    async def scan():
+        try:
+            return await WatchDaemon(pull=pull, notify=lambda hits: None).scan_once()
+        finally:
+            await db.aclose()
+
+    def page_scan():  # what the Alerts page does per item
+        item = next(it for it in storage.list_watchlist(3) if it["id"] == wid)
+        prev = storage.last_alert_runs([wid]).get(wid)
+        model = model_registry.get_active_model_cached(3) or {}
+        return watch_daemon.scan_item(item, dict(pulled), watch_daemon.watch_template(), model, prev, user_id=1, scanner="app")
+
+    assert asyncio.run(scan())["graded"] == 1
+    assert page_scan()["unchanged"]  # the daemon's key lets the page skip
+    pulled["price"] = 155_000.0
+    res = page_scan()
+    assert not res["unchanged"] and storage.read_alert_run(res["run_id"])["scanner"] == "app"
+    assert res["hit"] and not res["new_hit"]  # still a hit since the daemon's run: not notified again
+    assert asyncio.run(scan())["unchanged"] == 1  # and the page's key lets the daemon skip
+    assert graded == [mid, mid]
+    model_registry._ACTIVE_CACHE.pop(3)
@@ -2,6 +2,10 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any, List, Tuple
 import math
 
+import learning
+from amortization import balance_after, monthly_payment
+from model_registry import get_active_model_cached
+
 @dataclass
 class DealInputs:
     address: str
@@ -43,18 +47,6 @@ class DealOutputs:
     ai_meta: Dict[str, Any]
     narrative_seed: Dict[str, Any]
 
-def monthly_payment(principal: float, annual_rate: float, years: int) -> Optional[float]:
-    try:
-        if principal <= 0 or years <= 0:
-            return None
-        r = max(0.0, annual_rate) / 12.0
-        n = years * 12
-        if r == 0:
-            return principal / n
-        return principal * (r * (1 + r) ** n) / (((1 + r) ** n) - 1)
-    except Exception:
-        return None
-
 def irr(cashflows: List[float]) -> Optional[float]:
     """Robust IRR solver (no numpy). Returns periodic IRR or None."""
     if not cashflows or len(cashflows) < 2:
@@ -103,20 +95,29 @@ def npv(discount: float, cashflows: List[float]) -> Optional[float]:
     except Exception:
         return None
 
-def project_cashflows(i: DealInputs) -> Dict[str, Any]:
+def financing(i: DealInputs) -> Dict[str, Any]:
+    """Down payment, loan, equity and monthly payment (computed once per grade)."""
+    price = float(i.price or 0.0)
+    down = max(0.0, min(1.0, i.down_payment_pct / 100.0))
+    loan = price * (1 - down)
+    pay = monthly_payment(loan, i.interest_rate_pct / 100.0, int(i.term_years)) if loan > 0 else None
+    return {"down": down, "loan": loan, "equity": price * down, "payment": pay}
+
+def cashflow_model(i: DealInputs, fin: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Yearly equity cashflows and exit figures (everything but IRR / NPV)."""
     if i.price is None:
-        return {"cashflows": [], "irr": None, "npv": None, "exit_value": None, "noi0": None, "debt0": None}
+        return {"cashflows": [], "exit_value": None, "noi0": None, "debt0": None,
+                "loan_balance_exit": None, "equity_multiple": None}
 
+    fin = fin or financing(i)
     vac = max(0.0, min(0.50, float(i.vacancy_rate or 0.0)))
     rent0 = float(i.monthly_rent or 0.0) * 12.0
     exp0 = float(i.monthly_expenses or 0.0) * 12.0
     noi0 = (rent0 * (1 - vac)) - exp0
 
-    down = max(0.0, min(1.0, i.down_payment_pct / 100.0))
-    equity0 = i.price * down
-    loan = i.price * (1 - down)
-
-    debt_m = monthly_payment(loan, i.interest_rate_pct / 100.0, int(i.term_years)) if loan > 0 else None
+    equity0 = fin["equity"]
+    loan = fin["loan"]
+    debt_m = fin["payment"]
     debt0 = (debt_m or 0.0) * 12.0
 
     cashflows = [-equity0]
@@ -133,23 +134,34 @@ def project_cashflows(i: DealInputs) -> Dict[str, Any]:
     else:
         exit_value = i.price * ((1 + float(i.appreciation)) ** int(i.hold_years))
 
+    # the loan is repaid at its amortized balance, not the original principal
+    balance = balance_after(loan, i.interest_rate_pct / 100.0, int(i.term_years), int(i.hold_years) * 12, debt_m) if loan > 0 else 0.0
     net_sale = exit_value * (1 - float(i.sale_cost_pct))
     if loan > 0:
-        net_sale -= loan
+        net_sale -= balance
     cashflows[-1] += net_sale
 
     return {
         "cashflows": cashflows,
-        "irr": irr(cashflows),
-        "npv": npv(0.10, cashflows),
         "exit_value": exit_value,
         "noi0": noi0,
         "debt0": debt0,
+        "loan_balance_exit": balance,
+        "equity_multiple": (sum(cashflows[1:]) / equity0) if equity0 > 0 and len(cashflows) > 1 else None,
     }
 
-def compute_metrics(i: DealInputs) -> Dict[str, Any]:
-    m: Dict[str, Any] = {}
+def returns(cashflows: List[float]) -> Dict[str, Any]:
+    if not cashflows:
+        return {"irr": None, "npv": None}
+    return {"irr": irr(cashflows), "npv": npv(0.10, cashflows)}
+
+def project_cashflows(i: DealInputs, fin: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    model = cashflow_model(i, fin)
+    return {**model, **returns(model["cashflows"])}
 
+def operating_metrics(i: DealInputs, fin: Dict[str, Any]) -> Dict[str, Any]:
+    """Year-one metrics (NOI, cap rate, CoC, DSCR) plus price change vs last sale."""
+    m: Dict[str, Any] = {}
     if i.price is not None and i.monthly_rent is not None and i.monthly_expenses is not None:
         vac = max(0.0, min(0.50, float(i.vacancy_rate or 0.0)))
         gross = i.monthly_rent * 12.0
@@ -158,9 +170,8 @@ def compute_metrics(i: DealInputs) -> Dict[str, Any]:
         m["NOI"] = noi
         m["CapRate"] = (noi / i.price) if i.price else None
 
-        down = max(0.0, min(1.0, i.down_payment_pct/100.0))
-        loan = i.price * (1 - down)
-        pay = monthly_payment(loan, i.interest_rate_pct/100.0, int(i.term_years)) if loan > 0 else 0.0
+        down = fin["down"]
+        pay = fin["payment"] if fin["loan"] > 0 else 0.0
         m["LoanPaymentMonthly"] = pay
         cf_m = (gross*(1-vac)/12.0) - i.monthly_expenses - (pay or 0.0)
         m["CashFlowMonthly"] = cf_m
@@ -171,16 +182,25 @@ def compute_metrics(i: DealInputs) -> Dict[str, Any]:
     if i.price is not None and i.last_sale_price is not None and i.last_sale_price > 0:
         m["PriceChangePct"] = (i.price - i.last_sale_price) / i.last_sale_price
         m["PriceChangeAbs"] = i.price - i.last_sale_price
+    return m
 
-    model = project_cashflows(i)
+def merge_metrics(op: Dict[str, Any], model: Dict[str, Any], include_cashflows: bool = True) -> Dict[str, Any]:
+    m = dict(op)
     m["IRR"] = model.get("irr")
     m["NPV10"] = model.get("npv")
     m["ExitValue"] = model.get("exit_value")
-    m["Cashflows"] = model.get("cashflows")
+    m["LoanBalanceAtExit"] = model.get("loan_balance_exit")
+    m["EquityMultiple"] = model.get("equity_multiple")
+    if include_cashflows:
+        m["Cashflows"] = model.get("cashflows")
     m["NOI0"] = model.get("noi0")
     m["DebtAnnual"] = model.get("debt0")
     return m
 
+def compute_metrics(i: DealInputs, include_cashflows: bool = True) -> Dict[str, Any]:
+    fin = financing(i)
+    return merge_metrics(operating_metrics(i, fin), project_cashflows(i, fin), include_cashflows)
+
 def score_to_grade(score: float) -> str:
     if score >= 90:
         return "A"
@@ -235,7 +255,8 @@ def verdict_from_score(score: float) -> str:
         return "PASS (Most cases)"
     return "AVOID"
 
-def score_and_grade(i: DealInputs, m: Dict[str, Any]) -> Tuple[float, float, List[str], List[str]]:
+def score_and_grade(i: DealInputs, m: Dict[str, Any], explain: bool = True) -> Tuple[float, float, List[str], List[str]]:
+    """Base underwriting score. Rationale strings are only formatted when explain=True."""
     # confidence: how complete the core underwriting data is
     core = 0
     if i.price is not None: core += 1
@@ -245,7 +266,8 @@ def score_and_grade(i: DealInputs, m: Dict[str, Any]) -> Tuple[float, float, Lis
     conf = min(1.0, 0.25 + 0.18*core)
 
     flags: List[str] = []
-    reasons: List[str] = ["Base underwriting starts at 50/100."]
+    # (format string, value) pairs; rendered into rationale text at the end if requested
+    notes: List[Tuple[str, Any]] = [("Base underwriting starts at 50/100.", None)]
     score = 50.0
 
     cap = m.get("CapRate")
@@ -258,88 +280,91 @@ def score_and_grade(i: DealInputs, m: Dict[str, Any]) -> Tuple[float, float, Lis
     if cap is not None:
         if cap >= 0.08:
             score += 12
-            reasons.append(f"Cap rate {cap:.2%} ≥ 8% adds +12.")
+            notes.append(("Cap rate {:.2%} ≥ 8% adds +12.", cap))
         elif cap >= 0.06:
             score += 7
-            reasons.append(f"Cap rate {cap:.2%} ≥ 6% adds +7.")
+            notes.append(("Cap rate {:.2%} ≥ 6% adds +7.", cap))
         elif cap >= 0.045:
             score += 2
-            reasons.append(f"Cap rate {cap:.2%} ≥ 4.5% adds +2.")
+            notes.append(("Cap rate {:.2%} ≥ 4.5% adds +2.", cap))
         else:
             score -= 6
             flags.append("Low cap rate")
-            reasons.append(f"Cap rate {cap:.2%} < 4.5% subtracts -6.")
+            notes.append(("Cap rate {:.2%} < 4.5% subtracts -6.", cap))
     else:
         flags.append("Missing cap-rate inputs")
-        reasons.append("Cap rate unavailable (missing price/rent/expenses).")
+        notes.append(("Cap rate unavailable (missing price/rent/expenses).", None))
 
     if coc is not None:
         if coc >= 0.12:
             score += 10
-            reasons.append(f"Cash-on-cash {coc:.2%} ≥ 12% adds +10.")
+            notes.append(("Cash-on-cash {:.2%} ≥ 12% adds +10.", coc))
         elif coc >= 0.08:
             score += 6
-            reasons.append(f"Cash-on-cash {coc:.2%} ≥ 8% adds +6.")
+            notes.append(("Cash-on-cash {:.2%} ≥ 8% adds +6.", coc))
         elif coc >= 0.05:
             score += 2
-            reasons.append(f"Cash-on-cash {coc:.2%} ≥ 5% adds +2.")
+            notes.append(("Cash-on-cash {:.2%} ≥ 5% adds +2.", coc))
         else:
             score -= 6
             flags.append("Low cash-on-cash")
-            reasons.append(f"Cash-on-cash {coc:.2%} < 5% subtracts -6.")
+            notes.append(("Cash-on-cash {:.2%} < 5% subtracts -6.", coc))
     else:
         flags.append("Missing CoC inputs")
-        reasons.append("Cash-on-cash unavailable (missing rent/expenses/price).")
+        notes.append(("Cash-on-cash unavailable (missing rent/expenses/price).", None))
 
     if dscr is not None:
         if dscr >= 1.35:
             score += 8
-            reasons.append(f"DSCR {dscr:.2f} ≥ 1.35 adds +8.")
+            notes.append(("DSCR {:.2f} ≥ 1.35 adds +8.", dscr))
         elif dscr >= 1.20:
             score += 5
-            reasons.append(f"DSCR {dscr:.2f} ≥ 1.20 adds +5.")
+            notes.append(("DSCR {:.2f} ≥ 1.20 adds +5.", dscr))
         elif dscr >= 1.05:
             score += 1
-            reasons.append(f"DSCR {dscr:.2f} ≥ 1.05 adds +1.")
+            notes.append(("DSCR {:.2f} ≥ 1.05 adds +1.", dscr))
         else:
             score -= 12
             flags.append("DSCR risk")
-            reasons.append(f"DSCR {dscr:.2f} < 1.05 subtracts -12.")
+            notes.append(("DSCR {:.2f} < 1.05 subtracts -12.", dscr))
     else:
         flags.append("Missing DSCR inputs")
-        reasons.append("DSCR unavailable (missing NOI or debt service).")
+        notes.append(("DSCR unavailable (missing NOI or debt service).", None))
 
     # Forward returns
     if irr_v is not None:
         if irr_v >= 0.18:
             score += 10
-            reasons.append(f"IRR {irr_v:.2%} ≥ 18% adds +10.")
+            notes.append(("IRR {:.2%} ≥ 18% adds +10.", irr_v))
         elif irr_v >= 0.14:
             score += 7
-            reasons.append(f"IRR {irr_v:.2%} ≥ 14% adds +7.")
+            notes.append(("IRR {:.2%} ≥ 14% adds +7.", irr_v))
         elif irr_v >= 0.10:
             score += 3
-            reasons.append(f"IRR {irr_v:.2%} ≥ 10% adds +3.")
+            notes.append(("IRR {:.2%} ≥ 10% adds +3.", irr_v))
         else:
             score -= 7
             flags.append("Low IRR")
-            reasons.append(f"IRR {irr_v:.2%} < 10% subtracts -7.")
+            notes.append(("IRR {:.2%} < 10% subtracts -7.", irr_v))
     else:
         flags.append("IRR unavailable (needs price + rent + expenses)")
-        reasons.append("IRR unavailable (needs price + rent + expenses).")
+        notes.append(("IRR unavailable (needs price + rent + expenses).", None))
 
     # Price momentum from last sale
     if chg is not None:
         if chg <= -0.05:
             score += 3
             flags.append("Discount vs last sale")
-            reasons.append(f"Price is {abs(chg):.1%} below last sale adds +3.")
+            notes.append(("Price is {:.1%} below last sale adds +3.", abs(chg)))
         elif chg >= 0.25:
             score -= 6
             flags.append("Big run-up vs last sale")
-            reasons.append(f"Price is {chg:.1%} above last sale subtracts -6.")
+            notes.append(("Price is {:.1%} above last sale subtracts -6.", chg))
 
     score = max(0.0, min(100.0, score))
+    if not explain:
+        return score, conf, flags, []
+    reasons = [text if v is None else text.format(v) for text, v in notes]
     reasons.append(f"Base underwriting score: {score:.1f}/100.")
 
     return score, conf, flags, reasons
@@ -388,27 +413,34 @@ def _driver_label(feature: str) -> str:
     }
     return labels.get(feature, feature.replace("_", " ").title())
 
-def run_underwriting(i: DealInputs) -> DealOutputs:
-    m = compute_metrics(i)
-    base_score, conf, flags, reasons = score_and_grade(i, m)
+def ai_blend(i: DealInputs, m: Dict[str, Any], workspace_id: int = 0, model: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """AI score for the deal and the weight it gets in the final blend."""
     ai_payload, ai_completeness = _ai_payload(i, m)
-    ai_grade, ai_score, ai_conf, ai_meta = grade_with_model(ai_payload)
+    _, ai_score, _, ai_meta = grade_with_model(ai_payload, workspace_id, model)
     ai_weight = 0.0 if ai_completeness <= 0 else min(0.35, 0.15 + 0.20 * ai_completeness)
-    score = base_score if ai_weight <= 0 else (base_score * (1 - ai_weight) + ai_score * ai_weight)
-    score = max(0.0, min(100.0, float(score)))
-    grade = score_to_grade(score)
-    grade_detail = score_to_grade_detail(score)
-    verdict = verdict_from_score(score)
-    reasons.append(
-        f"AI score {ai_score:.1f}/100 blended at {ai_weight:.0%} weight → final {score:.1f}/100."
-    )
-    ai_drivers = []
-    for item in ai_meta.get("top_drivers", [])[:5]:
+    return {"score": ai_score, "weight": ai_weight, "meta": ai_meta}
+
+def blended_score(base_score: float, ai: Dict[str, Any]) -> float:
+    w = ai["weight"]
+    score = base_score if w <= 0 else (base_score * (1 - w) + ai["score"] * w)
+    return max(0.0, min(100.0, float(score)))
+
+def ai_rationale(score: float, ai: Dict[str, Any]) -> List[str]:
+    reasons = [f"AI score {ai['score']:.1f}/100 blended at {ai['weight']:.0%} weight → final {score:.1f}/100."]
+    for item in ai["meta"].get("top_drivers", [])[:5]:
         feat = _driver_label(str(item.get("feature")))
         contrib = float(item.get("contribution") or 0.0)
         direction = "supports" if contrib >= 0 else "pressures"
-        ai_drivers.append(f"AI driver: {feat} {direction} the grade ({contrib:+.2f}).")
-    reasons.extend(ai_drivers)
+        reasons.append(f"AI driver: {feat} {direction} the grade ({contrib:+.2f}).")
+    return reasons
+
+def assemble_outputs(i: DealInputs, m: Dict[str, Any], base_score: float, conf: float, flags: List[str],
+                     reasons: List[str], ai: Dict[str, Any]) -> DealOutputs:
+    score = blended_score(base_score, ai)
+    grade = score_to_grade(score)
+    grade_detail = score_to_grade_detail(score)
+    verdict = verdict_from_score(score)
+    ai_score, ai_weight, ai_meta = ai["score"], ai["weight"], ai["meta"]
     seed = {
         "address": i.address,
         "price": i.price,
@@ -450,13 +482,32 @@ def run_underwriting(i: DealInputs) -> DealOutputs:
         narrative_seed=seed,
     )
 
-def grade_with_model(payload: Dict[str, Any], workspace_id: int = 0) -> Tuple[str, float, float, Dict[str, Any]]:
+def run_underwriting(i: DealInputs, *, explain: bool = True, include_cashflows: bool = True, workspace_id: int = 0,
+                     model: Optional[Dict[str, Any]] = None) -> DealOutputs:
+    """Full grading pipeline. explain=False skips rationale text (API compact views);
+    include_cashflows=False drops the per-year Cashflows list from metrics;
+    workspace_id selects that workspace's ACTIVE model (0 = baseline), or pass
+    model (the active model already looked up; {} = baseline) so the result
+    matches a version the caller keyed it by.
+    eval_graph.EvalGraph runs the same steps incrementally."""
+    m = compute_metrics(i, include_cashflows=include_cashflows)
+    base_score, conf, flags, reasons = score_and_grade(i, m, explain=explain)
+    ai = ai_blend(i, m, workspace_id, model)
+    if explain:
+        reasons.extend(ai_rationale(blended_score(base_score, ai), ai))
+    return assemble_outputs(i, m, base_score, conf, flags, reasons, ai)
+
+def grade_with_model(payload: Dict[str, Any], workspace_id: int = 0,
+                     model: Optional[Dict[str, Any]] = None) -> Tuple[str, float, float, Dict[str, Any]]:
     """Enterprise-safe scorer.
-    Uses baseline weights by default; uses ACTIVE workspace model if present.
+    Uses baseline weights by default; uses ACTIVE workspace model if present
+    (or the given model; {} = baseline).
     Returns explainability + model metadata for auditing.
     """
     features = learning.extract_features(payload)
-    model = get_active_model(int(workspace_id)) if workspace_id else None
+    if model is None:
+        model = get_active_model_cached(int(workspace_id)) if workspace_id else None
+    model = model or None
     weights = (model.get("weights") if model else None) or learning.default_weights()
     p = learning.predict_proba(weights, features)
     score = learning.proba_to_score(p)
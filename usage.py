@@ -1,5 +1,5 @@
 import time
-from db import backend, connect, exec_commit, fetchone
+from db import backend, connect, exec_commit, fetchone, afetchone, aexec_commit, aexec_many, aensure
 from typing import Dict
 
 def now() -> int:
@@ -24,6 +24,21 @@ def migrate() -> None:
         updated_at BIGINT NOT NULL,
         PRIMARY KEY(workspace_id, day_key)
     )""")
+    # Quota log read by count_last_24h (one row per api_call / grade)
+    cur.execute("""CREATE TABLE IF NOT EXISTS usage_events(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at INTEGER NOT NULL,
+        workspace_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        event_type TEXT NOT NULL
+    )""" if b == "sqlite" else """CREATE TABLE IF NOT EXISTS usage_events(
+        id BIGSERIAL PRIMARY KEY,
+        created_at BIGINT NOT NULL,
+        workspace_id BIGINT NOT NULL,
+        user_id BIGINT NOT NULL,
+        event_type TEXT NOT NULL
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_usage_events_ws_type_time ON usage_events(workspace_id, event_type, created_at)")
     conn.commit()
     try: conn.close()
     except Exception: pass
@@ -42,3 +57,20 @@ def record(workspace_id: int, user_id: int, event_type: str) -> None:
     conn.execute("INSERT INTO usage_events(created_at, workspace_id, user_id, event_type) VALUES(?,?,?,?)",
                  (now(), int(workspace_id), int(user_id), event_type))
     conn.commit()
+
+# ---- Async variants (API service) ----
+async def acount_last_24h(workspace_id: int, event_type: str) -> int:
+    await aensure(migrate)
+    cutoff = now() - 24*3600
+    row = await afetchone("SELECT COUNT(1) FROM usage_events WHERE workspace_id=? AND event_type=? AND created_at>=?",
+                          (int(workspace_id), event_type, cutoff))
+    return int((row[0] if row else 0) or 0)
+
+async def arecord(workspace_id: int, user_id: int, event_type: str, n: int = 1) -> None:
+    """n > 1 records n events in one bulk insert (batch jobs)."""
+    await aensure(migrate)
+    row = (now(), int(workspace_id), int(user_id), event_type)
+    if n == 1:
+        await aexec_commit("INSERT INTO usage_events(created_at, workspace_id, user_id, event_type) VALUES(?,?,?,?)", row)
+    else:
+        await aexec_many("INSERT INTO usage_events(created_at, workspace_id, user_id, event_type) VALUES(?,?,?,?)", [row] * int(n))
@@ -0,0 +1,209 @@
+"""Background watchlist scanner.
+
+    python -m watch_daemon                  # scan every WATCH_INTERVAL_SEC (default 900s)
+    python -m watch_daemon --once           # one pass over every workspace, then exit
+
+Scans all workspaces' watchlists with at most WATCH_CONCURRENCY items in
+flight. For each item the provider data is pulled (shared, cached async
+client) and scan_item() fingerprints it together with the template, the
+item's target and the workspace's active model version
+(fingerprints.watch_key). If the fingerprint matches the one stored on the
+item, nothing changed: the item is neither re-graded nor written. Otherwise
+it is graded and one alert_run is recorded with a compact payload and the
+delta against the previous run; no report row is created. The Alerts page
+scans through scan_item() too, with the same template (watch_template()), so
+either scanner's fingerprint lets the other skip an unchanged item. Items that newly cross their
+target are queued in the notification outbox once per scan, each to its own
+workspace's recipient (workspaces without one are skipped); delivery happens
+in the notify dispatcher, never on the scan path.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import db
+import fingerprints
+import model_registry
+import notify
+import providers
+import storage
+from logger import context as log_context, log_event, new_id
+from templates import BUILTIN_TEMPLATES, apply_template, normalize_template
+from underwriting import DealInputs, run_underwriting
+
+INTERVAL_SEC = float(os.getenv("WATCH_INTERVAL_SEC", "900"))
+CONCURRENCY = int(os.getenv("WATCH_CONCURRENCY", "8"))
+DEFAULT_TEMPLATE = os.getenv("WATCH_TEMPLATE", "Long-Term Rental (LTR)")
+GRADE_RANK = {"A": 4, "B": 3, "C": 2, "D": 1, "F": 0}
+
+Pull = Callable[[str], Awaitable[Dict[str, Any]]]
+
+def watch_template(name: str = DEFAULT_TEMPLATE) -> Dict[str, Any]:
+    """The normalized template watchlist items are graded with (WATCH_TEMPLATE)."""
+    return normalize_template(BUILTIN_TEMPLATES.get(name) or BUILTIN_TEMPLATES[DEFAULT_TEMPLATE])
+
+def is_hit(item: Dict[str, Any], grade: str, score: float) -> int:
+    return int(score >= float(item.get("target_score") or 0.0)
+               and GRADE_RANK.get(grade, 0) >= GRADE_RANK.get(item.get("target_grade") or "F", 0))
+
+def deal_for(item: Dict[str, Any], pulled: Dict[str, Any], template: Dict[str, Any]) -> DealInputs:
+    merged = apply_template(template, float(pulled.get("price") or 0.0), float(pulled.get("monthly_rent") or 0.0),
+                            float(pulled.get("monthly_expenses") or 0.0))
+    return DealInputs(
+        address=item["address"],
+        listing_url=item.get("url") or "",
+        last_sale_price=float(pulled["last_sale_price"]) if pulled.get("last_sale_price") else None,
+        last_sale_date=str(pulled["last_sale_date"]) if pulled.get("last_sale_date") else None,
+        **merged,
+    )
+
+HIT_FIELDS = ("watchlist_id", "workspace_id", "address", "grade", "grade_detail", "score", "verdict")
+
+def scan_item(item: Dict[str, Any], pulled: Dict[str, Any], template: Dict[str, Any], model: Dict[str, Any],
+              prev: Optional[Dict[str, Any]], *, user_id: int = 0, scanner: str = "watch_daemon") -> Dict[str, Any]:
+    """Grade and record one watchlist item unless its fingerprint is unchanged (blocking).
+
+    Returns {"unchanged": True, ...} when skipped, else the graded row with its
+    alert run id, hit and new_hit (a hit whose previous run was not one).
+    """
+    ws = int(item["workspace_id"] or 0)
+    row: Dict[str, Any] = {"watchlist_id": item["id"], "workspace_id": ws, "address": item["address"],
+                           "url": item.get("url") or "", "sources": pulled.get("notes", [])}
+    key = fingerprints.watch_key(item, pulled, template, model_registry.model_version(model))
+    if item.get("fingerprint") == key:
+        return {**row, "unchanged": True, "fingerprint": key}
+    i = deal_for(item, pulled, template)
+    out = run_underwriting(i, explain=False, include_cashflows=False, workspace_id=ws, model=model)
+    hit = is_hit(item, out.grade, out.score)
+    delta = None
+    if prev:
+        delta = {"grade": [prev.get("grade"), out.grade],
+                 "score": out.score - float(prev.get("score") or 0.0),
+                 "hit": [int(prev.get("hit") or 0), hit]}
+    payload = {
+        "inputs": i.__dict__,
+        "outputs": {"grade": out.grade, "grade_detail": out.grade_detail, "score": out.score,
+                    "verdict": out.verdict, "confidence": out.confidence, "metrics": out.metrics, "flags": out.flags},
+        "delta": delta,
+        "sources": row["sources"],
+        "scanner": scanner,
+    }
+    run_id = storage.save_alert_run(item["id"], item["address"], row["url"], out.grade, out.score, out.confidence,
+                                    hit, payload, workspace_id=ws, user_id=user_id)
+    storage.set_watchlist_fingerprint(item["id"], key, run_id)
+    row.update(unchanged=False, fingerprint=key, run_id=run_id, grade=out.grade, grade_detail=out.grade_detail,
+               score=out.score, confidence=out.confidence, verdict=out.verdict, flags=out.flags,
+               hit=hit, new_hit=bool(hit and not (prev and prev.get("hit"))))
+    return row
+
+def queue_digest(hits: List[Dict[str, Any]]) -> None:
+    """Queue the scan's new hits in the outbox (notify.py), each to its own workspace's recipient."""
+    if not hits:
+        return
+    stats = notify.route_hits(hits)
+    log_event("watch_digest", hits=len(hits), workspaces=len({int(h["workspace_id"] or 0) for h in hits}), **stats)
+
+class WatchDaemon:
+    def __init__(self, *, template: str = DEFAULT_TEMPLATE, concurrency: int = CONCURRENCY,
+                 pull: Optional[Pull] = None, notify: Callable[[List[Dict[str, Any]]], None] = queue_digest):
+        keys = providers.keys_from_env()
+        self.pull: Pull = pull or (lambda address: providers.apull_property_data_cached(address, keys))
+        self.template_name = template
+        self.template = watch_template(template)
+        self.concurrency = max(1, int(concurrency))
+        self.notify = notify
+        self._stop = asyncio.Event()
+
+    async def scan_once(self) -> Dict[str, Any]:
+        with log_context(job_id=new_id()):  # ties every event of one scan together
+            return await self._scan_once()
+
+    async def _scan_once(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        items = await db.arun(storage.list_watchlist, 0)
+        last = await db.arun(storage.last_alert_runs, [it["id"] for it in items])
+        # One model per workspace for the whole scan, from the cache scoring uses: the
+        # fingerprint's version and the grade always come from the same model
+        models: Dict[int, Dict[str, Any]] = {}
+        for ws in {int(it["workspace_id"] or 0) for it in items}:
+            models[ws] = await model_registry.aget_active_model(ws) or {}
+        stats = {"items": len(items), "unchanged": 0, "graded": 0, "recorded": 0, "errors": 0, "new_hits": 0}
+        hits: List[Dict[str, Any]] = []
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(item: Dict[str, Any]) -> None:
+            async with sem:
+                try:
+                    await self._scan_item(item, last.get(int(item["id"])), models[int(item["workspace_id"] or 0)], stats, hits)
+                except Exception as e:
+                    stats["errors"] += 1
+                    log_event("watch_item_error", level="error", watchlist_id=item["id"], error=f"{type(e).__name__}: {e}")
+
+        await asyncio.gather(*(one(it) for it in items))
+        if hits:
+            await asyncio.to_thread(self.notify, hits)
+        stats["seconds"] = round(time.perf_counter() - t0, 3)
+        log_event("watch_scan", **stats)
+        return stats
+
+    async def _scan_item(self, item: Dict[str, Any], prev: Optional[Dict[str, Any]], model: Dict[str, Any],
+                         stats: Dict[str, Any], hits: List[Dict[str, Any]]) -> None:
+        pulled = await self.pull(item["address"]) or {}
+        res = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(scan_item, item, pulled, self.template, model, prev))
+        if res["unchanged"]:
+            stats["unchanged"] += 1
+            return
+        stats["graded"] += 1
+        stats["recorded"] += 1
+        if res["new_hit"]:
+            stats["new_hits"] += 1
+            hits.append({k: res[k] for k in HIT_FIELDS})
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run_forever(self, interval: float = INTERVAL_SEC) -> None:
+        while not self._stop.is_set():
+            try:
+                await self.scan_once()
+            except Exception as e:
+                log_event("watch_scan_failed", level="error", error=f"{type(e).__name__}: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+async def _main(args: argparse.Namespace) -> None:
+    daemon = WatchDaemon(template=args.template, concurrency=args.concurrency)
+    if not args.once:
+        notify.start_background(notify.transports_from_env())  # or run `python -m notify` separately
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        if args.once:
+            await daemon.scan_once()
+        else:
+            await daemon.run_forever(args.interval)
+    finally:
+        await providers.aclose()
+        await db.aclose()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(prog="python -m watch_daemon", description="Scan every workspace's watchlist on a cadence.")
+    p.add_argument("--interval", type=float, default=INTERVAL_SEC, help="seconds between scans")
+    p.add_argument("--concurrency", type=int, default=CONCURRENCY, help="items in flight")
+    p.add_argument("--template", default=DEFAULT_TEMPLATE)
+    p.add_argument("--once", action="store_true", help="run a single scan and exit")
+    asyncio.run(_main(p.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()